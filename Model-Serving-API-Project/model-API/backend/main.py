@@ -1,29 +1,28 @@
 import asyncio
 import os
-import joblib
+from shared.startup import startup_profile
 from shared import logger
-from fastapi import FastAPI
+from shared.logger_config import configure_logging, current_route
+
+# Before the remaining imports, so anything they log goes through the queue
+configure_logging()
+
+from fastapi import FastAPI, Request
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from pydantic_settings import BaseSettings
-from models import MODELS
 from concurrent.futures import ThreadPoolExecutor
-from routes import health, predict, jobs, models
-from shared.state import MODEL_REGISTRY
-from shared.load_models import load_models
-from settings import settings
+from routes import health, predict, jobs, models, metrics, backtest, rank, profiles, explain, ensemble
+from shared.load_models import ensure_models_loaded, unload_models
 
 # ==================
 # CONFIGURATION
 # ==================
 
-class Settings(BaseSettings):
-    model_dir: str = "models"
-
-settings = Settings()
+# Settings live in settings.py (`from settings import settings`)
 API_VERSION = "/v2"
+startup_profile.role = "api"
 
 # ==================
 # APP INIT
@@ -43,6 +42,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ==================
+# LOG CONTEXT
+# ==================
+
+@app.middleware("http")
+async def log_route_context(request: Request, call_next):
+    # Tags log records with the request path (used for per-route sampling)
+    token = current_route.set(request.url.path)
+    try:
+        return await call_next(request)
+    finally:
+        current_route.reset(token)
+
 # ==================
 # STATIC FRONTEND
 # ==================
@@ -61,15 +73,18 @@ async def lifespan(app: FastAPI):
     pool = ThreadPoolExecutor(max_workers=num_cores)
     loop = asyncio.get_event_loop()
     loop.set_default_executor(pool)
-    logger.info(f"Thread pool with {num_cores} workers configured")
+    logger.info("Thread pool with %d workers configured", num_cores)
 
-    # Load models
-    load_models()
+    # Load models (once per process; heavy ML imports happen here)
+    with startup_profile.phase("load_models"):
+        ensure_models_loaded()
+    startup_profile.mark_ready()
+    logger.info("Startup profile: %s", startup_profile.report())
 
     try:
         yield
     finally:
-        MODEL_REGISTRY.clear()
+        unload_models()
         logger.info("Model registry cleared on shutdown")
         pool.shutdown(wait=True)
         logger.info("Thread pool shut down")
@@ -84,6 +99,12 @@ app.include_router(health.router, prefix=f"{API_VERSION}/health", tags=["Health"
 app.include_router(predict.router, prefix=f"{API_VERSION}/predict", tags=["Predict"])
 app.include_router(jobs.router, prefix=f"{API_VERSION}/jobs", tags=["Jobs"])
 app.include_router(models.router, prefix=f"{API_VERSION}/models", tags=["Models"])
+app.include_router(rank.router, prefix=f"{API_VERSION}/rank", tags=["Rank"])
+app.include_router(ensemble.router, prefix=f"{API_VERSION}/ensemble", tags=["Ensemble"])
+app.include_router(explain.router, prefix=f"{API_VERSION}/explain", tags=["Explain"])
+app.include_router(backtest.router, prefix=f"{API_VERSION}/backtest", tags=["Backtest"])
+app.include_router(metrics.router, prefix=f"{API_VERSION}/metrics", tags=["Metrics"])
+app.include_router(profiles.router, prefix=f"{API_VERSION}/profiles", tags=["Profiles"])
 
 # ==================
 # STATIC INDEX
@@ -92,3 +113,6 @@ app.include_router(models.router, prefix=f"{API_VERSION}/models", tags=["Models"
 @app.get("/")
 def read_index():
     return FileResponse("static/index.html")
+
+
+startup_profile.mark("imports")
@@ -1,5 +1,4 @@
 import os
-import requests
 import json
 from functools import lru_cache
 from typing import Dict
@@ -7,8 +6,6 @@ from typing import Dict
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import SecurityScopes
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, jwk
-from jose.exceptions import JWTError, ExpiredSignatureError
 
 # --- Environment Variables for Auth0 Integration ---
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")                     # Your Auth0 tenant domain
@@ -23,6 +20,8 @@ def get_jwks():
     Fetch the JSON Web Key Set (JWKS) from Auth0 and cache the result in memory.
     These keys are used to verify the signature of incoming JWTs.
     """
+    import requests  # only needed for this one-off fetch
+
     jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
     return requests.get(jwks_url).json()
 
@@ -53,6 +52,11 @@ class Auth0JWTBearer(HTTPBearer):
         Validate the JWT by verifying its signature and claims against Auth0's public JWKS.
         Returns the decoded payload if successful.
         """
+        # Imported on first use so processes that never verify tokens
+        # (Celery workers, tooling) don't pay for jose/cryptography.
+        from jose import jwt, jwk
+        from jose.exceptions import JWTError, ExpiredSignatureError
+
         try:
             # Extract unverified header to get the key ID (kid)
             unverified_header = jwt.get_unverified_header(token)
@@ -1,6 +1,6 @@
 #List of our models, Sync models can be done synchronously, Async models must use Aysnchronous prediction
 from datetime import datetime
-from typing import Any, Dict, List, TypedDict
+from typing import Any, Dict, List, NotRequired, TypedDict
 
 # Add more models when we have them
 
@@ -13,6 +13,8 @@ class ModelInfo(TypedDict):
     schema_: Dict[str, List[str]]
     type: str
     filename: str
+    bundle: NotRequired[str]  # packaged artifacts dir (see tools/package_artifacts.py), preferred over `filename`
+    shadow: NotRequired[str]  # model_id scored on this model's live traffic in the background (not returned to clients)
 
 MODELS: Dict[str, ModelInfo] = {
     "xgb_momentum": {
@@ -31,7 +33,8 @@ MODELS: Dict[str, ModelInfo] = {
             ]
         },
         "type": "sync",
-        "filename": "model_artifacts.pkl"
+        "filename": "model_artifacts.pkl",
+        "bundle": "bundles/xgb_momentum/1.0"
     },
     "xgb_momentum_async": {
         "model_id": "xgb_momentum_async",
@@ -49,6 +52,7 @@ MODELS: Dict[str, ModelInfo] = {
             ]
         },
         "type": "async",
-        "filename": "model_artifacts.pkl"
+        "filename": "model_artifacts.pkl",
+        "bundle": "bundles/xgb_momentum/1.0"  # same booster and preprocessing as xgb_momentum
     }
 }
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Response, Security, HTTPException, status
+from middleware.auth import get_current_user_with_scopes
+
+from schema import AsyncPredictionResponse, BacktestRequest, BacktestStatusResponse
+from models import MODELS
+from shared.backtest import resolve_dataset
+from shared.queues import BULK, queue_router
+from shared import logger
+import shared
+
+router = APIRouter()
+
+
+@router.post("/", response_model=AsyncPredictionResponse, status_code=202, tags=["Backtest"])
+async def submit_backtest(
+    request: BacktestRequest,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"])
+):
+    """
+    Submit a historical backtest of a registered model as a Celery job.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `predictions:create` scope.
+
+    The job scores every ticker in [start_date, end_date] of the market-data
+    parquet (default `crypto_market_data.parquet`) and reports IC, hit rate
+    and long-short return against the 7-day forward target.
+    """
+    try:
+        model_id = request.model_id
+        user_id = user["sub"]
+        logger.info("Backtest request for model '%s' by user '%s'", model_id, user_id)
+
+        if model_id not in MODELS:
+            raise HTTPException(status_code=404, detail="Model not found")
+        if request.start_date > request.end_date:
+            raise HTTPException(status_code=422, detail="start_date must not be after end_date")
+        try:
+            resolve_dataset(request.dataset)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+        job = queue_router.send(
+            "run_backtest",
+            BULK,
+            args=[
+                model_id,
+                request.start_date.isoformat(),
+                request.end_date.isoformat(),
+                request.dataset,
+                request.quantile,
+                user_id,
+            ],
+        )
+
+        return {
+            "user_id": user_id,
+            "job_id": job.id,
+            "model_id": model_id,
+            "status": "PENDING",
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error submitting backtest", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@router.get("/{job_id}", response_model=BacktestStatusResponse, tags=["Backtest"])
+async def get_backtest(
+    job_id: str,
+    response: Response,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:read"])
+):
+    """
+    Poll a backtest job.
+
+    Returns:
+    --------
+    - 202 with `progress` (stage, done, total) while pending or running
+    - 500 if the job failed
+    - 200 with the evaluation metrics under `result` once finished
+    """
+    try:
+        result = shared.celery_app.AsyncResult(job_id)
+        status_str = result.status
+
+        if status_str in ("PENDING", "STARTED", "RETRY", "PROGRESS"):
+            response.status_code = 202
+            info = result.info if isinstance(result.info, dict) else {}
+            return {
+                "user_id": info.get("user_id"),
+                "job_id": job_id,
+                "model_id": info.get("model_id"),
+                "status": status_str,
+                "progress": {k: info[k] for k in ("stage", "done", "total") if k in info} or None,
+            }
+        if status_str == "FAILURE":
+            raise HTTPException(status_code=500, detail=f"Job failed: {result.result}")
+
+        if status_str == "SUCCESS":
+            raw = result.result
+            return {
+                "user_id": raw["user_id"],
+                "job_id": job_id,
+                "model_id": raw["model_id"],
+                "status": raw["status"],
+                "result": raw["result"],
+            }
+
+        raise HTTPException(status_code=500, detail=f"Unhandled job status: {status_str}")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error parsing backtest result", exc_info=True)
+        raise HTTPException(status_code=500, detail="Malformed backtest result structure")
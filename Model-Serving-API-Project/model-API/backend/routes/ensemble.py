@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Security, status, HTTPException
+import asyncio
+import time
+from contextlib import ExitStack
+from schema import EnsembleRequest, EnsembleResponse
+from middleware.auth import get_current_user_with_scopes
+from shared.state import MODEL_REGISTRY
+from shared import logger
+from shared.utils import preprocess_input
+from shared.admission import admission
+from shared.ensemble import blend, normalize_weights, preprocessing_groups
+from models import MODELS
+
+router = APIRouter()
+
+
+@router.post("/", response_model=EnsembleResponse, tags=["Ensemble"])
+async def ensemble_predict(
+    request: EnsembleRequest,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"])
+):
+    """
+    Score one batch with several models and blend their predictions.
+
+    Models are grouped by preprocessing fingerprint (feature order,
+    winsorization bounds, scaler statistics) and inference dtype; each group
+    is preprocessed once and its models predict from that shared matrix.
+    Groups are preprocessed concurrently and every model predicts on its own
+    pool thread as soon as its group's matrix is ready.
+
+    Returns each model's predictions with its normalized weight, and the
+    weighted blend (equal weights unless `weights` is given).
+
+    Any registered model can take part, sync or async type; the batch is
+    admitted against every member's in-flight budget and is rejected with
+    413 above `max_rows_per_request` (a blend needs every model's output,
+    so there is no async reroute).
+
+    Security:
+    ---------
+    Requires a valid JWT with the `predictions:create` scope.
+    """
+    try:
+        model_ids = request.model_ids
+        user_id = user["sub"]
+        rows = len(request.inputs)
+        logger.info("Ensemble request for models %s from user '%s' (%d rows)", model_ids, user_id, rows)
+
+        if len(set(model_ids)) != len(model_ids):
+            raise HTTPException(status_code=422, detail="model_ids must be unique")
+        for model_id in model_ids:
+            if not MODEL_REGISTRY.get(model_id):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Model '{model_id}' not found")
+            if not MODELS.get(model_id):
+                raise HTTPException(status_code=404, detail=f"Model metadata for '{model_id}' not found")
+        weights = normalize_weights(model_ids, request.weights)
+
+        for model_id in model_ids:
+            admission.check_size(model_id, rows, can_reroute=False)
+
+        groups = preprocessing_groups(model_ids, MODEL_REGISTRY)
+        predictions = {}
+        timings = {}
+
+        def preprocess(group):
+            for model_id in group:
+                tickets[model_id].started()
+            return preprocess_input(request.inputs, MODEL_REGISTRY[group[0]])
+
+        def predict(model_id, X):
+            start = time.time()
+            predictions[model_id] = MODEL_REGISTRY[model_id]["model"].predict(X)
+            timings[model_id] = round((time.time() - start) * 1000, 3)
+
+        async def score_group(group):
+            X = await asyncio.to_thread(preprocess, group)
+            await asyncio.gather(*(asyncio.to_thread(predict, model_id, X) for model_id in group))
+
+        with ExitStack() as stack:
+            tickets = {model_id: stack.enter_context(admission.admit(model_id, rows)) for model_id in model_ids}
+            start = time.time()
+            await asyncio.gather(*(score_group(group) for group in groups))
+            blended = await asyncio.to_thread(blend, [predictions[m] for m in model_ids], weights)
+            duration = round((time.time() - start) * 1000, 3)
+
+        return {
+            "user_id": user_id,
+            "model_ids": model_ids,
+            "result": {
+                "predictions": blended.tolist(),
+                "members": [
+                    {
+                        "model_id": model_id,
+                        "weight": weight,
+                        "predictions": predictions[model_id].astype("float64").tolist(),
+                        "duration_ms": timings[model_id],
+                    }
+                    for model_id, weight in zip(model_ids, weights)
+                ],
+                "groups": groups,
+                "duration_ms": duration,
+                "additional_info": {
+                    "num_inputs": rows,
+                    "num_models": len(model_ids),
+                    "preprocess_passes": len(groups),
+                    "model_versions": {m: MODELS[m].get("version") for m in model_ids},
+                },
+            },
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error during ensemble prediction", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
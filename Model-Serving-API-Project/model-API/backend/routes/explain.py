@@ -0,0 +1,251 @@
+from fastapi import APIRouter, Header, Query, Request, Response, Security, status, HTTPException
+from fastapi.responses import JSONResponse
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from schema import (
+    AsyncExplainResultResponse,
+    AsyncPredictionResponse,
+    ExplainRequest,
+    ExplainResponse,
+)
+from middleware.auth import get_current_user_with_scopes
+from shared.state import MODEL_REGISTRY
+from shared import logger
+from shared.utils import pack_matrix, preprocess_input
+from shared.explain import explain_matrix, format_explanations
+from shared.admission import REROUTE, admission
+from shared.idempotency import job_deduplicator, payload_digest, request_fingerprint
+from shared.queues import queue_for, queue_router
+from shared.result_store import get_result_store
+import shared
+
+router = APIRouter()
+
+
+def _get_artifacts(model_id: str) -> Dict[str, Any]:
+    artifacts = MODEL_REGISTRY.get(model_id)
+    if not artifacts:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model not found")
+    return artifacts
+
+
+def _explain_job_status(job_id: str) -> str:
+    return shared.celery_app.AsyncResult(job_id).status
+
+
+async def _submit_explain_job(
+    model_id: str,
+    artifacts: Dict[str, Any],
+    raw_inputs: List[Dict[str, float]],
+    user_id: str,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Preprocess `raw_inputs` and dispatch an explain job, deduplicated like
+    prediction jobs (see `enqueue_prediction_job`).
+
+    Returns:
+    --------
+    (dict, bool)
+        The AsyncPredictionResponse body and whether it is an idempotent
+        replay of an earlier submission.
+    """
+    admission.check_job_size(model_id, len(raw_inputs))
+
+    # Scoped apart from prediction jobs over the same inputs
+    version = artifacts.get("metadata", {}).get("version", "")
+    digest = await asyncio.to_thread(payload_digest, model_id, version, raw_inputs)
+    key = request_fingerprint(model_id, version, None, idempotency_key, scope=f"{user_id}|explain", digest=digest)
+    job_id = str(uuid.uuid4())
+    existing = job_deduplicator.claim_or_existing(key, job_id, digest, _explain_job_status)
+    if existing is not None:
+        existing_id, existing_status = existing
+        logger.info("Duplicate explain request for model '%s' mapped to job '%s'", model_id, existing_id)
+        return {"user_id": user_id, "job_id": existing_id, "model_id": model_id, "status": existing_status}, True
+
+    try:
+        feature_payload = await asyncio.to_thread(
+            lambda: pack_matrix(preprocess_input(raw_inputs, artifacts))
+        )
+        queue_router.send(
+            "run_explain", queue_for(len(raw_inputs)), args=[model_id, feature_payload, user_id],
+            rows=len(raw_inputs), task_id=job_id,
+        )
+    except BaseException:
+        job_deduplicator.release(key)
+        raise
+    admission.record_enqueued(model_id)
+    return {"user_id": user_id, "job_id": job_id, "model_id": model_id, "status": "PENDING"}, False
+
+
+@router.post(
+    "/",
+    response_model=ExplainResponse,
+    responses={202: {"model": AsyncPredictionResponse, "description": "Batch too large; rerouted to an explain job"}},
+    tags=["Explain"],
+)
+async def explain(
+    request: ExplainRequest,
+    http_request: Request,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"]),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """
+    Per-feature contributions (TreeSHAP) for each input row.
+
+    Rows go through the same `preprocess_input` as predictions, then the
+    booster's batched `pred_contribs` computes every row's attributions in
+    chunks of `explain_chunk_rows`. Results are cached per (model, version,
+    preprocessed row), so repeated rows are not recomputed.
+
+    Each row's contributions plus `bias` sum to its prediction. Set `top_n`
+    to return only the n features with the largest absolute contribution.
+    Batches above `max_rows_per_request` are rerouted to `POST /explain/jobs`
+    (202 + `Location`) or rejected with 413, as for `/predict`.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `predictions:create` scope.
+    """
+    try:
+        model_id = request.model_id
+        user_id = user["sub"]
+        logger.info("Explain request for model '%s' from user '%s' (%d rows)", model_id, user_id, len(request.inputs))
+
+        artifacts = _get_artifacts(model_id)
+        raw_inputs = request.inputs
+
+        if admission.check_size(model_id, len(raw_inputs)) == REROUTE:
+            body, replayed = await _submit_explain_job(model_id, artifacts, raw_inputs, user_id, idempotency_key)
+            headers = {"Location": str(http_request.url_for("get_explain_job", job_id=body["job_id"]))}
+            if replayed:
+                headers["Idempotent-Replayed"] = "true"
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=AsyncPredictionResponse(**body).model_dump(),
+                headers=headers,
+            )
+
+        def compute():
+            ticket.started()
+            start = time.time()
+            X = preprocess_input(raw_inputs, artifacts)
+            contributions, cache_hits = explain_matrix(model_id, artifacts, X)
+            explanations = format_explanations(contributions, artifacts["feature_names"], request.top_n)
+            duration = round((time.time() - start) * 1000, 3)
+            return explanations, cache_hits, duration
+
+        with admission.admit(model_id, len(raw_inputs)) as ticket:
+            explanations, cache_hits, duration = await asyncio.to_thread(compute)
+
+        return {
+            "user_id": user_id,
+            "model_id": model_id,
+            "result": {
+                "explanations": explanations,
+                "duration_ms": duration,
+                "additional_info": {"num_inputs": len(raw_inputs), "cache_hits": cache_hits},
+            },
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error during explain", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@router.post("/jobs", response_model=AsyncPredictionResponse, status_code=202, tags=["Explain"])
+async def submit_explain_job(
+    request: ExplainRequest,
+    response: Response,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"]),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    """
+    Compute feature contributions in a Celery worker.
+
+    The inputs are preprocessed here and shipped as a packed matrix; the
+    worker stores the contribution matrix in the result store. `top_n` is
+    applied when polling (`GET /explain/jobs/{job_id}?top_n=...`).
+
+    Submissions are deduplicated like `POST /jobs`: the same
+    `Idempotency-Key` (or, without one, the same inputs) returns the earlier
+    job, marked with `Idempotent-Replayed: true`.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `predictions:create` scope.
+    """
+    try:
+        model_id = request.model_id
+        user_id = user["sub"]
+        logger.info("Explain job for model '%s' by user '%s' (%d rows)", model_id, user_id, len(request.inputs))
+
+        artifacts = _get_artifacts(model_id)
+        body, replayed = await _submit_explain_job(model_id, artifacts, request.inputs, user_id, idempotency_key)
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return body
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error submitting explain job", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+@router.get("/jobs/{job_id}", response_model=AsyncExplainResultResponse, tags=["Explain"])
+async def get_explain_job(
+    job_id: str,
+    top_n: Optional[int] = Query(None, ge=1),
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:read"]),
+):
+    """
+    Poll an explain job.
+
+    Returns:
+    --------
+    - 202 if still pending/started/retried
+    - 410 if the job succeeded but its stored contributions have expired
+    - 500 if failed or malformed
+    - 200 with `ExplainResult` if successful
+    """
+    try:
+        result = shared.celery_app.AsyncResult(job_id)
+        status_str = result.status
+        if status_str in ("PENDING", "STARTED", "RETRY"):
+            raise HTTPException(status_code=202, detail="Job is still in progress")
+        if status_str == "FAILURE":
+            raise HTTPException(status_code=500, detail=f"Job failed: {result.result}")
+        if status_str != "SUCCESS":
+            raise HTTPException(status_code=500, detail=f"Unhandled job status: {status_str}")
+
+        raw = result.result
+        payload = raw["result"]
+        info = dict(payload["additional_info"])
+        values = get_result_store().get_array(job_id)
+        if values is None:
+            raise HTTPException(status_code=410, detail="Job result has expired")
+
+        contributions = values.reshape(info["num_inputs"], -1)
+        feature_names = info.get("feature_names") or _get_artifacts(raw["model_id"])["feature_names"]
+        return {
+            "user_id": raw["user_id"],
+            "job_id": job_id,
+            "model_id": raw["model_id"],
+            "status": raw["status"],
+            "result": {
+                "explanations": format_explanations(contributions, feature_names, top_n),
+                "duration_ms": payload.get("duration_ms"),
+                "additional_info": {k: v for k, v in info.items() if k != "feature_names"},
+            },
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error parsing explain job result", exc_info=True)
+        raise HTTPException(status_code=500, detail="Malformed async result structure")
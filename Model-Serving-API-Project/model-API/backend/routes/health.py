@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse, Response
-from shared.worker import celery_app
 from shared.state import MODEL_REGISTRY
+from shared.warmup import warmup_state
+from shared.queues import CONTROL, queue_router
 
 router = APIRouter()
 
@@ -49,6 +50,7 @@ def check_server_ready() -> Response:
 
     Confirms the server is ready to serve requests:
     - Ensures that at least one model is loaded in the in-memory registry.
+    - Ensures model warm-up has finished, so traffic does not hit cold paths.
     - Verifies that the Celery worker is responsive.
 
     Returns:
@@ -59,15 +61,21 @@ def check_server_ready() -> Response:
     Raises:
     -------
     HTTPException
-        503 if either models are not loaded or Celery is not responding.
+        503 if models are not loaded or still warming up, or Celery is not responding.
     """
     # Check that the model registry is populated
     if not MODEL_REGISTRY:
         raise HTTPException(status_code=503, detail="Models not loaded")
 
+    # Hold traffic until the warm-up run is over (a failed warm-up does not
+    # block readiness; it is reported under `warmup` in /v2/metrics)
+    if not warmup_state.ready:
+        raise HTTPException(status_code=503, detail="Models warming up")
+
     # Check that Celery worker is responsive via a "ping" task
     try:
-        result = celery_app.send_task("ping")
+        # On its own queue so it is not stuck behind inference jobs
+        result = queue_router.send("ping", CONTROL)
         if result.get(timeout=5) != "Ready!":
             raise HTTPException(status_code=503, detail="Celery is unavailable")
     except Exception:
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Security, HTTPException, status
-from typing import Dict, Any, cast
+import asyncio
+import uuid
+from fastapi import APIRouter, Header, Query, Request, Response, Security, HTTPException, status
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple, cast
 from middleware.auth import get_current_user_with_scopes
-from celery.result import AsyncResult as CeleryAsyncResult
 
 from schema import (
     AsyncPredictionResponse,
@@ -10,17 +11,306 @@ from schema import (
     PredictionResult,
 )
 from shared.state import MODEL_REGISTRY
-from shared.worker import celery_app
-from shared.utils import preprocess_input
+from shared.utils import pack_matrix, preprocess_input, preprocess_matrix
+from shared.arrow_io import ArrowRoute, accepts_arrow, arrow_response, read_feature_matrix
+from shared.result_store import get_result_store
+from shared.idempotency import job_deduplicator, payload_digest, request_fingerprint
+from shared.admission import admission
+from shared.queues import PRIORITY_HEADER, INTERACTIVE, parse_priority, plan_chunks, queue_for, queue_router
+from shared.profiling import PROFILE_HEADER, profile_requested
 from shared import logger
+import shared
+
+if TYPE_CHECKING:
+    import numpy as np
 
 router = APIRouter()
 
 
+def _combined_status(statuses: List[str]) -> str:
+    if "FAILURE" in statuses:
+        return "FAILURE"
+    if all(status == "SUCCESS" for status in statuses):
+        return "SUCCESS"
+    if any(status != "PENDING" for status in statuses):
+        return "STARTED"
+    return "PENDING"
+
+
+def job_status(job_id: str) -> str:
+    """
+    Celery status of a job; for a chunked job (which has no task of its
+    own, so Celery reports it as PENDING) the combined status of its chunks.
+    """
+    status_str = shared.celery_app.AsyncResult(job_id).status
+    if status_str != "PENDING":
+        return status_str
+    manifest = get_result_store().get_manifest(job_id)
+    if manifest is None:
+        return status_str
+    return _combined_status([shared.celery_app.AsyncResult(c["id"]).status for c in manifest["chunks"]])
+
+
+def _merge_chunks(job_id: str, manifest: Dict[str, Any], as_array: bool = False) -> Tuple[str, Any]:
+    """
+    Combine the chunk tasks of a split job.
+
+    With `as_array`, the predictions are read as numpy arrays in their
+    stored dtype and concatenated once (Arrow responses) instead of being
+    built up as a Python list.
+
+    Returns:
+    --------
+    (str, Any)
+        The combined status and, on SUCCESS, a task-style result dict with
+        every chunk's predictions in row order; on FAILURE, the first
+        failed chunk's error; on PENDING/STARTED, "<done>/<total>" chunks.
+    """
+    results = [shared.celery_app.AsyncResult(chunk["id"]) for chunk in manifest["chunks"]]
+    statuses = [result.status for result in results]
+    status_str = _combined_status(statuses)
+    if status_str == "FAILURE":
+        return status_str, next(r.result for r, s in zip(results, statuses) if s == "FAILURE")
+    if status_str != "SUCCESS":
+        return status_str, f"{statuses.count('SUCCESS')}/{len(statuses)}"
+
+    store = get_result_store()
+    parts = []
+    infos = []
+    for chunk, result in zip(manifest["chunks"], results):
+        values = store.get_array(chunk["id"]) if as_array else store.get(chunk["id"])
+        if values is None:
+            raise HTTPException(status_code=410, detail="Job result has expired")
+        parts.append(values)
+        infos.append(result.result["result"])
+    if as_array:
+        import numpy as np
+
+        predictions = np.concatenate(parts)
+    else:
+        predictions = [value for part in parts for value in part]
+
+    chunk_info = [info["additional_info"] for info in infos]
+    additional_info: Dict[str, Any] = {
+        "num_inputs": manifest["rows"],
+        "dtype": chunk_info[0].get("dtype"),
+        "queue": manifest["queue"],
+        "chunks": len(infos),
+        "chunk_duration_ms": round(sum(info["duration_ms"] for info in infos), 3),
+        "result_bytes": sum(info.get("result_bytes", 0) for info in chunk_info),
+        "round_trips": len(infos) + 1,
+    }
+    waits = [info["queue_wait_ms"] for info in chunk_info if "queue_wait_ms" in info]
+    if waits:
+        additional_info["queue_wait_ms"] = max(waits)
+    profile_ids = [info["profile_id"] for info in chunk_info if "profile_id" in info]
+    if profile_ids:
+        additional_info["profile_ids"] = profile_ids
+
+    return status_str, {
+        "user_id": manifest["user_id"],
+        "model_id": manifest["model_id"],
+        "status": status_str,
+        "result": {
+            # Chunks run in parallel; the slowest one bounds the job
+            "duration_ms": max(info["duration_ms"] for info in infos),
+            "additional_info": additional_info,
+            "predictions": predictions,
+        },
+    }
+
+
+async def enqueue_prediction_job(
+    model_id: str,
+    artifacts: Dict[str, Any],
+    raw_inputs: Optional[List[Dict[str, Any]]],
+    user_id: str,
+    idempotency_key: Optional[str] = None,
+    profile: bool = False,
+    features: Optional["np.ndarray"] = None,
+    content: Optional[bytes] = None,
+    priority: str = INTERACTIVE,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Preprocess `raw_inputs` and dispatch them to a Celery worker.
+
+    Shared by `POST /jobs` and by sync predictions rerouted for size.
+    With `profile`, the worker profiles the task and reports the profile id
+    in the job's `additional_info`.
+
+    The job goes to the queue picked by `queue_for(rows, priority)`. Jobs
+    above `job_chunk_rows` rows are split into chunk tasks (`<job_id>.<n>`)
+    that workers run in parallel; their manifest is kept in the result
+    store and `GET /jobs/{job_id}` merges the chunks.
+
+    Binary (Arrow) requests pass the decoded raw matrix as `features`
+    instead of `raw_inputs`, plus the request body as `content` for the
+    idempotency fingerprint; the matrix is preprocessed in place.
+
+    Returns:
+    --------
+    (dict, bool)
+        The AsyncPredictionResponse body and whether it is an idempotent
+        replay of an earlier submission.
+
+    Raises:
+    -------
+    HTTPException
+        413 if the batch is above `max_rows_per_job`.
+    """
+    rows = len(features) if features is not None else len(raw_inputs)
+    admission.check_job_size(model_id, rows)
+    metadata = artifacts.get("metadata", {})
+
+    # Answer duplicates from the idempotency map, not the broker. Hashing
+    # a large JSON payload takes seconds, so it runs off the event loop
+    version = metadata.get("version", "")
+    digest = await asyncio.to_thread(
+        payload_digest, model_id, version, content if content is not None else raw_inputs
+    )
+    key = request_fingerprint(model_id, version, None, idempotency_key, scope=user_id, digest=digest)
+    job_id = str(uuid.uuid4())
+    existing = job_deduplicator.claim_or_existing(key, job_id, digest, job_status)
+    if existing is not None:
+        existing_id, existing_status = existing
+        logger.info("Duplicate async request for model '%s' mapped to job '%s'", model_id, existing_id)
+        return {
+            "user_id": user_id,
+            "job_id": existing_id,
+            "model_id": model_id,
+            "status": existing_status,
+        }, True
+
+    queue = queue_for(rows, priority)
+    chunks = plan_chunks(rows)
+    store = get_result_store()
+
+    def pack():
+        if features is not None:
+            X = preprocess_matrix(features, artifacts, inplace=True)
+        else:
+            X = preprocess_input(raw_inputs, artifacts)
+        return [pack_matrix(X[start:stop]) for start, stop in chunks]
+
+    try:
+        # Preprocess off the event loop; large batches take a while.
+        # The matrix ships as a packed binary array in the model's
+        # inference dtype (much smaller than JSON records).
+        feature_payloads = await asyncio.to_thread(pack)
+        task_kwargs = {"profile": True} if profile else None
+
+        if len(chunks) == 1:
+            queue_router.send(
+                "run_async_inference", queue,
+                args=[model_id, feature_payloads[0], user_id], kwargs=task_kwargs, rows=rows, task_id=job_id,
+            )
+        else:
+            chunk_ids = [f"{job_id}.{i}" for i in range(len(chunks))]
+            # Written before the chunks are sent, so a poll never misses it
+            store.put_manifest(job_id, {
+                "user_id": user_id,
+                "model_id": model_id,
+                "queue": queue,
+                "rows": rows,
+                "chunks": [{"id": chunk_id, "rows": stop - start} for chunk_id, (start, stop) in zip(chunk_ids, chunks)],
+            })
+            for chunk_id, payload, (start, stop) in zip(chunk_ids, feature_payloads, chunks):
+                queue_router.send(
+                    "run_async_inference", queue,
+                    args=[model_id, payload, user_id], kwargs=task_kwargs, rows=stop - start, task_id=chunk_id,
+                )
+            queue_router.record_chunked(queue)
+            logger.info("Split %d-row job '%s' into %d chunks on queue '%s'", rows, job_id, len(chunks), queue)
+    except BaseException:
+        job_deduplicator.release(key)
+        if len(chunks) > 1:
+            store.delete_manifest(job_id)
+        raise
+
+    admission.record_enqueued(model_id)
+    return {
+        "user_id": user_id,
+        "job_id": job_id,
+        "model_id": model_id,
+        "status": "PENDING",
+    }, False
+
+
+def _async_artifacts(model_id: str) -> Dict[str, Any]:
+    raw = MODEL_REGISTRY.get(model_id)
+    if raw is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    artifacts: Dict[str, Any] = cast(Dict[str, Any], raw)
+    if artifacts.get("metadata", {}).get("type") != "async":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Model is not asynchronous"
+        )
+    return artifacts
+
+
+async def send_async_job_arrow(
+    http_request: Request,
+    response: Response,
+    model_id: str = Query(...),
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"]),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    profile_header: Optional[str] = Header(None, alias=PROFILE_HEADER),
+    priority_header: Optional[str] = Header(None, alias=PRIORITY_HEADER),
+):
+    """
+    `POST /jobs` with an Arrow IPC stream body (`Content-Type:
+    application/vnd.apache.arrow.stream`) and `model_id` as a query
+    parameter. The stream's columns are gathered into the inference-dtype
+    matrix in `feature_names` order and preprocessed in place; the job
+    handle is returned as JSON, as for the JSON endpoint.
+    """
+    try:
+        user_id = user["sub"]
+        logger.info("Async Arrow prediction request for model '%s' by user '%s'", model_id, user_id)
+
+        artifacts = _async_artifacts(model_id)
+        content = await http_request.body()
+        features = await asyncio.to_thread(
+            read_feature_matrix, content, artifacts["feature_names"], artifacts.get("dtype", "float64")
+        )
+        body, replayed = await enqueue_prediction_job(
+            model_id, artifacts, None, user_id, idempotency_key,
+            profile=profile_requested(profile_header, user),
+            features=features, content=content, priority=parse_priority(priority_header),
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return body
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error during async Arrow prediction", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+# Ahead of the JSON route: it only matches Arrow request bodies
+router.add_api_route(
+    "/",
+    send_async_job_arrow,
+    methods=["POST"],
+    response_model=AsyncPredictionResponse,
+    status_code=202,
+    tags=["Jobs"],
+    include_in_schema=False,
+    route_class_override=ArrowRoute,
+)
+
+
 @router.post("/", response_model=AsyncPredictionResponse, status_code=202, tags=["Jobs"])
 async def send_async_job(
     request: PredictionRequest,
-    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"])
+    response: Response,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"]),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    profile_header: Optional[str] = Header(None, alias=PROFILE_HEADER),
+    priority_header: Optional[str] = Header(None, alias=PRIORITY_HEADER),
 ):
     """
     Submit an asynchronous prediction job using a Celery worker.
@@ -34,46 +324,44 @@ async def send_async_job(
     1. Load model artifacts (model, scaler, bounds, feature_names).
     2. Dynamically preprocess incoming JSON via `preprocess_input`.
     3. Dispatch processed features + metadata to Celery.
+
+    Jobs above `max_rows_per_job` rows are rejected with 413. With
+    `X-Profile: 1` (`admin:profile` scope) the worker profiles the task.
+    Inputs may also be sent as an Arrow IPC stream
+    (`Content-Type: application/vnd.apache.arrow.stream`, `?model_id=`).
+
+    Queues:
+    -------
+    Jobs up to `interactive_max_rows` rows run on the "interactive" queue;
+    larger jobs, and any job sent with `X-Priority: bulk`, on "bulk". Jobs
+    above `job_chunk_rows` rows are split into chunk tasks that run in
+    parallel and are merged when polled.
+
+    Idempotency:
+    ------------
+    A submission with the same `Idempotency-Key` (or, without one, the same
+    model_id + version + inputs) as a job from the last
+    `idempotency_ttl_seconds` returns that job's id instead of enqueuing a
+    new task. Replays are marked with an `Idempotent-Replayed: true` header.
+    Reusing an `Idempotency-Key` with different inputs is rejected with 422.
     """
     try:
         model_id = request.model_id
         user_id = user["sub"]
-        logger.info(f"Async prediction request for model '{model_id}' by user '{user_id}'")
-
-        # 1) Load and type-cast artifacts
-        raw = MODEL_REGISTRY.get(model_id)
-        if raw is None:
-            raise HTTPException(status_code=404, detail="Model not found")
-        artifacts: Dict[str, Any] = cast(Dict[str, Any], raw)
-        logger.info(f"Artifacts loaded for model '{model_id}': {artifacts}")
-        # 2) Ensure this model supports async jobs
-        metadata = artifacts.get("metadata", {})  
-
-        if metadata.get("type") != "async":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Model is not asynchronous"
-            )
-
-        # 3) Preprocess input dynamically
-        raw_inputs = request.inputs
-        X_processed = preprocess_input(raw_inputs, artifacts)
+        logger.info("Async prediction request for model '%s' by user '%s'", model_id, user_id)
 
-        # Convert to JSON-serializable records for Celery
-        feature_payload = X_processed.to_dict(orient="records")
+        # 1) Load artifacts and ensure this model supports async jobs
+        artifacts = _async_artifacts(model_id)
 
-        # 4) Dispatch to Celery
-        job = celery_app.send_task(
-            "run_async_inference",
-            args=[model_id, feature_payload, user_id]
+        # 2) Preprocess and dispatch to Celery
+        body, replayed = await enqueue_prediction_job(
+            model_id, artifacts, request.inputs, user_id, idempotency_key,
+            profile=profile_requested(profile_header, user),
+            priority=parse_priority(priority_header),
         )
-
-        return {
-            "user_id": user_id,
-            "job_id": job.id,
-            "model_id": model_id,
-            "status": "PENDING",
-        }
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return body
 
     except HTTPException:
         raise
@@ -85,6 +373,7 @@ async def send_async_job(
 @router.get("/{job_id}", response_model=AsyncResultResponse, tags=["Jobs"])
 async def get_prediction(
     job_id: str,
+    accept: Optional[str] = Header(None),
     user: dict = Security(get_current_user_with_scopes, scopes=["predictions:read"])
 ):
     """
@@ -97,26 +386,63 @@ async def get_prediction(
     Returns:
     --------
     - 202 if still pending/started/retried
+    - 410 if the job succeeded but its stored predictions have expired
     - 500 if failed or malformed
-    - 200 with `PredictionResult` if successful
+    - 200 with `PredictionResult` if successful, or the predictions as an
+      Arrow stream with `Accept: application/vnd.apache.arrow.stream`
     """
 
     try:
-        result = CeleryAsyncResult(job_id)
+        result = shared.celery_app.AsyncResult(job_id)
 
         # We may want to remove this as I believe AsyncResult always returns something?
         if not result:
             raise HTTPException(404, detail="Job ID not found")
 
-        status_str = result.status
+        status_str, outcome = result.status, None
+        as_arrow = accepts_arrow(accept)
+        # A chunked job has no task of its own; merge its chunks instead
+        manifest = get_result_store().get_manifest(job_id) if status_str == "PENDING" else None
+        if manifest is not None:
+            status_str, outcome = _merge_chunks(job_id, manifest, as_array=as_arrow)
+            if status_str in ("PENDING", "STARTED"):
+                raise HTTPException(status_code=202, detail=f"Job is still in progress ({outcome} chunks done)")
+        else:
+            outcome = result.result
+
         if status_str in ("PENDING", "STARTED", "RETRY"):
             raise HTTPException(status_code=202, detail="Job is still in progress")
         if status_str == "FAILURE":
-            raise HTTPException(status_code=500, detail=f"Job failed: {result.result}")
+            raise HTTPException(status_code=500, detail=f"Job failed: {outcome}")
         
         if status_str == "SUCCESS":
-            raw = result.result
-            parsed = PredictionResult(**raw["result"])
+            raw = outcome
+            payload = dict(raw["result"])
+
+            # Predictions are stored as a packed array in the result store;
+            # older results may still carry them inline. Arrow responses
+            # read them straight into an array in their stored dtype.
+            if "predictions" not in payload:
+                store = get_result_store()
+                predictions = store.get_array(job_id) if as_arrow else store.get(job_id)
+                if predictions is None:
+                    raise HTTPException(status_code=410, detail="Job result has expired")
+                payload["predictions"] = predictions
+                info = dict(payload.get("additional_info") or {})
+                info["round_trips"] = info.get("round_trips", 0) + 1
+                payload["additional_info"] = info
+
+            if as_arrow:
+                import numpy as np
+
+                info = payload.get("additional_info") or {}
+                return arrow_response(
+                    np.asarray(payload["predictions"], dtype=info.get("dtype", "float64")),
+                    {"job_id": job_id, "model_id": raw["model_id"], "user_id": raw["user_id"],
+                     "status": raw["status"], "duration_ms": payload.get("duration_ms"), **info},
+                )
+
+            parsed = PredictionResult(**payload)
             return {
                 "user_id": raw["user_id"],
                 "job_id": job_id,
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Security
+from fastapi.responses import JSONResponse, Response
+from middleware.auth import get_current_user_with_scopes
+from shared.admission import admission
+from shared.result_store import get_result_store
+from shared.explain import contribution_cache
+from shared.idempotency import job_deduplicator, predict_coalescer
+from shared.logger_config import logging_stats
+from shared.profiling import get_profile_store
+from shared.queues import queue_router, queue_wait
+from shared.shadow import shadow_evaluator
+from shared.startup import startup_profile
+from shared.state import MODEL_REGISTRY
+from shared.warmup import warmup_state
+
+router = APIRouter()
+
+# Counters expose model names, traffic and queue depths; operators only
+METRICS_SCOPE = "admin:metrics"
+
+
+@router.get("/", tags=["Metrics"])
+def get_metrics(
+    user: dict = Security(get_current_user_with_scopes, scopes=[METRICS_SCOPE])
+) -> Response:
+    """
+    Operational counters for this API process.
+
+    Returns:
+    --------
+    JSONResponse
+        - result_store: bytes written, bytes per row, Redis round trips per job,
+          TTL and compression of the async result store.
+        - idempotency: coalesced sync predicts and deduplicated job submissions.
+        - admission: limits and per-model in-flight rows, queued requests and
+          admitted / shed / rejected / rerouted / enqueued counters.
+        - logging: format, level, sample rates, records kept / sampled out
+          and the writer queue depth.
+        - profiles: saved profiles, their size and the store bounds.
+        - explain: rows held in the contribution cache and its hit rate.
+        - queues: tasks / rows / chunked jobs this process sent per Celery
+          queue, and enqueue-to-start wait percentiles of the last
+          `queue_wait_samples` tasks per queue (recorded by the workers).
+        - shadow: shadow queue depth and, per primary->shadow pair, submitted /
+          dropped / failed counts and online divergence statistics.
+        - startup: process role, startup phase timings and heavy modules loaded.
+        - models: inference dtype per model and the float32 validation report.
+        - warmup: warm-up status and, per model and batch size, the cold
+          (first) and warm latency of preprocess + predict.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `admin:metrics` scope.
+    """
+    return JSONResponse(
+        status_code=200,
+        content={
+            "result_store": get_result_store().stats(),
+            "idempotency": {
+                "predict": predict_coalescer.stats(),
+                "jobs": job_deduplicator.stats(),
+            },
+            "admission": admission.stats(),
+            "logging": logging_stats(),
+            "profiles": get_profile_store().stats(),
+            "explain": contribution_cache.stats(),
+            "queues": {"routed": queue_router.stats(), "wait": queue_wait.stats()},
+            "shadow": shadow_evaluator.stats(),
+            "startup": startup_profile.report(),
+            "models": {
+                model_id: {
+                    "dtype": artifacts.get("dtype", "float64"),
+                    "float32_validation": artifacts.get("float32_validation"),
+                }
+                for model_id, artifacts in MODEL_REGISTRY.items()
+            },
+            "warmup": warmup_state.report(),
+        },
+        headers={'Cache-Control': 'no-cache'}
+    )
@@ -1,55 +1,300 @@
-from fastapi import APIRouter, Security, status, HTTPException
+from fastapi import APIRouter, Header, Query, Request, Response, Security, status, HTTPException
+from fastapi.responses import JSONResponse
+import asyncio
 import time
-from schema import PredictionResponse, PredictionRequest, PredictionResult
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from schema import AsyncPredictionResponse, PredictionResponse, PredictionRequest, PredictionResult
 from middleware.auth import get_current_user_with_scopes
 from shared.state import MODEL_REGISTRY
 from shared import logger
-from shared.utils import preprocess_input
+from shared.utils import preprocess_input, preprocess_matrix
+from shared.arrow_io import ArrowRoute, accepts_arrow, arrow_response, read_feature_matrix
+from shared.idempotency import payload_digest, predict_coalescer, request_fingerprint
+from shared.admission import REROUTE, admission
+from shared.shadow import shadow_evaluator
+from shared.profiling import PROFILE_HEADER, capture, profile_requested
+from routes.jobs import enqueue_prediction_job
 from models import MODELS  
 
 router = APIRouter()
 
-@router.post("/", response_model=PredictionResponse, tags=["Predict"])
-def model_predict(
-    request: PredictionRequest,
-    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"])
+def _sync_model(model_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    # 1) Ensure artifacts are loaded
+    artifacts = MODEL_REGISTRY.get(model_id)
+    if not artifacts:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model not found")
+
+    # 2) Check model metadata from static MODELS dict
+    metadata = MODELS.get(model_id)
+    if not metadata:
+        raise HTTPException(status_code=404, detail="Model metadata not found")
+
+    if metadata["type"] != "sync":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Model is not synchronous"
+        )
+    return artifacts, metadata
+
+
+def _rerouted(http_request: Request, body: Dict[str, Any], replayed: bool) -> JSONResponse:
+    headers = {"Location": str(http_request.url_for("get_prediction", job_id=body["job_id"]))}
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=AsyncPredictionResponse(**body).model_dump(),
+        headers=headers,
+    )
+
+
+async def _run_prediction(
+    model_id: str,
+    artifacts: Dict[str, Any],
+    metadata: Dict[str, Any],
+    user_id: str,
+    rows: int,
+    prepare: Callable[[], Any],
+    fingerprint_inputs: Any,
+    shadow_inputs: Any,
+    idempotency_key: Optional[str],
+    profile: bool,
+):
+    """
+    Admit, coalesce, (optionally) profile and run one sync prediction.
+
+    `prepare` builds the preprocessed matrix on the worker thread;
+    `shadow_inputs` are the raw rows handed to a shadow model whose
+    preprocessing differs from the primary's.
+
+    Returns:
+    --------
+    (np.ndarray, float, bool, str | None)
+        Predictions, inference time in ms, whether the computation was
+        shared with an identical in-flight request, and the profile id.
+    """
+    shadow_id = metadata.get("shadow")
+
+    def compute():
+        X_input = prepare()
+
+        # 4) Run prediction & measure duration
+        start = time.time()
+        scores = artifacts["model"].predict(X_input)
+        duration = round((time.time() - start) * 1000, 3)
+
+        # Shadow scoring happens off the request path; a full queue drops it
+        if shadow_id:
+            shadow_evaluator.submit(model_id, shadow_id, X_input, scores, shadow_inputs)
+        return scores, duration
+
+    with admission.admit(model_id, rows) as ticket:
+        def run():
+            ticket.started()
+            # Hashed on the worker thread too: large JSON payloads take seconds.
+            # Explicit keys are per caller; content hashes can be shared by everyone
+            digest = payload_digest(model_id, metadata["version"], fingerprint_inputs)
+            key = request_fingerprint(
+                model_id, metadata["version"], None, idempotency_key,
+                scope=user_id if idempotency_key else None, digest=digest,
+            )
+            if not profile:
+                return predict_coalescer.run(key, compute, digest), None
+            with capture("predict", model_id=model_id, rows=rows) as profile_info:
+                outcome = predict_coalescer.run(key, compute, digest)
+            return outcome, profile_info.get("profile_id")
+
+        # to_thread copies the request's context (log route) into the pool
+        ((preds, duration), coalesced), profile_id = await asyncio.to_thread(run)
+    return preds, duration, coalesced, profile_id
+
+
+def _additional_info(artifacts: Dict[str, Any], rows: int, coalesced: bool) -> Dict[str, Any]:
+    additional_info = {"num_inputs": rows, "dtype": artifacts.get("dtype", "float64")}
+    if coalesced:
+        additional_info["coalesced"] = True
+    return additional_info
+
+
+async def model_predict_arrow(
+    http_request: Request,
+    response: Response,
+    model_id: str = Query(...),
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"]),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    profile_header: Optional[str] = Header(None, alias=PROFILE_HEADER),
+    accept: Optional[str] = Header(None),
 ):
+    """
+    `POST /predict` with an Arrow IPC stream body (`Content-Type:
+    application/vnd.apache.arrow.stream`) and `model_id` as a query
+    parameter.
+
+    The stream's columns are read without copying and gathered once into
+    the inference-dtype matrix in `feature_names` order, which is then
+    preprocessed in place. Predictions come back as an Arrow stream with
+    `Accept: application/vnd.apache.arrow.stream`, otherwise as the usual
+    JSON `PredictionResponse`. Admission, idempotency, profiling and
+    shadow scoring behave as for JSON requests.
+    """
     try:
-        model_id = request.model_id
         user_id = user["sub"]
+        logger.info("Arrow prediction request for model '%s' from user '%s'", model_id, user_id)
 
-        logger.info(f"Prediction request for model '{model_id}' from user '{user_id}'")
+        artifacts, metadata = _sync_model(model_id)
+        dtype = artifacts.get("dtype", "float64")
+        content = await http_request.body()
+        features = await asyncio.to_thread(read_feature_matrix, content, artifacts["feature_names"], dtype)
+        rows = len(features)
+        profile = profile_requested(profile_header, user)
 
-        # 1) Ensure artifacts are loaded
-        artifacts = MODEL_REGISTRY.get(model_id)
-        if not artifacts:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model not found")
+        if admission.check_size(model_id, rows) == REROUTE:
+            logger.info("Rerouting %d-row Arrow request for model '%s' to an async job", rows, model_id)
+            body, replayed = await enqueue_prediction_job(
+                model_id, artifacts, None, user_id, idempotency_key, profile=profile,
+                features=features, content=content,
+            )
+            return _rerouted(http_request, body, replayed)
 
-        # 2) Check model metadata from static MODELS dict
-        metadata = MODELS.get(model_id)
-        if not metadata:
-            raise HTTPException(status_code=404, detail="Model metadata not found")
+        # A shadow with different preprocessing needs the raw matrix intact
+        shadow_id = metadata.get("shadow")
+        preds, duration, coalesced, profile_id = await _run_prediction(
+            model_id, artifacts, metadata, user_id, rows,
+            prepare=lambda: preprocess_matrix(features, artifacts, inplace=not shadow_id),
+            fingerprint_inputs=content,
+            shadow_inputs=features if shadow_id else None,
+            idempotency_key=idempotency_key,
+            profile=profile,
+        )
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
 
-        if metadata["type"] != "sync":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Model is not synchronous"
+        additional_info = _additional_info(artifacts, rows, coalesced)
+        if accepts_arrow(accept):
+            return arrow_response(
+                preds,
+                {"user_id": user_id, "model_id": model_id, "duration_ms": duration, **additional_info},
+                headers={"X-Profile-Id": profile_id} if profile_id else None,
             )
+        return {
+            "user_id": user_id,
+            "model_id": model_id,
+            "result": PredictionResult(
+                predictions=preds.tolist(), duration_ms=duration, additional_info=additional_info
+            ),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error during Arrow prediction", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+
+# Ahead of the JSON route: it only matches Arrow request bodies
+router.add_api_route(
+    "/",
+    model_predict_arrow,
+    methods=["POST"],
+    response_model=PredictionResponse,
+    tags=["Predict"],
+    include_in_schema=False,
+    route_class_override=ArrowRoute,
+)
+
+
+@router.post(
+    "/",
+    response_model=PredictionResponse,
+    responses={202: {"model": AsyncPredictionResponse, "description": "Batch too large; rerouted to an async job"}},
+    tags=["Predict"],
+)
+async def model_predict(
+    request: PredictionRequest,
+    http_request: Request,
+    response: Response,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"]),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    profile_header: Optional[str] = Header(None, alias=PROFILE_HEADER),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Run a synchronous prediction.
+
+    Identical requests that arrive while one is already being computed
+    (same `Idempotency-Key`, or same model_id + version + inputs) share
+    that computation instead of running their own.
+
+    Admission control:
+    ------------------
+    - Batches above `max_rows_per_request` are submitted as an async job
+      (202 + `Location` of the job) or, with `oversize_policy="reject"`,
+      rejected with 413.
+    - When the model's in-flight row budget is exhausted the request is shed
+      with 503 and a `Retry-After` header before any work is queued.
+
+    Shadow models:
+    --------------
+    If the model's `MODELS` entry names a `shadow`, the preprocessed batch
+    and its predictions are queued for the shadow model and compared in the
+    background (see `/v2/metrics`); the response never waits for it.
+
+    Profiling:
+    ----------
+    With `X-Profile: 1` (requires the `admin:profile` scope), or when picked
+    by `profile_sample_rate`, preprocessing and inference are profiled and
+    the saved profile's id is returned in an `X-Profile-Id` header.
+
+    Arrow:
+    ------
+    Inputs may instead be sent as an Arrow IPC stream (`Content-Type:
+    application/vnd.apache.arrow.stream`, `?model_id=`), and predictions
+    requested as one with `Accept: application/vnd.apache.arrow.stream`.
+    JSON is the default both ways.
+    """
+    try:
+        model_id = request.model_id
+        user_id = user["sub"]
+
+        logger.info("Prediction request for model '%s' from user '%s'", model_id, user_id)
+
+        artifacts, metadata = _sync_model(model_id)
 
         # 3) Prepare raw inputs and preprocess dynamically
         raw_inputs = request.inputs
-        X_input = preprocess_input(raw_inputs, artifacts)
+        profile = profile_requested(profile_header, user)
 
-        # 4) Run prediction & measure duration
-        start = time.time()
-        preds = artifacts["model"].predict(X_input).tolist()
-        duration = round((time.time() - start) * 1000, 3)
+        # Oversized batches go to the jobs path instead of tying up the API
+        if admission.check_size(model_id, len(raw_inputs)) == REROUTE:
+            logger.info("Rerouting %d-row request for model '%s' to an async job", len(raw_inputs), model_id)
+            body, replayed = await enqueue_prediction_job(
+                model_id, artifacts, raw_inputs, user_id, idempotency_key, profile=profile
+            )
+            return _rerouted(http_request, body, replayed)
+
+        preds, duration, coalesced, profile_id = await _run_prediction(
+            model_id, artifacts, metadata, user_id, len(raw_inputs),
+            prepare=lambda: preprocess_input(raw_inputs, artifacts),
+            fingerprint_inputs=raw_inputs,
+            shadow_inputs=raw_inputs,
+            idempotency_key=idempotency_key,
+            profile=profile,
+        )
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
 
         # 5) Build result object
+        additional_info = _additional_info(artifacts, len(raw_inputs), coalesced)
+        if accepts_arrow(accept):
+            return arrow_response(
+                preds,
+                {"user_id": user_id, "model_id": model_id, "duration_ms": duration, **additional_info},
+                headers={"X-Profile-Id": profile_id} if profile_id else None,
+            )
         result = PredictionResult(
-            predictions=preds,
+            predictions=preds.tolist(),
             duration_ms=duration,
-            additional_info={"num_inputs": len(raw_inputs)}
+            additional_info=additional_info
         )
 
         return {
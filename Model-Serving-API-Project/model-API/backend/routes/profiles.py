@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Security, HTTPException, status
+from fastapi.responses import FileResponse
+from middleware.auth import get_current_user_with_scopes
+from shared.profiling import PROFILE_ID_PATTERN, PROFILE_SCOPE, get_profile_store
+from shared import logger
+
+router = APIRouter()
+
+
+@router.get("/", tags=["Profiles"])
+def list_profiles(
+    user: dict = Security(get_current_user_with_scopes, scopes=[PROFILE_SCOPE])
+):
+    """
+    List saved request/task profiles, newest first.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `admin:profile` scope.
+
+    Returns:
+    --------
+    list[dict]
+        Profile metadata: profile_id, created_at, kind (predict or
+        run_async_inference), model_id, rows or job_id, duration_ms, bytes.
+    """
+    try:
+        return get_profile_store().list()
+    except Exception as e:
+        logger.exception("Error listing profiles", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to list profiles")
+
+
+@router.get("/{profile_id}", tags=["Profiles"])
+def download_profile(
+    profile_id: str,
+    user: dict = Security(get_current_user_with_scopes, scopes=[PROFILE_SCOPE])
+):
+    """
+    Download a profile in collapsed-stack format, one `frame;frame;... weight`
+    line per stack with self time in microseconds. Render it with
+    `flamegraph.pl`, speedscope or any tool that reads folded stacks.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `admin:profile` scope.
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path = get_profile_store().path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Security, status, HTTPException
+import asyncio
+import time
+from schema import RankRequest, RankResponse
+from middleware.auth import get_current_user_with_scopes
+from shared.state import MODEL_REGISTRY
+from shared import logger
+from shared.utils import preprocess_input
+from shared.admission import admission
+from shared.ranking import cross_sectional_deciles, cross_sectional_zscores, top_k_indices
+from models import MODELS
+
+router = APIRouter()
+
+
+@router.post("/", response_model=RankResponse, tags=["Rank"])
+async def rank_cross_section(
+    request: RankRequest,
+    user: dict = Security(get_current_user_with_scopes, scopes=["predictions:create"])
+):
+    """
+    Rank a cross-section of tickers by predicted 7-day return.
+
+    The whole cross-section is preprocessed and predicted as one batch; the
+    top-k / bottom-k are found by partial selection rather than a full sort.
+    Cross-sectional z-scores and deciles (aligned with `tickers`) are added
+    on request.
+
+    Cross-sections above `max_rows_per_request` are rejected with 413 (a
+    ranking needs the whole batch at once, so there is no async reroute);
+    when the model's in-flight row budget is exhausted the request is shed
+    with 503 and `Retry-After`.
+
+    Security:
+    ---------
+    Requires a valid JWT with the `predictions:create` scope.
+    """
+    try:
+        model_id = request.model_id
+        user_id = user["sub"]
+        logger.info("Rank request for model '%s' from user '%s' (%d assets)", model_id, user_id, len(request.tickers))
+
+        artifacts = MODEL_REGISTRY.get(model_id)
+        if not artifacts:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model not found")
+
+        metadata = MODELS.get(model_id)
+        if not metadata:
+            raise HTTPException(status_code=404, detail="Model metadata not found")
+        if metadata["type"] != "sync":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Model is not synchronous")
+
+        if len(request.tickers) != len(request.inputs):
+            raise HTTPException(status_code=422, detail="tickers and inputs must have the same length")
+        if len(set(request.tickers)) != len(request.tickers):
+            raise HTTPException(status_code=422, detail="tickers must be unique")
+
+        admission.check_size(model_id, len(request.inputs), can_reroute=False)
+
+        def compute():
+            ticket.started()
+            start = time.time()
+            X = preprocess_input(request.inputs, artifacts)
+            scores = artifacts["model"].predict(X).astype("float64")
+
+            zscores = cross_sectional_zscores(scores) if request.include_zscores else None
+            deciles = cross_sectional_deciles(scores) if request.include_deciles else None
+
+            def ranked(indices):
+                return [
+                    {
+                        "ticker": request.tickers[i],
+                        "rank": position + 1,
+                        "score": float(scores[i]),
+                        "zscore": float(zscores[i]) if zscores is not None else None,
+                        "decile": int(deciles[i]) if deciles is not None else None,
+                    }
+                    for position, i in enumerate(indices.tolist())
+                ]
+
+            top = ranked(top_k_indices(scores, request.top_k, largest=True))
+            bottom = ranked(top_k_indices(scores, request.bottom_k, largest=False))
+            duration = round((time.time() - start) * 1000, 3)
+            return scores, top, bottom, zscores, deciles, duration
+
+        with admission.admit(model_id, len(request.inputs)) as ticket:
+            scores, top, bottom, zscores, deciles, duration = await asyncio.to_thread(compute)
+
+        return {
+            "user_id": user_id,
+            "model_id": model_id,
+            "as_of": request.as_of,
+            "num_assets": len(scores),
+            "top": top,
+            "bottom": bottom,
+            "zscores": zscores.tolist() if zscores is not None else None,
+            "deciles": deciles.tolist() if deciles is not None else None,
+            "duration_ms": duration,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error during ranking", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class PredictionRequest(BaseModel):
     model_id: str
@@ -46,4 +46,111 @@ class ModelMetaData(BaseModel):
     description: str
     version: str
     created_at: datetime
-    schema_: Dict[str, List[str]]
\ No newline at end of file
+    schema_: Dict[str, List[str]]
+
+
+class BacktestRequest(BaseModel):
+    model_id: str
+    start_date: date
+    end_date: date
+    dataset: Optional[str] = None  # parquet file name in the market data dir
+    quantile: float = Field(0.2, gt=0, le=0.5)
+
+
+class BacktestStatusResponse(BaseModel):
+    user_id: Optional[str] = None
+    job_id: str
+    model_id: Optional[str] = None
+    status: str
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+class RankRequest(BaseModel):
+    model_id: str
+    tickers: List[str]
+    inputs: List[Dict[str, float]]  # one feature row per ticker, same order
+    as_of: Optional[date] = None     # cross-section date, echoed back
+    top_k: int = Field(10, ge=0)
+    bottom_k: int = Field(10, ge=0)
+    include_zscores: bool = False
+    include_deciles: bool = False
+
+
+class RankedAsset(BaseModel):
+    ticker: str
+    rank: int
+    score: float
+    zscore: Optional[float] = None
+    decile: Optional[int] = None
+
+
+class RankResponse(BaseModel):
+    user_id: str
+    model_id: str
+    as_of: Optional[date] = None
+    num_assets: int
+    top: List[RankedAsset]
+    bottom: List[RankedAsset]
+    zscores: Optional[List[float]] = None  # aligned with request tickers
+    deciles: Optional[List[int]] = None    # aligned with request tickers
+    duration_ms: Optional[float] = None
+
+
+class ExplainRequest(BaseModel):
+    model_id: str
+    inputs: List[Dict[str, float]]
+    top_n: Optional[int] = Field(None, ge=1)  # keep only the n largest |contributions| per row
+
+
+class RowExplanation(BaseModel):
+    prediction: float                # sum of contributions (raw model output)
+    bias: float
+    contributions: Dict[str, float]  # by feature name; largest first when top_n is set
+
+
+class ExplainResult(BaseModel):
+    explanations: List[RowExplanation]
+    duration_ms: Optional[float] = None
+    additional_info: Optional[Dict[str, Any]] = None
+
+
+class ExplainResponse(BaseModel):
+    user_id: str
+    model_id: str
+    result: ExplainResult
+
+
+class AsyncExplainResultResponse(BaseModel):
+    user_id: str
+    job_id: str
+    model_id: str
+    status: str
+    result: ExplainResult
+
+
+class EnsembleRequest(BaseModel):
+    model_ids: List[str] = Field(..., min_length=1)
+    weights: Optional[List[float]] = None  # aligned with model_ids; equal weights when omitted
+    inputs: List[Dict[str, float]]
+
+
+class EnsembleMember(BaseModel):
+    model_id: str
+    weight: float                    # normalized, weights sum to 1
+    predictions: List[float]
+    duration_ms: Optional[float] = None
+
+
+class EnsembleResult(BaseModel):
+    predictions: List[float]         # weighted blend of the members
+    members: List[EnsembleMember]
+    groups: List[List[str]]          # model ids sharing one preprocessed matrix
+    duration_ms: Optional[float] = None
+    additional_info: Optional[Dict[str, Any]] = None
+
+
+class EnsembleResponse(BaseModel):
+    user_id: str
+    model_ids: List[str]
+    result: EnsembleResult
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,6 +12,87 @@ class Settings(BaseSettings):
     algorithms: List[str] = ["RS256"]
 
     model_dir: str = "models"
+    # Prefer packaged bundles (native booster + mmap'd arrays) over pickles
+    use_artifact_bundles: bool = True
+    verify_bundle_checksums: bool = True
+
+    # Opt-in float32 inference; only enabled per model if float32 predictions
+    # stay within `float32_tolerance` of float64 on the reference set
+    inference_dtype: str = "float64"
+    float32_tolerance: float = 1e-4
+    float32_validation_rows: int = 512
+    reference_payload_path: Optional[str] = "models/reference/sample_prediction_payload.json"
+
+    # Warm-up: after loading, reference rows are run through preprocess +
+    # predict at each batch size; /v2/health/ready is 503 until it finishes
+    warmup_enabled: bool = True
+    warmup_batch_sizes: List[int] = [1, 32, 256, 1024]
+    warmup_repeats: int = 3
+
+    # Admission control: sync requests above max_rows_per_request are sent
+    # to the jobs path ("async") or rejected with 413 ("reject"); requests
+    # beyond a model's in-flight row budget are shed with 503 + Retry-After
+    max_rows_per_request: int = 10_000
+    max_rows_per_job: int = 1_000_000
+    max_inflight_rows_per_model: int = 50_000
+    oversize_policy: str = "async"
+    shed_retry_after_seconds: int = 1
+
+    # Shadow scoring (MODELS[...]["shadow"]): requests are queued for the
+    # shadow model on a bounded queue (dropped when full) and scored in
+    # batches of up to `shadow_batch_rows` rows on a background thread
+    shadow_queue_size: int = 1024
+    shadow_batch_rows: int = 4096
+
+    # Feature contributions (pred_contribs) are computed this many rows at a
+    # time; up to `explain_cache_rows` per-row results are kept in an LRU
+    explain_chunk_rows: int = 4096
+    explain_cache_rows: int = 100_000
+
+    # Backtests read parquet files (same schema as crypto_market_data.parquet)
+    # from this directory only
+    market_data_dir: str = "../../momentum-model"
+    market_data_file: str = "crypto_market_data.parquet"
+    backtest_lookback_days: int = 200
+    backtest_workers: int = 2
+
+    # Async result storage: packed predictions live in their own Redis DB
+    # (or "memory://" for a local stand-in) and expire after the polling window
+    result_store_url: Optional[str] = None
+    result_ttl_seconds: int = 3600
+    result_compression: bool = True
+    result_compression_level: int = 6
+
+    # Logging goes through a queue drained by a background writer thread.
+    # INFO records are kept at `log_sample_rate`, or per route prefix via
+    # `log_sample_rates` (e.g. LOG_SAMPLE_RATES='{"/v2/predict": 0.1}');
+    # warnings and errors are never sampled
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_sample_rate: float = 1.0
+    log_sample_rates: Dict[str, float] = {}
+
+    # On-demand profiling: requests with `X-Profile: 1` from callers with the
+    # admin:profile scope, plus a random `profile_sample_rate` share of
+    # requests, are profiled into a bounded directory of flamegraph files
+    profile_dir: str = "profiles"
+    profile_sample_rate: float = 0.0
+    profile_max_count: int = 100
+    profile_max_bytes: int = 50 * 1024 * 1024
+
+    # Celery queues: jobs up to `interactive_max_rows` go to "interactive"
+    # (unless sent with `X-Priority: bulk`), larger ones to "bulk", split
+    # into chunk tasks of `job_chunk_rows`; the readiness ping uses
+    # "control". Enqueue-to-start waits of the last `queue_wait_samples`
+    # tasks per queue are kept for /v2/metrics
+    interactive_max_rows: int = 10_000
+    job_chunk_rows: int = 50_000
+    queue_wait_samples: int = 1000
+    # Workers that only serve "control" can skip loading models
+    worker_load_models: bool = True
+
+    # How long a submitted job stays addressable by its idempotency key
+    idempotency_ttl_seconds: int = 300
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
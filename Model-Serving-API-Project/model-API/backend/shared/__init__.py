@@ -1,4 +1,12 @@
 # shared package with modules to be able to be imported directly from shared if desired
-from .worker import celery_app
 from .state import MODEL_REGISTRY
-from .logger_config import logger
\ No newline at end of file
+from .logger_config import logger
+
+
+def __getattr__(name):
+    # The Celery app is built on first access, so importing `shared` does not
+    # pull in celery for processes that never enqueue or run tasks.
+    if name == "celery_app":
+        from .worker import celery_app
+        return celery_app
+    raise AttributeError(f"module 'shared' has no attribute '{name}'")
@@ -0,0 +1,182 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from fastapi import HTTPException
+
+from settings import settings
+
+# Outcomes of the request-size check
+ADMIT = "admit"
+REROUTE = "reroute"
+
+
+def estimate_cost(rows: int) -> int:
+    """
+    Cost of a request in row units. Preprocess and predict are linear in
+    batch size, so rows are the cost; empty requests still cost one unit.
+    """
+    return max(rows, 1)
+
+
+class _ModelBudget:
+    __slots__ = (
+        "inflight_rows", "peak_inflight_rows", "queued", "admitted",
+        "shed", "rejected", "rerouted", "jobs_enqueued",
+    )
+
+    def __init__(self):
+        self.inflight_rows = 0
+        self.peak_inflight_rows = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.rejected = 0
+        self.rerouted = 0
+        self.jobs_enqueued = 0
+
+
+class _Ticket:
+    """
+    Handle for an admitted request; `started()` moves it from queued to running.
+    """
+
+    def __init__(self, controller: "AdmissionController", budget: _ModelBudget):
+        self._controller = controller
+        self._budget = budget
+        self._waiting = True
+
+    def started(self) -> None:
+        with self._controller._lock:
+            if self._waiting:
+                self._waiting = False
+                self._budget.queued -= 1
+
+    def _finish(self) -> None:
+        self.started()
+
+
+class AdmissionController:
+    """
+    Admission control for the synchronous prediction paths.
+
+    - Requests above `max_rows` are rejected with 413, or rerouted to the
+      async jobs path when the oversize policy is "async".
+    - Each model has an in-flight budget of `max_inflight_rows`; a request
+      whose cost would exceed it is shed immediately with 503 + Retry-After
+      instead of queueing behind the thread pool.
+
+    Checks run on the event loop before any work is handed to the pool.
+    """
+
+    def __init__(self, max_rows: int, max_inflight_rows: int, oversize_policy: str, retry_after: int):
+        self.max_rows = max_rows
+        self.max_inflight_rows = max_inflight_rows
+        self.oversize_policy = oversize_policy
+        self.retry_after = retry_after
+        self._budgets: Dict[str, _ModelBudget] = {}
+        self._lock = threading.Lock()
+
+    def _budget(self, model_id: str) -> _ModelBudget:
+        budget = self._budgets.get(model_id)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.setdefault(model_id, _ModelBudget())
+        return budget
+
+    def check_job_size(self, model_id: str, rows: int) -> None:
+        """
+        Raise 413 if an async job is above `max_rows_per_job`.
+        """
+        if rows <= settings.max_rows_per_job:
+            return
+        budget = self._budget(model_id)
+        with self._lock:
+            budget.rejected += 1
+        raise HTTPException(
+            status_code=413,
+            detail=f"Job has {rows} rows; the limit is {settings.max_rows_per_job}",
+        )
+
+    def record_enqueued(self, model_id: str) -> None:
+        budget = self._budget(model_id)
+        with self._lock:
+            budget.jobs_enqueued += 1
+
+    def check_size(self, model_id: str, rows: int, can_reroute: bool = True) -> str:
+        """
+        Returns ADMIT or REROUTE; raises 413 if the request is too large and
+        cannot go to the async path.
+        """
+        if rows <= self.max_rows:
+            return ADMIT
+
+        budget = self._budget(model_id)
+        if can_reroute and self.oversize_policy == "async":
+            with self._lock:
+                budget.rerouted += 1
+            return REROUTE
+
+        with self._lock:
+            budget.rejected += 1
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request has {rows} rows; the synchronous limit is {self.max_rows}. Use /v2/jobs for larger batches.",
+        )
+
+    @contextmanager
+    def admit(self, model_id: str, rows: int):
+        """
+        Reserve `rows` from the model's in-flight budget for the duration of
+        the block, or shed the request with 503 if the budget is exhausted.
+        """
+        cost = estimate_cost(rows)
+        budget = self._budget(model_id)
+        with self._lock:
+            # A single request larger than the whole budget is still admitted
+            # when nothing else is running, so it cannot be starved forever.
+            if budget.inflight_rows and budget.inflight_rows + cost > self.max_inflight_rows:
+                budget.shed += 1
+                shed = True
+            else:
+                budget.inflight_rows += cost
+                budget.peak_inflight_rows = max(budget.peak_inflight_rows, budget.inflight_rows)
+                budget.queued += 1
+                budget.admitted += 1
+                shed = False
+
+        if shed:
+            raise HTTPException(
+                status_code=503,
+                detail="Server is at capacity for this model, retry later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        ticket = _Ticket(self, budget)
+        try:
+            yield ticket
+        finally:
+            ticket._finish()
+            with self._lock:
+                budget.inflight_rows -= cost
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_rows_per_request": self.max_rows,
+                "max_rows_per_job": settings.max_rows_per_job,
+                "max_inflight_rows_per_model": self.max_inflight_rows,
+                "oversize_policy": self.oversize_policy,
+                "models": {
+                    model_id: {name: getattr(budget, name) for name in _ModelBudget.__slots__}
+                    for model_id, budget in self._budgets.items()
+                },
+            }
+
+
+admission = AdmissionController(
+    max_rows=settings.max_rows_per_request,
+    max_inflight_rows=settings.max_inflight_rows_per_model,
+    oversize_policy=settings.oversize_policy,
+    retry_after=settings.shed_retry_after_seconds,
+)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.routing import Match
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def is_arrow(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.split(";", 1)[0].strip().lower() == ARROW_STREAM
+
+
+def accepts_arrow(accept: Optional[str]) -> bool:
+    """
+    True if the `Accept` header explicitly lists the Arrow stream type;
+    `*/*` and a missing header keep the JSON default.
+    """
+    return bool(accept) and any(is_arrow(part) for part in accept.split(","))
+
+
+class ArrowRoute(APIRoute):
+    """
+    Route that only matches requests whose body is an Arrow IPC stream.
+
+    Registered on the same path and method as the JSON endpoint (and ahead
+    of it), so `Content-Type` picks the handler and JSON stays the default.
+    """
+
+    def matches(self, scope):
+        match, child_scope = super().matches(scope)
+        if match == Match.FULL and not is_arrow(Headers(scope=scope).get("content-type")):
+            return Match.NONE, {}
+        return match, child_scope
+
+
+def read_feature_matrix(body: bytes, feature_names: List[str], dtype: str = "float64") -> np.ndarray:
+    """
+    Decode an Arrow IPC stream into a (rows x features) matrix in
+    `feature_names` order.
+
+    The stream is read straight out of the request body and each column is
+    viewed as a numpy array without copying; the only copy is the gather
+    into the output matrix, which is allocated in the inference `dtype` so
+    `preprocess_matrix(..., inplace=True)` can reuse it.
+
+    Raises:
+    -------
+    HTTPException
+        400 if the body is not an Arrow stream; 422 if a feature column is
+        missing, not numeric, or contains nulls.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Arrow IPC stream: {e}")
+
+    missing = [name for name in feature_names if name not in table.column_names]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Missing features: {', '.join(sorted(missing))}")
+
+    out = np.empty((table.num_rows, len(feature_names)), dtype=dtype)
+    for j, name in enumerate(feature_names):
+        column = table.column(name)
+        if column.null_count:
+            raise HTTPException(status_code=422, detail=f"Feature '{name}' contains nulls")
+        if not (pa.types.is_floating(column.type) or pa.types.is_integer(column.type)):
+            raise HTTPException(status_code=422, detail=f"Feature '{name}' must be numeric, got {column.type}")
+        offset = 0
+        for chunk in column.chunks:
+            values = chunk.to_numpy(zero_copy_only=True)
+            out[offset:offset + len(values), j] = values
+            offset += len(values)
+    return out
+
+
+def write_predictions(predictions: np.ndarray, metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Encode predictions as a one-column (`prediction`) Arrow IPC stream; the
+    response metadata (model_id, duration_ms, ...) goes in the schema
+    metadata as strings.
+    """
+    import numpy as np
+    import pyarrow as pa
+
+    column = pa.array(np.ascontiguousarray(predictions))
+    schema = pa.schema(
+        [pa.field("prediction", column.type, nullable=False)],
+        metadata={k: str(v) for k, v in (metadata or {}).items()},
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(pa.record_batch([column], schema=schema))
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_response(predictions: np.ndarray, metadata: Optional[Dict[str, Any]] = None, **kwargs) -> Response:
+    return Response(content=write_predictions(predictions, metadata), media_type=ARROW_STREAM, **kwargs)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+MANIFEST_NAME = "manifest.json"
+BUNDLE_FORMAT_VERSION = 1
+
+# Preprocessing arrays stored as .npy files, in `feature_names` order
+ARRAY_FILES = {
+    "lower_bounds": "lower_bounds.npy",
+    "upper_bounds": "upper_bounds.npy",
+    "scaler_center": "scaler_center.npy",
+    "scaler_scale": "scaler_scale.npy",
+}
+MODEL_FILE = "model.ubj"
+
+
+class BundleScaler:
+    """
+    Array-backed replacement for the fitted `RobustScaler`.
+
+    RobustScaler.transform is `(X - center_) / scale_`; keeping only those two
+    vectors lets them be memory-mapped and shared between processes.
+    """
+
+    def __init__(self, center, scale):
+        self.center_ = center
+        self.scale_ = scale
+
+    def transform(self, X):
+        import numpy as np
+
+        X = np.asarray(X, dtype=float)
+        return (X - self.center_) / self.scale_
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_bundle(artifacts: Dict[str, Any], metadata: Dict[str, Any], out_dir: str, source: str = "") -> Dict[str, Any]:
+    """
+    Convert pickled artifacts into a versioned bundle directory.
+
+    Writes the XGBoost model as native UBJSON, the winsorization bounds and
+    scaler statistics as `.npy` arrays, and a manifest with feature order,
+    checksums, library versions and the model's registry metadata.
+
+    Returns:
+    --------
+    dict
+        The manifest that was written.
+    """
+    import numpy as np
+    import sklearn
+    import xgboost
+
+    feature_names = list(artifacts["feature_names"])
+    scaler = artifacts["scaler"]
+    n_features = len(feature_names)
+
+    center = scaler.center_ if getattr(scaler, "with_centering", True) else None
+    scale = scaler.scale_ if getattr(scaler, "with_scaling", True) else None
+    arrays = {
+        "lower_bounds": artifacts["lower_bounds"][feature_names].to_numpy(dtype=np.float64),
+        "upper_bounds": artifacts["upper_bounds"][feature_names].to_numpy(dtype=np.float64),
+        "scaler_center": np.zeros(n_features) if center is None else np.asarray(center, dtype=np.float64),
+        "scaler_scale": np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    files: Dict[str, Dict[str, Any]] = {}
+
+    model_path = os.path.join(out_dir, MODEL_FILE)
+    artifacts["model"].save_model(model_path)
+    files["model"] = {"path": MODEL_FILE, "format": "ubjson"}
+
+    for name, filename in ARRAY_FILES.items():
+        array = np.ascontiguousarray(arrays[name])
+        if array.shape != (n_features,):
+            raise ValueError(f"{name} has shape {array.shape}, expected ({n_features},)")
+        np.save(os.path.join(out_dir, filename), array, allow_pickle=False)
+        files[name] = {"path": filename, "dtype": str(array.dtype), "shape": list(array.shape)}
+
+    for entry in files.values():
+        path = os.path.join(out_dir, entry["path"])
+        entry["sha256"] = file_sha256(path)
+        entry["bytes"] = os.path.getsize(path)
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "model_id": metadata["model_id"],
+        "version": metadata["version"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "feature_names": feature_names,
+        "model_class": type(artifacts["model"]).__name__,
+        "scaler_class": type(scaler).__name__,
+        "files": files,
+        "metadata": metadata,
+        "libraries": {
+            "xgboost": xgboost.__version__,
+            "numpy": np.__version__,
+            "scikit-learn": sklearn.__version__,
+        },
+        "source": {
+            "path": os.path.basename(source),
+            "sha256": file_sha256(source),
+        } if source else None,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_bundle(bundle_dir: str, mmap: bool = True, verify: bool = True) -> Dict[str, Any]:
+    """
+    Load a bundle written by `write_bundle` into the artifacts dict shape
+    used by `preprocess_input` and the predict routes.
+
+    The `.npy` arrays are opened with `mmap_mode="r"` so their pages are
+    shared between every process that loads the same bundle.
+
+    Raises:
+    -------
+    ValueError
+        If a checksum or array shape does not match the manifest.
+    """
+    import numpy as np
+    import pandas as pd
+    from xgboost import XGBRegressor
+
+    with open(os.path.join(bundle_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+
+    files = manifest["files"]
+    if verify:
+        for name, entry in files.items():
+            if file_sha256(os.path.join(bundle_dir, entry["path"])) != entry["sha256"]:
+                raise ValueError(f"Checksum mismatch for '{name}' in bundle {bundle_dir}")
+
+    feature_names = manifest["feature_names"]
+    arrays = {}
+    for name in ARRAY_FILES:
+        entry = files[name]
+        array = np.load(os.path.join(bundle_dir, entry["path"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+        if list(array.shape) != entry["shape"]:
+            raise ValueError(f"Shape mismatch for '{name}' in bundle {bundle_dir}")
+        arrays[name] = array
+
+    model = XGBRegressor()
+    model.load_model(os.path.join(bundle_dir, files["model"]["path"]))
+
+    return {
+        "model": model,
+        "scaler": BundleScaler(arrays["scaler_center"], arrays["scaler_scale"]),
+        # Series wrap the mapped arrays without copying
+        "lower_bounds": pd.Series(arrays["lower_bounds"], index=feature_names, copy=False),
+        "upper_bounds": pd.Series(arrays["upper_bounds"], index=feature_names, copy=False),
+        "feature_names": feature_names,
+        "manifest": manifest,
+    }
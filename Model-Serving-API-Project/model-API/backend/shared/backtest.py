@@ -0,0 +1,294 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from settings import settings
+from shared.utils import preprocess_matrix
+from shared.logger_config import logger
+
+# Mirrors momentum-model/xgboost-momentum-model.py
+LOOKBACK_PERIODS = [7, 10, 14, 21, 30, 42, 60]
+TARGET_HORIZON_DAYS = 7
+MARKET_TICKER = "BTC"
+INPUT_COLUMNS = ["date", "ticker", "price", "volume"]
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def resolve_dataset(dataset: Optional[str]) -> str:
+    """
+    Map a dataset name to a parquet path inside `settings.market_data_dir`.
+
+    Raises:
+    -------
+    ValueError
+        If the name escapes the data directory or the file does not exist.
+    """
+    base = settings.market_data_dir
+    if not os.path.isabs(base):
+        base = os.path.join(os.path.dirname(os.path.dirname(__file__)), base)
+    base = os.path.realpath(base)
+
+    path = os.path.realpath(os.path.join(base, dataset or settings.market_data_file))
+    if os.path.commonpath([base, path]) != base or not path.endswith(".parquet"):
+        raise ValueError("Dataset must be a .parquet file inside the market data directory")
+    if not os.path.exists(path):
+        raise ValueError(f"Dataset '{dataset or settings.market_data_file}' not found")
+    return path
+
+
+def read_market_data(
+    path: str,
+    start: date,
+    end: date,
+    progress: Optional[ProgressCallback] = None,
+):
+    """
+    Read the bars needed to score [start, end] from a market-data parquet.
+
+    The file is opened through a memory-mapped reader and consumed one row
+    group at a time; row groups whose date statistics fall entirely outside
+    the window (plus the feature lookback and the forward-return horizon)
+    are skipped without being decoded.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    window_start = start - timedelta(days=settings.backtest_lookback_days)
+    window_end = end + timedelta(days=2 * TARGET_HORIZON_DAYS)
+
+    parquet = pq.ParquetFile(path, memory_map=True)
+    missing = set(INPUT_COLUMNS) - set(parquet.schema_arrow.names)
+    if missing:
+        raise ValueError(f"Dataset is missing columns: {', '.join(sorted(missing))}")
+    date_index = parquet.schema_arrow.get_field_index("date")
+
+    tables = []
+    n_groups = parquet.num_row_groups
+    for i in range(n_groups):
+        stats = parquet.metadata.row_group(i).column(date_index).statistics
+        if stats is not None and stats.has_min_max and isinstance(stats.min, date):
+            # Timestamp columns report datetime / pd.Timestamp stats; compare
+            # them as calendar dates like the row filter below
+            group_min, group_max = pd.Timestamp(stats.min).date(), pd.Timestamp(stats.max).date()
+            if group_max < window_start or group_min > window_end:
+                if progress:
+                    progress("read", i + 1, n_groups)
+                continue
+
+        table = parquet.read_row_group(i, columns=INPUT_COLUMNS)
+        dates = table.column("date").cast(pa.date32())
+        mask = pc.and_(
+            pc.greater_equal(dates, pa.scalar(window_start, pa.date32())),
+            pc.less_equal(dates, pa.scalar(window_end, pa.date32())),
+        )
+        tables.append(table.filter(mask))
+        if progress:
+            progress("read", i + 1, n_groups)
+
+    if not tables:
+        return pd.DataFrame(columns=INPUT_COLUMNS)
+
+    df = pa.concat_tables(tables).to_pandas()
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+
+def _ticker_features(frame):
+    """
+    Per-ticker price/TA features and the 7-day forward target for one
+    ticker's bars (sorted by date). Same definitions as the training script.
+    """
+    import pandas as pd
+    from ta.momentum import RSIIndicator
+    from ta.trend import MACD
+    from ta.volatility import BollingerBands
+
+    price = frame["price"]
+    volume = frame["volume"]
+    out = pd.DataFrame({"date": frame["date"], "ticker": frame["ticker"]}, index=frame.index)
+
+    # Training uses pct_change's default pad fill (deprecated in pandas);
+    # forward-filling first gives the same returns across missing prices
+    padded = price.ffill()
+    for period in LOOKBACK_PERIODS:
+        out[f"ret_{period}d"] = padded.pct_change(periods=period, fill_method=None)
+    out["ret_1d"] = padded.pct_change(periods=1, fill_method=None)
+    out["volatility_14d"] = out["ret_1d"].rolling(window=14).std()
+    out["volume_zscore_14d"] = (volume - volume.rolling(window=14).mean()) / volume.rolling(window=14).std()
+
+    out["rsi_14"] = RSIIndicator(close=price, window=14).rsi()
+    bands = BollingerBands(close=price, window=20)
+    out["bb_width"] = bands.bollinger_wband()
+    out["bb_percent_b"] = bands.bollinger_pband()
+    out["macd_diff"] = MACD(close=price, window_slow=26, window_fast=12, window_sign=9).macd_diff()
+
+    out["mom_x_vol_42d"] = out["ret_42d"] * out["volatility_14d"]
+    out["target"] = padded.pct_change(periods=TARGET_HORIZON_DAYS, fill_method=None).shift(-TARGET_HORIZON_DAYS)
+    return out
+
+
+def _features_for_tickers(chunk):
+    """
+    Process-pool entry point: features for every ticker in a chunk of bars.
+    """
+    import pandas as pd
+
+    return pd.concat([_ticker_features(group) for _, group in chunk.groupby("ticker", sort=False)])
+
+
+def _pool_context():
+    """
+    Fork context for the feature pool. Backtests run inside Celery's prefork
+    pool, whose processes are daemonic, and the stdlib `multiprocessing`
+    refuses to start children from a daemonic process; billiard (Celery's
+    fork of it) does not, so its context is used for the pool's processes.
+    """
+    import billiard
+
+    return billiard.get_context("fork")
+
+
+def _run_chunks(chunks, workers: int, progress: Optional[ProgressCallback]):
+    total = len(chunks)
+    if workers > 1 and total > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, total), mp_context=_pool_context()) as pool:
+                results = []
+                for i, result in enumerate(pool.map(_features_for_tickers, chunks)):
+                    results.append(result)
+                    if progress:
+                        progress("features", i + 1, total)
+                return results
+        except OSError as e:
+            logger.warning("Process pool unavailable (%s); computing features in-process", e)
+
+    results = []
+    for i, chunk in enumerate(chunks):
+        results.append(_features_for_tickers(chunk))
+        if progress:
+            progress("features", i + 1, total)
+    return results
+
+
+def compute_features(df, workers: int = 1, progress: Optional[ProgressCallback] = None):
+    """
+    Engineer the model features for every ticker, split by ticker chunk
+    across `workers` processes, then add the market-neutral returns
+    (each return minus BTC's return on the same date).
+    """
+    import numpy as np
+    import pandas as pd
+
+    tickers = df["ticker"].unique()
+    n_chunks = max(1, min(len(tickers), workers * 2))
+    chunks = [df[df["ticker"].isin(part)] for part in np.array_split(tickers, n_chunks) if len(part)]
+
+    features = pd.concat(_run_chunks(chunks, workers, progress))
+
+    market_cols = [f"ret_{period}d" for period in [1] + LOOKBACK_PERIODS]
+    market = features.loc[features["ticker"] == MARKET_TICKER, ["date"] + market_cols]
+    if market.empty:
+        raise ValueError(f"Dataset has no {MARKET_TICKER} bars to compute market-neutral features")
+    market = market.set_index("date").add_suffix("_btc")
+    features = features.merge(market, left_on="date", right_index=True, how="left")
+    for col in market_cols:
+        features[f"{col}_neutral"] = features[col] - features[f"{col}_btc"]
+    return features.drop(columns=[f"{col}_btc" for col in market_cols])
+
+
+def evaluate(scored, quantile: float) -> Dict[str, Any]:
+    """
+    Cross-sectional evaluation against the 7-day forward target.
+
+    - ic: mean per-date Spearman rank correlation of prediction vs target
+    - hit_rate: share of rows where sign(prediction) == sign(target)
+    - long_short_return: mean per-date target return of the top `quantile`
+      of predictions minus the bottom `quantile`
+    """
+    import numpy as np
+
+    scored = scored.dropna(subset=["target"])
+    if scored.empty:
+        raise ValueError("No rows with a forward target in the requested range")
+
+    by_date = scored.groupby("date")
+    rank_pred = by_date["prediction"].rank()
+    rank_target = by_date["target"].rank()
+    dp = rank_pred - rank_pred.groupby(scored["date"]).transform("mean")
+    dt = rank_target - rank_target.groupby(scored["date"]).transform("mean")
+    cov = (dp * dt).groupby(scored["date"]).sum()
+    var = np.sqrt((dp ** 2).groupby(scored["date"]).sum() * (dt ** 2).groupby(scored["date"]).sum())
+    daily_ic = (cov / var.replace(0, np.nan)).dropna()
+
+    pct = by_date["prediction"].rank(pct=True)
+    top = scored["target"].where(pct > 1 - quantile).groupby(scored["date"]).mean()
+    bottom = scored["target"].where(pct <= quantile).groupby(scored["date"]).mean()
+    long_short = (top - bottom).dropna()
+
+    hits = np.sign(scored["prediction"].to_numpy()) == np.sign(scored["target"].to_numpy())
+    ic_std = float(daily_ic.std()) if len(daily_ic) > 1 else 0.0
+
+    return {
+        "ic": float(daily_ic.mean()) if len(daily_ic) else None,
+        "ic_std": ic_std,
+        "ic_ir": float(daily_ic.mean() / ic_std) if ic_std else None,
+        "hit_rate": float(hits.mean()),
+        "long_short_return": float(long_short.mean()) if len(long_short) else None,
+        "quantile": quantile,
+        "num_dates": int(scored["date"].nunique()),
+        "num_rows": int(len(scored)),
+        "num_tickers": int(scored["ticker"].nunique()),
+    }
+
+
+def run_backtest(
+    artifacts: Dict[str, Any],
+    path: str,
+    start: date,
+    end: date,
+    quantile: float = 0.2,
+    workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Read -> engineer features -> score with the model -> evaluate.
+
+    Returns:
+    --------
+    dict
+        Evaluation metrics (see `evaluate`) plus per-stage timings.
+    """
+    timings: Dict[str, float] = {}
+
+    t = time.perf_counter()
+    bars = read_market_data(path, start, end, progress)
+    timings["read_ms"] = round((time.perf_counter() - t) * 1000, 3)
+    if bars.empty:
+        raise ValueError("No market data in the requested range")
+
+    t = time.perf_counter()
+    features = compute_features(bars, workers, progress)
+    timings["features_ms"] = round((time.perf_counter() - t) * 1000, 3)
+
+    t = time.perf_counter()
+    feature_names: List[str] = artifacts["feature_names"]
+    in_range = features["date"].between(str(start), str(end))
+    scored = features.loc[in_range].dropna(subset=feature_names).copy()
+    if scored.empty:
+        raise ValueError("No rows with complete features in the requested range")
+    X = preprocess_matrix(scored[feature_names].to_numpy(), artifacts)
+    scored["prediction"] = artifacts["model"].predict(X)
+    timings["score_ms"] = round((time.perf_counter() - t) * 1000, 3)
+    if progress:
+        progress("score", 1, 1)
+
+    metrics = evaluate(scored, quantile)
+    metrics["start_date"] = str(start)
+    metrics["end_date"] = str(end)
+    metrics["timings"] = timings
+    return metrics
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from shared.utils import preprocessing_fingerprint
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def preprocessing_groups(model_ids: List[str], registry: Dict[str, Dict[str, Any]]) -> List[List[str]]:
+    """
+    Group `model_ids` (in request order) by preprocessing fingerprint and
+    inference dtype. Every model in a group can predict from the same
+    preprocessed matrix, so each group is preprocessed once.
+    """
+    groups: Dict[tuple, List[str]] = {}
+    for model_id in model_ids:
+        artifacts = registry[model_id]
+        key = (preprocessing_fingerprint(artifacts), artifacts.get("dtype", "float64"))
+        groups.setdefault(key, []).append(model_id)
+    return list(groups.values())
+
+
+def normalize_weights(model_ids: List[str], weights: Optional[List[float]]) -> List[float]:
+    """
+    Blend weights aligned with `model_ids`, scaled to sum to 1; equal
+    weights when none are given.
+
+    Raises:
+    -------
+    HTTPException
+        422 if the weights do not line up with the models, are negative or
+        are all zero.
+    """
+    if weights is None:
+        return [1.0 / len(model_ids)] * len(model_ids)
+    if len(weights) != len(model_ids):
+        raise HTTPException(status_code=422, detail="weights and model_ids must have the same length")
+    if any(w < 0 for w in weights):
+        raise HTTPException(status_code=422, detail="weights must be non-negative")
+    total = float(sum(weights))
+    if total <= 0:
+        raise HTTPException(status_code=422, detail="weights must not all be zero")
+    return [w / total for w in weights]
+
+
+def blend(predictions: List[np.ndarray], weights: List[float]) -> np.ndarray:
+    """
+    Weighted sum of per-model predictions (weights already normalized),
+    accumulated in float64 whatever the models' output dtype.
+    """
+    import numpy as np
+
+    blended = np.zeros(len(predictions[0]), dtype="float64")
+    for preds, weight in zip(predictions, weights):
+        blended += weight * np.asarray(preds, dtype="float64")
+    return blended
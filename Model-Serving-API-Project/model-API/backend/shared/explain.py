@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from settings import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class ContributionCache:
+    """
+    Thread-safe LRU of per-row contribution vectors.
+
+    Keys are (model_id, model version, dtype, hash of the preprocessed row),
+    so a new model version or inference dtype never reuses old attributions.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._rows: "OrderedDict[Tuple[str, str, str, bytes], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: List[Tuple]) -> List[Optional["np.ndarray"]]:
+        found = []
+        with self._lock:
+            for key in keys:
+                row = self._rows.get(key)
+                if row is not None:
+                    self._rows.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                found.append(row)
+        return found
+
+    def put_many(self, items: List[Tuple[Tuple, "np.ndarray"]]) -> None:
+        if self.max_rows <= 0:
+            return
+        with self._lock:
+            for key, row in items:
+                self._rows[key] = row
+                self._rows.move_to_end(key)
+            while len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "rows": len(self._rows),
+                "max_rows": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+contribution_cache = ContributionCache(settings.explain_cache_rows)
+
+
+def row_hashes(X: np.ndarray) -> List[bytes]:
+    """
+    Digest of each preprocessed row's bytes (same dtype => same digest).
+    """
+    import numpy as np
+
+    X = np.ascontiguousarray(X)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in X]
+
+
+def compute_contributions(artifacts: Dict[str, Any], X: np.ndarray, chunk_rows: int) -> np.ndarray:
+    """
+    Per-feature contributions (TreeSHAP) for a preprocessed matrix using the
+    booster's batched `pred_contribs`, `chunk_rows` rows at a time so the
+    DMatrix and output for huge batches stay bounded.
+
+    Returns:
+    --------
+    np.ndarray
+        (rows, n_features + 1); the last column is the bias. Each row sums
+        to the model's raw prediction.
+    """
+    import numpy as np
+    import xgboost as xgb
+
+    booster = artifacts["model"].get_booster()
+    feature_names = booster.feature_names or artifacts["feature_names"]
+    n_cols = len(artifacts["feature_names"]) + 1
+    out = np.empty((len(X), n_cols), dtype="float32")
+
+    chunk_rows = max(chunk_rows, 1)
+    for start in range(0, len(X), chunk_rows):
+        chunk = X[start:start + chunk_rows]
+        dmatrix = xgb.DMatrix(chunk, feature_names=feature_names)
+        out[start:start + len(chunk)] = booster.predict(dmatrix, pred_contribs=True)
+    return out
+
+
+def explain_matrix(
+    model_id: str,
+    artifacts: Dict[str, Any],
+    X: np.ndarray,
+    chunk_rows: Optional[int] = None,
+    cache: Optional[ContributionCache] = None,
+) -> Tuple[np.ndarray, int]:
+    """
+    Contributions for every row of a preprocessed matrix, computing only the
+    rows that are not already cached.
+
+    Returns:
+    --------
+    (np.ndarray, int)
+        The (rows, n_features + 1) contributions and the number of cache hits.
+    """
+    import numpy as np
+
+    cache = contribution_cache if cache is None else cache
+    chunk_rows = chunk_rows or settings.explain_chunk_rows
+    version = artifacts.get("metadata", {}).get("version", "")
+    keys = [(model_id, version, str(X.dtype), digest) for digest in row_hashes(X)]
+    cached = cache.get_many(keys)
+
+    # Rows that are not cached, computed once per distinct row
+    missing: Dict[Tuple, List[int]] = {}
+    n_cols = len(artifacts["feature_names"]) + 1
+    out = np.empty((len(X), n_cols), dtype="float32")
+    for i, row in enumerate(cached):
+        if row is None:
+            missing.setdefault(keys[i], []).append(i)
+        else:
+            out[i] = row
+
+    if missing:
+        first = [indices[0] for indices in missing.values()]
+        computed = compute_contributions(artifacts, X[first], chunk_rows)
+        for j, indices in enumerate(missing.values()):
+            out[indices] = computed[j]
+        cache.put_many([(key, computed[j]) for j, key in enumerate(missing)])
+
+    return out, len(X) - sum(len(indices) for indices in missing.values())
+
+
+def format_explanations(
+    contributions: np.ndarray,
+    feature_names: List[str],
+    top_n: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One dict per row: `prediction` (sum of contributions), `bias` and
+    `contributions` keyed by feature name. With `top_n`, only the `top_n`
+    features with the largest absolute contribution are kept, largest first.
+    """
+    import numpy as np
+
+    values = contributions[:, :-1]
+    bias = contributions[:, -1].astype("float64").tolist()
+    predictions = contributions.astype("float64").sum(axis=1).tolist()
+    n_features = values.shape[1]
+
+    if top_n is not None and top_n < n_features:
+        magnitude = np.abs(values)
+        idx = np.argpartition(-magnitude, top_n - 1, axis=1)[:, :top_n]
+        order = np.argsort(-np.take_along_axis(magnitude, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+    else:
+        idx = np.broadcast_to(np.arange(n_features), values.shape)
+
+    picked = np.take_along_axis(values, idx, axis=1).astype("float64").tolist()
+    return [
+        {
+            "prediction": predictions[r],
+            "bias": bias[r],
+            "contributions": {feature_names[i]: v for i, v in zip(idx[r].tolist(), picked[r])},
+        }
+        for r in range(len(values))
+    ]
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+
+from settings import settings
+from shared.result_store import get_result_store
+
+
+# Answer to an Idempotency-Key reused with a different payload
+KEY_REUSED = "Idempotency-Key was already used with a different request payload"
+
+
+# Records serialized per json.dumps call when hashing. The C encoder holds
+# the GIL for a whole call, so a large payload is hashed in slices to let
+# the event loop run while a worker thread fingerprints it
+_DIGEST_ROWS = 512
+
+
+def payload_digest(
+    model_id: str,
+    model_version: str,
+    inputs: Union[List[Dict[str, Any]], bytes],
+) -> str:
+    """
+    Content hash of a request: model_id + model version + inputs (JSON
+    records, or the raw body of a binary request).
+
+    Takes seconds for a million JSON records; call it off the event loop.
+    """
+    if isinstance(inputs, (bytes, bytearray)):
+        material = f"bytes:{model_id}:{model_version}:{hashlib.sha256(inputs).hexdigest()}"
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    digest = hashlib.sha256(f"hash:{model_id}:{model_version}:".encode("utf-8"))
+    for start in range(0, len(inputs), _DIGEST_ROWS):
+        chunk = inputs[start:start + _DIGEST_ROWS]
+        digest.update(json.dumps(chunk, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def request_fingerprint(
+    model_id: str,
+    model_version: str,
+    inputs: Union[List[Dict[str, Any]], bytes],
+    idempotency_key: Optional[str] = None,
+    scope: Optional[str] = None,
+    digest: Optional[str] = None,
+) -> str:
+    """
+    Build the deduplication key for a prediction request.
+
+    An explicit `Idempotency-Key` header wins; otherwise the key is the
+    `payload_digest` of the request (pass `digest` if it is already
+    computed). `scope` (e.g. the user id) keeps keys from different callers
+    apart.
+    """
+    if idempotency_key:
+        material = f"key:{model_id}:{idempotency_key}"
+    else:
+        material = f"hash:{digest or payload_digest(model_id, model_version, inputs)}"
+    if scope:
+        material = f"{scope}|{material}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class InflightCoalescer:
+    """
+    Shares one computation between identical requests that overlap in time.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait on the same future and receive its result (or its
+    exception). Nothing is cached once the computation finishes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, Tuple[Future, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def run(self, key: str, fn: Callable[[], Any], digest: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        Returns:
+        --------
+        tuple
+            (result, coalesced) where `coalesced` is True if this caller
+            reused another request's computation.
+
+        Raises:
+        -------
+        HTTPException
+            422 if the in-flight computation for `key` was started for a
+            different payload `digest` (an Idempotency-Key reused).
+        """
+        with self._lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                future = Future()
+                self._inflight[key] = (future, digest)
+                self._stats["leaders"] += 1
+            else:
+                future, inflight_digest = inflight
+                if digest and inflight_digest and digest != inflight_digest:
+                    raise HTTPException(status_code=422, detail=KEY_REUSED)
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "inflight": len(self._inflight)}
+
+
+class JobDeduplicator:
+    """
+    Maps idempotency keys to job ids in the result store (SET NX + TTL).
+
+    A duplicate submission within the TTL is answered with the existing
+    job id, without touching the broker. Because the mapping lives in the
+    result store, duplicates are caught across API replicas too. The payload
+    digest is stored with the job id, so a key reused for a different
+    payload is rejected instead of answered with the old job.
+    """
+
+    def __init__(self, ttl: int, prefix: str = "idem:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {"claimed": 0, "duplicates": 0, "mismatches": 0}
+
+    @staticmethod
+    def _entry(job_id: str, digest: Optional[str]) -> bytes:
+        return json.dumps({"job_id": job_id, "digest": digest}).encode()
+
+    def claim(self, key: str, job_id: str, digest: Optional[str] = None) -> Optional[str]:
+        """
+        Reserve `key` for `job_id`, submitted with payload `digest`.
+
+        Returns:
+        --------
+        str or None
+            None if the claim succeeded (caller should dispatch the job),
+            otherwise the id of the job that already owns the key.
+
+        Raises:
+        -------
+        HTTPException
+            422 if the key is owned by a job submitted with a different
+            payload.
+        """
+        backend = get_result_store().backend
+        if backend.set_if_absent(self.prefix + key, self._entry(job_id, digest), ttl=self.ttl):
+            with self._lock:
+                self._stats["claimed"] += 1
+            return None
+
+        existing = backend.get(self.prefix + key)
+        if existing is None:
+            # Expired between the two calls; try once more.
+            return self.claim(key, job_id, digest)
+        entry = json.loads(existing)
+        if digest and entry["digest"] and digest != entry["digest"]:
+            with self._lock:
+                self._stats["mismatches"] += 1
+            raise HTTPException(status_code=422, detail=KEY_REUSED)
+        with self._lock:
+            self._stats["duplicates"] += 1
+        return entry["job_id"]
+
+    def claim_or_existing(
+        self,
+        key: str,
+        job_id: str,
+        digest: Optional[str],
+        status_of: Callable[[str], str],
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Claim `key` for `job_id`, unless a job that has not failed already
+        owns it. A failed owner is replaced, so the new submission retries it.
+
+        Returns:
+        --------
+        (str, str) or None
+            None if the caller should dispatch `job_id`, otherwise the id and
+            status (from `status_of`) of the job that owns the key.
+        """
+        existing_id = self.claim(key, job_id, digest)
+        if existing_id is None:
+            return None
+        existing_status = status_of(existing_id)
+        if existing_status != "FAILURE":
+            return existing_id, existing_status
+        self.replace(key, job_id, digest)
+        return None
+
+    def replace(self, key: str, job_id: str, digest: Optional[str] = None) -> None:
+        """
+        Point `key` at a new job (used when the previous job failed).
+        """
+        get_result_store().backend.set(self.prefix + key, self._entry(job_id, digest), ttl=self.ttl)
+
+    def release(self, key: str) -> None:
+        """
+        Drop a claim whose job was never dispatched.
+        """
+        get_result_store().backend.delete(self.prefix + key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+predict_coalescer = InflightCoalescer()
+job_deduplicator = JobDeduplicator(ttl=settings.idempotency_ttl_seconds)
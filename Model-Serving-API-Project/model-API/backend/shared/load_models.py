@@ -1,27 +1,121 @@
 import os
-import joblib
+import threading
 
 from shared.state import MODEL_REGISTRY
 from models import MODELS
 from settings import settings
-import logging
+from shared.artifacts import MANIFEST_NAME, load_bundle
+from shared.precision import validate_float32
+from shared.warmup import start_warmup, warmup_state
+from shared.logger_config import logger
+
+_load_lock = threading.Lock()
+_loaded = False
+
+
+def _load_artifacts(base, metadata):
+    """
+    Load one model's artifacts, preferring its packaged bundle (native UBJSON
+    booster + memory-mapped arrays) and falling back to the joblib pickle.
+
+    Returns the artifacts dict and the path it was loaded from.
+    """
+    bundle = metadata.get("bundle")
+    if settings.use_artifact_bundles and bundle:
+        bundle_dir = os.path.join(base, settings.model_dir, bundle)
+        if os.path.exists(os.path.join(bundle_dir, MANIFEST_NAME)):
+            return load_bundle(bundle_dir, mmap=True, verify=settings.verify_bundle_checksums), bundle_dir
+        logger.warning("Bundle %s not found, falling back to %s", bundle_dir, metadata["filename"])
+
+    # joblib (and the pandas/sklearn/xgboost classes inside the pickles) is
+    # only imported by the process roles that actually serve predictions.
+    import joblib
+
+    path = os.path.join(base, settings.model_dir, metadata["filename"])
+    return joblib.load(path), path
+
+
+def _select_dtype(name, artifacts):
+    """
+    Pick the inference dtype for a model. float32 is only enabled if it
+    passes the precision check against float64 on the reference set.
+    """
+    if settings.inference_dtype != "float32":
+        return "float64"
+
+    report = validate_float32(artifacts, settings.float32_tolerance, settings.float32_validation_rows)
+    artifacts["float32_validation"] = report
+    if not report["passed"]:
+        logger.warning(
+            "float32 disabled for %s: max abs error %.3g exceeds tolerance %.3g",
+            name, report["max_abs_error"], report["tolerance"],
+        )
+        return "float64"
+    logger.info("float32 enabled for %s (max abs error %.3g)", name, report["max_abs_error"])
+    return "float32"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
-logger = logging.getLogger(__name__)
 
 def load_models():
+    """
+    Load every model in `models.MODELS` into the registry, then start the
+    warm-up run (in the background; see `shared.warmup`).
+    """
     import pathlib
     base = pathlib.Path(__file__).parent.parent
+
+    # Several registry entries can share one artifact file; load it once
+    # and give each entry its own dict around the shared objects.
+    loaded = {}
     for name, metadata in MODELS.items():
         try: 
-            fn = metadata["filename"]
-            path = os.path.join(base, settings.model_dir, fn)
-            artifacts = joblib.load(path)
+            key = (metadata.get("bundle"), metadata["filename"])
+            if key not in loaded:
+                loaded[key] = _load_artifacts(base, metadata)
+            raw, source = loaded[key]
+            logger.info("Loaded model %s from %s", name, source)
+            artifacts = dict(raw)
             artifacts["metadata"] = metadata
+            artifacts["dtype"] = _select_dtype(name, artifacts)
             MODEL_REGISTRY[name] = artifacts
         except Exception as e:
-            logger.error(f"Failed to load model {name}: {e}")
-    logger.info(f"Models loaded into registry {list(MODEL_REGISTRY.keys())}")
\ No newline at end of file
+            logger.error("Failed to load model %s: %s", name, e)
+    logger.info("Models loaded into registry %s", list(MODEL_REGISTRY))
+    for name, metadata in MODELS.items():
+        shadow = metadata.get("shadow")
+        if shadow and shadow not in MODEL_REGISTRY:
+            logger.warning("Shadow model %s for %s is not loaded; its shadow scoring will fail", shadow, name)
+    start_warmup(background=True)
+
+
+def ensure_models_loaded() -> bool:
+    """
+    Load models into the registry exactly once per process.
+
+    Safe to call from every entry point (API lifespan, worker process init,
+    task bodies); only the first call does any work.
+
+    Returns:
+    --------
+    bool
+        True if this call loaded the models, False if they were already loaded.
+    """
+    global _loaded
+    if _loaded:
+        return False
+    with _load_lock:
+        if _loaded:
+            return False
+        load_models()
+        _loaded = True
+        return True
+
+
+def unload_models() -> None:
+    """
+    Clear the registry so a later `ensure_models_loaded` reloads from disk.
+    """
+    global _loaded
+    with _load_lock:
+        MODEL_REGISTRY.clear()
+        warmup_state.reset()
+        _loaded = False
@@ -1,8 +1,177 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s"
-)
-logger = logging.getLogger(__name__)
+from settings import settings
+
+# Path of the HTTP request being served, set by the API's logging middleware;
+# None in workers and background threads.
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+# LogRecord attributes that are not user-supplied `extra=` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "route"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, the route
+    being served and any `extra=` fields passed to the log call.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        route = getattr(record, "route", None)
+        if route:
+            entry["route"] = route
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RouteSampler(logging.Filter):
+    """
+    Keep a fraction of INFO-and-below records per route.
+
+    Runs in the calling thread before the record is queued, so a record
+    that is sampled out is never formatted or written. Warnings and errors
+    are always kept. Rates are matched by longest route prefix.
+    """
+
+    def __init__(self, rates: Dict[str, float], default_rate: float = 1.0):
+        super().__init__()
+        # Longest prefix first so "/v2/predict" wins over "/v2"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self.default_rate = default_rate
+        self.kept = 0
+        self.sampled_out = 0
+
+    def rate_for(self, route: Optional[str]) -> float:
+        if route:
+            for prefix, rate in self.rates:
+                if route.startswith(prefix):
+                    return rate
+        return self.default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        route = current_route.get()
+        record.route = route
+        if record.levelno < logging.WARNING:
+            rate = self.rate_for(route)
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return False
+        self.kept += 1
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock `prepare()` formats the record in the caller (so it can be
+    pickled for a multiprocessing queue); this queue is in-process, so the
+    record is passed through as is and `%`-arguments are only interpolated
+    by the background writer. Callers must not mutate objects they pass as
+    log arguments.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DeferredQueueHandler] = None
+_sampler: Optional[RouteSampler] = None
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a queue drained by a background writer thread.
+
+    Idempotent; called by the entry points (the API in `main`, Celery
+    workers from the `setup_logging` signal) rather than at import time, so
+    importing this module leaves the root logger of tests and tools alone.
+    """
+    global _listener, _queue_handler, _sampler
+    with _lock:
+        if _listener is not None:
+            return
+
+        if settings.log_format == "json":
+            formatter: logging.Formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(formatter)
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _sampler = RouteSampler(settings.log_sample_rates, settings.log_sample_rate)
+        _queue_handler = DeferredQueueHandler(log_queue)
+        _queue_handler.addFilter(_sampler)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(settings.log_level.upper())
+
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _restart_after_fork() -> None:
+    # Threads do not survive fork: give forked children (Celery prefork
+    # workers, backtest process pools) a fresh queue and writer thread.
+    global _listener, _lock
+    _lock = threading.Lock()
+    if _listener is None or _queue_handler is None:
+        return
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the writer thread.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "format": settings.log_format,
+        "level": settings.log_level.upper(),
+        "sample_rate": settings.log_sample_rate,
+        "sample_rates": settings.log_sample_rates,
+        "kept": _sampler.kept if _sampler else 0,
+        "sampled_out": _sampler.sampled_out if _sampler else 0,
+        "queue_depth": _queue_handler.queue.qsize() if _queue_handler else 0,
+    }
+
+
+logger = logging.getLogger("app")
@@ -0,0 +1,63 @@
+import json
+import os
+from typing import Any, Dict, List
+
+from settings import settings
+
+
+def reference_rows(artifacts: Dict[str, Any], n_synthetic: int, seed: int = 0) -> List[Dict[str, float]]:
+    """
+    Reference set for precision checks and warm-up: the recorded sample payload
+    (if present) plus `n_synthetic` rows drawn uniformly between each feature's
+    winsorization bounds, so every clip and split region gets exercised.
+    """
+    import numpy as np
+
+    feature_names = artifacts["feature_names"]
+    rows: List[Dict[str, float]] = []
+
+    path = settings.reference_payload_path
+    if path and not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.dirname(__file__)), path)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            payload = json.load(f)
+        rows.extend(payload if isinstance(payload, list) else [payload])
+
+    lower = np.asarray(artifacts["lower_bounds"][feature_names], dtype="float64")
+    upper = np.asarray(artifacts["upper_bounds"][feature_names], dtype="float64")
+    # Widen the range a little so values outside the bounds (clipped) are covered too
+    span = upper - lower
+    rng = np.random.default_rng(seed)
+    synthetic = rng.uniform(lower - 0.1 * span, upper + 0.1 * span, size=(n_synthetic, len(feature_names)))
+    rows.extend(dict(zip(feature_names, values)) for values in synthetic.tolist())
+    return rows
+
+
+def validate_float32(artifacts: Dict[str, Any], tolerance: float, n_synthetic: int) -> Dict[str, Any]:
+    """
+    Compare float32 against float64 predictions on the reference set.
+
+    Returns:
+    --------
+    dict
+        `max_abs_error`, `mean_abs_error`, `rows`, `tolerance` and `passed`
+        (True if the max absolute error is within `tolerance`).
+    """
+    import numpy as np
+    from shared.utils import preprocess_input
+
+    rows = reference_rows(artifacts, n_synthetic)
+    model = artifacts["model"]
+    preds64 = model.predict(preprocess_input(rows, artifacts, dtype="float64")).astype("float64")
+    preds32 = model.predict(preprocess_input(rows, artifacts, dtype="float32")).astype("float64")
+
+    errors = np.abs(preds64 - preds32)
+    max_abs_error = float(errors.max()) if len(errors) else 0.0
+    return {
+        "rows": len(rows),
+        "max_abs_error": max_abs_error,
+        "mean_abs_error": float(errors.mean()) if len(errors) else 0.0,
+        "tolerance": tolerance,
+        "passed": max_abs_error <= tolerance,
+    }
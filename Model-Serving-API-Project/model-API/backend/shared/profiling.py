@@ -0,0 +1,228 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from settings import settings
+from shared.logger_config import logger
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_SCOPE = "admin:profile"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{12}$")
+
+_FOLDED = ".folded"
+_META = ".json"
+
+
+class StackProfiler:
+    """
+    Deterministic profiler for the calling thread that keeps full call
+    stacks, emitting collapsed-stack ("folded") lines for flamegraph tools:
+
+        predict;model_predict.<locals>.compute (predict.py:98);preprocess_input (utils.py:90) 412
+
+    Weights are self time in microseconds. It uses the same `sys.setprofile`
+    hook as cProfile, but attributes time to the whole stack rather than to
+    caller/callee pairs, and C calls (numpy, xgboost) get their own frames.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.stacks: Counter = Counter()
+        self._stack: Tuple[str, ...] = (root,)
+        self._last = 0
+        self._names: Dict[Any, str] = {}
+
+    def _code_name(self, code) -> str:
+        name = self._names.get(code)
+        if name is None:
+            qualname = getattr(code, "co_qualname", code.co_name)
+            name = f"{qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._names[code] = name
+        return name
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        self.stacks[self._stack] += now - self._last
+
+        if event == "call":
+            self._stack += (self._code_name(frame.f_code),)
+        elif event == "c_call":
+            self._stack += (f"{getattr(arg, '__qualname__', repr(arg))} (builtin)",)
+        elif len(self._stack) > 1:
+            # return / c_return / c_exception; frames that were already
+            # running when profiling started return past the root
+            self._stack = self._stack[:-1]
+
+        self._last = time.perf_counter_ns()
+
+    def start(self) -> None:
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._callback)
+
+    def stop(self) -> None:
+        sys.setprofile(None)
+        self.stacks[self._stack] += time.perf_counter_ns() - self._last
+
+    def collapsed(self) -> str:
+        lines = []
+        for stack, ns in self.stacks.items():
+            us = ns // 1000
+            if us:
+                lines.append(f"{';'.join(stack)} {us}")
+        return "\n".join(sorted(lines)) + "\n"
+
+
+class ProfileStore:
+    """
+    Bounded on-disk store of collapsed-stack profiles.
+
+    Each profile is `<id>.folded` plus `<id>.json` metadata. When the store
+    holds more than `max_profiles` profiles or `max_bytes` bytes, the oldest
+    are deleted.
+    """
+
+    def __init__(self, directory: str, max_profiles: int, max_bytes: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str, suffix: str) -> str:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            raise ValueError(f"Invalid profile id '{profile_id}'")
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def save(self, folded: str, meta: Dict[str, Any]) -> str:
+        now = datetime.now(timezone.utc)
+        profile_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:12]}"
+        data = folded.encode("utf-8")
+        meta = {
+            "profile_id": profile_id,
+            "created_at": now.isoformat(),
+            "bytes": len(data),
+            **meta,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Write the stacks before the metadata: listed profiles are complete
+        for suffix, payload in ((_FOLDED, data), (_META, json.dumps(meta).encode("utf-8"))):
+            path = self._path(profile_id, suffix)
+            with open(path + ".tmp", "wb") as f:
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+
+        self._evict()
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        for name in names:
+            if not name.endswith(_META):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # evicted or half-written by another process
+        return sorted(entries, key=lambda e: e["profile_id"], reverse=True)
+
+    def path(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, _FOLDED)
+        return path if os.path.exists(path) else None
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = self.list()
+            total = sum(e.get("bytes", 0) for e in entries)
+            while entries and (len(entries) > self.max_profiles or total > self.max_bytes):
+                oldest = entries.pop()
+                total -= oldest.get("bytes", 0)
+                for suffix in (_META, _FOLDED):
+                    try:
+                        os.remove(self._path(oldest["profile_id"], suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.list()
+        return {
+            "directory": self.directory,
+            "profiles": len(entries),
+            "bytes": sum(e.get("bytes", 0) for e in entries),
+            "max_profiles": self.max_profiles,
+            "max_bytes": self.max_bytes,
+            "sample_rate": settings.profile_sample_rate,
+        }
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        directory = settings.profile_dir
+        if not os.path.isabs(directory):
+            directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), directory)
+        _store = ProfileStore(directory, settings.profile_max_count, settings.profile_max_bytes)
+    return _store
+
+
+def profile_requested(header: Optional[str], user: Dict[str, Any]) -> bool:
+    """
+    Decide whether to profile a request.
+
+    An `X-Profile: 1` header profiles the request if the caller has the
+    `admin:profile` scope (403 otherwise); without the header, requests are
+    profiled at `profile_sample_rate` (0 by default, i.e. never).
+    """
+    if header and header.lower() not in ("0", "false", "no"):
+        if PROFILE_SCOPE not in user.get("scope", "").split():
+            raise HTTPException(status_code=403, detail=f"Missing required scope: {PROFILE_SCOPE}")
+        return True
+    return profile_sampled()
+
+
+def profile_sampled() -> bool:
+    rate = settings.profile_sample_rate
+    return rate > 0 and random.random() < rate
+
+
+@contextmanager
+def capture(kind: str, **meta):
+    """
+    Profile the enclosed block on the current thread and save it to the
+    profile store. Yields a dict that holds `profile_id` once the block
+    exits; a profile that cannot be saved is logged, never raised.
+
+    Only enter this when profiling was requested (see `profile_requested`);
+    callers skip it entirely otherwise, so unprofiled requests pay nothing.
+    """
+    info: Dict[str, Any] = {}
+    profiler = StackProfiler(root=kind)
+    start = time.perf_counter()
+    profiler.start()
+    try:
+        yield info
+    finally:
+        profiler.stop()
+        meta.update(kind=kind, duration_ms=round((time.perf_counter() - start) * 1000, 3))
+        try:
+            info["profile_id"] = get_profile_store().save(profiler.collapsed(), meta)
+        except Exception:
+            logger.warning("Could not save %s profile", kind, exc_info=True)
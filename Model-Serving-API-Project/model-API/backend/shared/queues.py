@@ -0,0 +1,166 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from settings import settings
+from shared.result_store import get_result_store
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+CONTROL = "control"
+QUEUES = (INTERACTIVE, BULK, CONTROL)
+
+# Callers can ask for their jobs to be treated as bulk work; they cannot
+# promote a large job to the interactive queue
+PRIORITY_HEADER = "X-Priority"
+PRIORITIES = (INTERACTIVE, BULK)
+
+# Message header carrying the enqueue time (epoch seconds)
+ENQUEUED_AT = "enqueued_at"
+
+
+def parse_priority(header: Optional[str]) -> str:
+    if header is None:
+        return INTERACTIVE
+    priority = header.strip().lower()
+    if priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{PRIORITY_HEADER} must be one of: {', '.join(PRIORITIES)}",
+        )
+    return priority
+
+
+def queue_for(rows: int, priority: str = INTERACTIVE) -> str:
+    """
+    Queue for a job of `rows` rows: interactive if it is small enough and
+    the caller did not ask for bulk, otherwise bulk.
+    """
+    if priority == BULK or rows > settings.interactive_max_rows:
+        return BULK
+    return INTERACTIVE
+
+
+def plan_chunks(rows: int, chunk_rows: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    (start, stop) row ranges splitting a job into chunk tasks of at most
+    `chunk_rows` rows, sized evenly so the last chunk is not a straggler.
+    """
+    chunk_rows = max(chunk_rows or settings.job_chunk_rows, 1)
+    n_chunks = max(-(-rows // chunk_rows), 1)
+    base, extra = divmod(rows, n_chunks)
+    bounds, start = [], 0
+    for i in range(n_chunks):
+        stop = start + base + (1 if i < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+class QueueRouter:
+    """
+    Sends tasks to their queue with an enqueue timestamp header and counts
+    tasks and rows per queue for this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {queue: {"tasks": 0, "rows": 0, "chunked_jobs": 0} for queue in QUEUES}
+
+    def send(
+        self,
+        name: str,
+        queue: str,
+        args: Optional[list] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        rows: int = 0,
+        task_id: Optional[str] = None,
+    ):
+        import shared
+
+        result = shared.celery_app.send_task(
+            name,
+            args=args,
+            kwargs=kwargs,
+            queue=queue,
+            task_id=task_id,
+            headers={ENQUEUED_AT: time.time()},
+        )
+        with self._lock:
+            self._counts[queue]["tasks"] += 1
+            self._counts[queue]["rows"] += rows
+        return result
+
+    def record_chunked(self, queue: str) -> None:
+        with self._lock:
+            self._counts[queue]["chunked_jobs"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {queue: dict(counts) for queue, counts in self._counts.items()}
+
+
+queue_router = QueueRouter()
+
+
+class QueueWaitStats:
+    """
+    Enqueue-to-start wait of recent tasks per queue.
+
+    Workers push one sample per task into a capped list in the result
+    store's backend (Redis), so the samples of every worker process are
+    visible to the API. Waits are measured against the API host's clock.
+    """
+
+    def __init__(self, max_samples: int, prefix: str = "queue_wait:"):
+        self.max_samples = max_samples
+        self.prefix = prefix
+
+    def record(self, queue: str, wait_ms: float) -> None:
+        get_result_store().backend.push(
+            f"{self.prefix}{queue}", f"{wait_ms:.3f}".encode(), self.max_samples, ttl=settings.result_ttl_seconds
+        )
+
+    def record_request(self, request) -> Optional[float]:
+        """
+        Record the wait of a task from its Celery request (the enqueue
+        header and the queue it was delivered from). Returns the wait in ms,
+        or None for tasks sent without the header.
+        """
+        enqueued_at = getattr(request, ENQUEUED_AT, None)
+        queue = (getattr(request, "delivery_info", None) or {}).get("routing_key")
+        if enqueued_at is None or queue not in QUEUES:
+            return None
+        wait_ms = max((time.time() - float(enqueued_at)) * 1000, 0.0)
+        self.record(queue, wait_ms)
+        return round(wait_ms, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        import numpy as np
+
+        backend = get_result_store().backend
+        report = {}
+        for queue in QUEUES:
+            try:
+                samples = np.array([float(v) for v in backend.range(f"{self.prefix}{queue}")])
+            except Exception as e:
+                report[queue] = {"error": str(e)}
+                continue
+            if not len(samples):
+                report[queue] = {"samples": 0}
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            report[queue] = {
+                "samples": len(samples),
+                "mean_ms": round(float(samples.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(samples.max()), 3),
+            }
+        return report
+
+
+queue_wait = QueueWaitStats(settings.queue_wait_samples)
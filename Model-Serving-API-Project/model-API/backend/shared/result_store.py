@@ -0,0 +1,489 @@
+import json
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from settings import settings
+from shared.logger_config import logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# -------------------------------------------------------------
+# Binary encoding for prediction arrays.
+#
+# Layout: 10-byte header followed by the (optionally zlib-compressed)
+# little-endian float payload.
+#   magic (2s) | version (B) | typecode (c) | flags (B) | pad (x) | count (I)
+# -------------------------------------------------------------
+
+_MAGIC = b"PR"
+_VERSION = 1
+_FLAG_ZLIB = 0x01
+_HEADER = struct.Struct("<2sBcBxI")
+
+# Python array typecodes for the float widths we support
+_TYPECODES = {"float32": "f", "float64": "d"}
+
+
+def encode_predictions(
+    values: Iterable[float],
+    dtype: str = "float64",
+    compress: bool = False,
+    level: int = 6,
+) -> bytes:
+    """
+    Pack a sequence of floats into a compact binary blob.
+
+    Parameters:
+    -----------
+    values : Iterable[float]
+        Prediction values (list, numpy array, ...).
+
+    dtype : str
+        "float64" (default) or "float32".
+
+    compress : bool
+        Whether to zlib-compress the packed payload.
+
+    level : int
+        zlib compression level (1-9).
+
+    Returns:
+    --------
+    bytes
+        Header + packed payload, suitable for storing in Redis.
+    """
+    typecode = _TYPECODES.get(dtype)
+    if typecode is None:
+        raise ValueError(f"Unsupported dtype '{dtype}'")
+
+    if hasattr(values, "__array__"):
+        # numpy arrays are packed in one buffer copy, not element by element
+        import numpy as np
+
+        packed = np.ascontiguousarray(np.ravel(values), dtype=np.dtype(dtype).newbyteorder("<"))
+    else:
+        packed = array(typecode, values)
+        if sys.byteorder == "big":
+            packed.byteswap()
+    payload = packed.tobytes()
+
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, level)
+        flags |= _FLAG_ZLIB
+
+    header = _HEADER.pack(_MAGIC, _VERSION, typecode.encode(), flags, len(packed))
+    return header + payload
+
+
+def _unpack(blob: bytes) -> Tuple[str, int, bytes]:
+    if len(blob) < _HEADER.size:
+        raise ValueError("Result blob is truncated")
+
+    magic, version, typecode, flags, count = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Unrecognized result blob format")
+
+    payload = blob[_HEADER.size:]
+    if flags & _FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return typecode.decode(), count, payload
+
+
+def decode_array(blob: bytes) -> "np.ndarray":
+    """
+    Unpack a blob produced by `encode_predictions` into a read-only numpy
+    array in its stored dtype, straight from the payload buffer.
+
+    Raises:
+    -------
+    ValueError
+        If the blob is truncated or was not produced by this encoder.
+    """
+    import numpy as np
+
+    typecode, count, payload = _unpack(blob)
+    dtype = np.dtype("<f4" if typecode == "f" else "<f8")
+    if len(payload) != count * dtype.itemsize:
+        raise ValueError("Result blob length does not match its header")
+    return np.frombuffer(payload, dtype=dtype)
+
+
+def decode_predictions(blob: bytes) -> list[float]:
+    """
+    Unpack a blob produced by `encode_predictions` back into a list of floats.
+
+    Raises:
+    -------
+    ValueError
+        If the blob is truncated or was not produced by this encoder.
+    """
+    typecode, count, payload = _unpack(blob)
+    packed = array(typecode)
+    packed.frombytes(payload)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    if len(packed) != count:
+        raise ValueError("Result blob length does not match its header")
+    return packed.tolist()
+
+
+# -------------------------------------------------------------
+# Storage backends
+# -------------------------------------------------------------
+
+# (counter hash key, field deltas) applied in the same round trip as a command
+CounterUpdate = Tuple[str, Dict[str, int]]
+
+
+class InMemoryBackend:
+    """
+    Local stand-in for Redis with per-key expiry.
+
+    Only shared between the API and the worker when both run in the same
+    process (tests, eager Celery), so it is meant for development.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lists: Dict[str, Deque[bytes]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None, stats: Optional[CounterUpdate] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._bump(stats)
+
+    def get(self, key: str, stats: Optional[CounterUpdate] = None) -> Optional[bytes]:
+        with self._lock:
+            self._bump(stats)
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set_if_absent(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (item[1] is None or item[1] > time.monotonic()):
+                return False
+            self._data[key] = (value, expires_at)
+            return True
+
+    def delete(self, key: str, stats: Optional[CounterUpdate] = None) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._lists.pop(key, None)
+            self._bump(stats)
+
+    def push(self, key: str, value: bytes, max_len: int, ttl: Optional[int] = None) -> None:
+        with self._lock:
+            items = self._lists.setdefault(key, deque(maxlen=max_len))
+            items.appendleft(value)
+
+    def range(self, key: str) -> List[bytes]:
+        with self._lock:
+            return list(self._lists.get(key, ()))
+
+    def incr(self, key: str, deltas: Dict[str, int]) -> None:
+        with self._lock:
+            self._bump((key, deltas))
+
+    def _bump(self, stats: Optional[CounterUpdate]) -> None:
+        # Caller holds the lock
+        if stats is None:
+            return
+        key, deltas = stats
+        counters = self._counters.setdefault(key, {})
+        for name, delta in deltas.items():
+            counters[name] = counters.get(name, 0) + delta
+
+    def counters(self, key: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters.get(key, {}))
+
+
+class RedisBackend:
+    """
+    Thin wrapper around a Redis client; values are written with SET EX so
+    every key carries the configured TTL.
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None, stats: Optional[CounterUpdate] = None) -> None:
+        if stats is None:
+            self._client.set(key, value, ex=ttl or None)
+            return
+        pipe = self._client.pipeline(transaction=False)
+        pipe.set(key, value, ex=ttl or None)
+        self._execute(pipe, stats)
+
+    def set_if_absent(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        return bool(self._client.set(key, value, ex=ttl or None, nx=True))
+
+    def get(self, key: str, stats: Optional[CounterUpdate] = None) -> Optional[bytes]:
+        if stats is None:
+            return self._client.get(key)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.get(key)
+        return self._execute(pipe, stats)
+
+    def delete(self, key: str, stats: Optional[CounterUpdate] = None) -> None:
+        if stats is None:
+            self._client.delete(key)
+            return
+        pipe = self._client.pipeline(transaction=False)
+        pipe.delete(key)
+        self._execute(pipe, stats)
+
+    def push(self, key: str, value: bytes, max_len: int, ttl: Optional[int] = None) -> None:
+        # Newest first, capped at max_len, in one round trip
+        pipe = self._client.pipeline(transaction=False)
+        pipe.lpush(key, value)
+        pipe.ltrim(key, 0, max_len - 1)
+        if ttl:
+            pipe.expire(key, ttl)
+        pipe.execute()
+
+    def range(self, key: str) -> List[bytes]:
+        return self._client.lrange(key, 0, -1)
+
+    def incr(self, key: str, deltas: Dict[str, int]) -> None:
+        # One hash of counters, every field bumped in one round trip
+        pipe = self._client.pipeline(transaction=False)
+        for name, delta in deltas.items():
+            pipe.hincrby(key, name, delta)
+        pipe.execute()
+
+    def counters(self, key: str) -> Dict[str, int]:
+        return {name.decode(): int(value) for name, value in self._client.hgetall(key).items()}
+
+    @staticmethod
+    def _execute(pipe, stats: CounterUpdate):
+        # Queue the counter bumps behind the command so both travel in one
+        # round trip; a failed bump is logged, a failed command is raised
+        key, deltas = stats
+        for name, delta in deltas.items():
+            pipe.hincrby(key, name, delta)
+        result, *bumps = pipe.execute(raise_on_error=False)
+        if isinstance(result, Exception):
+            raise result
+        if any(isinstance(bump, Exception) for bump in bumps):
+            logger.warning("Could not update result store counters in '%s'", key)
+        return result
+
+
+_REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def create_backend(url: str):
+    """
+    Build a storage backend from a URL.
+
+    `memory://` selects the in-process stand-in; `redis://`, `rediss://`
+    and `unix://` URLs select Redis (e.g. `redis://redis:6379/2` for a
+    dedicated database).
+
+    Raises:
+    -------
+    ValueError
+        For any other scheme.
+    """
+    if url.startswith("memory://"):
+        return InMemoryBackend()
+    if url.startswith(_REDIS_SCHEMES):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported result store URL '{url}'; use a Redis URL or memory://")
+
+
+# -------------------------------------------------------------
+# Result store
+# -------------------------------------------------------------
+
+_COUNTERS = ("writes", "reads", "misses", "bytes_written", "rows_written", "round_trips")
+
+
+class ResultStore:
+    """
+    Stores prediction arrays for async jobs as packed binary floats.
+
+    Celery only carries a small metadata dict for each job; the predictions
+    themselves live under `<prefix><job_id>` with an explicit TTL. The store
+    keeps running counters so result-backend bytes per row and Redis round
+    trips per job can be reported; they are kept in a hash in the backend
+    (`<prefix>stats`), so writes made by the workers show up in the API's
+    metrics.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl: int,
+        compress: bool = True,
+        level: int = 6,
+        prefix: str = "result:",
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.compress = compress
+        self.level = level
+        self.prefix = prefix
+        self.stats_key = f"{prefix}stats"
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}"
+
+    def _stats(self, **deltas: int) -> CounterUpdate:
+        # Counter bumps ride in the same round trip as the command they
+        # describe, so every call here counts exactly one round trip
+        return self.stats_key, {"round_trips": 1, **deltas}
+
+    def _record(self, **deltas: int) -> None:
+        # Counters are best effort: a failed update must not fail the job
+        try:
+            self.backend.incr(self.stats_key, deltas)
+        except Exception:
+            logger.warning("Could not update result store counters", exc_info=True)
+
+    def put(self, job_id: str, predictions: Iterable[float], dtype: str = "float64") -> Dict[str, Any]:
+        """
+        Store predictions for a job and return storage info for the job result.
+
+        Returns:
+        --------
+        dict
+            `result_key`, `result_bytes`, `bytes_per_row`, `round_trips`.
+        """
+        blob = encode_predictions(predictions, dtype=dtype, compress=self.compress, level=self.level)
+        rows = _HEADER.unpack_from(blob)[4]
+
+        self.backend.set(
+            self._key(job_id),
+            blob,
+            ttl=self.ttl,
+            stats=self._stats(writes=1, bytes_written=len(blob), rows_written=rows),
+        )
+
+        return {
+            "result_key": self._key(job_id),
+            "result_bytes": len(blob),
+            "bytes_per_row": round(len(blob) / rows, 3) if rows else 0.0,
+            "round_trips": 1,
+        }
+
+    def get(self, job_id: str) -> Optional[list[float]]:
+        """
+        Fetch predictions for a job, or None if missing/expired.
+        """
+        blob = self.backend.get(self._key(job_id), stats=self._stats(reads=1))
+        if blob is None:
+            # Only known once the read is back, so it costs its own trip
+            self._record(misses=1, round_trips=1)
+            return None
+        return decode_predictions(blob)
+
+    def get_array(self, job_id: str) -> Optional["np.ndarray"]:
+        """
+        Like `get`, but returns the stored values as a numpy array in their
+        stored dtype without going through a Python list (large matrices).
+        """
+        blob = self.backend.get(self._key(job_id), stats=self._stats(reads=1))
+        if blob is None:
+            # Only known once the read is back, so it costs its own trip
+            self._record(misses=1, round_trips=1)
+            return None
+        return decode_array(blob)
+
+    def delete(self, job_id: str) -> None:
+        self.backend.delete(self._key(job_id), stats=self._stats())
+
+    def put_manifest(self, job_id: str, manifest: Dict[str, Any]) -> None:
+        """
+        Store the manifest of a job that was split into chunk tasks (chunk
+        ids, rows per chunk); it expires with the predictions.
+        """
+        self.backend.set(
+            f"{self.prefix}manifest:{job_id}", json.dumps(manifest).encode(), ttl=self.ttl, stats=self._stats()
+        )
+
+    def get_manifest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        blob = self.backend.get(f"{self.prefix}manifest:{job_id}", stats=self._stats())
+        return json.loads(blob) if blob is not None else None
+
+    def delete_manifest(self, job_id: str) -> None:
+        self.backend.delete(f"{self.prefix}manifest:{job_id}", stats=self._stats())
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the store counters (summed over every process using the
+        backend) plus derived per-row / per-job figures.
+        """
+        snapshot = dict.fromkeys(_COUNTERS, 0)
+        try:
+            snapshot.update(self.backend.counters(self.stats_key))
+        except Exception as e:
+            return {"error": str(e)}
+        rows = snapshot["rows_written"]
+        jobs = snapshot["writes"]
+        snapshot["bytes_per_row"] = round(snapshot["bytes_written"] / rows, 3) if rows else 0.0
+        snapshot["round_trips_per_job"] = round(snapshot["round_trips"] / jobs, 3) if jobs else 0.0
+        snapshot["ttl_seconds"] = self.ttl
+        snapshot["compression"] = "zlib" if self.compress else None
+        return snapshot
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """
+    Return the process-wide result store, creating it on first use from settings.
+
+    Uses `result_store_url`; without it, falls back to the Celery result
+    backend only when that is a Redis URL.
+
+    Raises:
+    -------
+    RuntimeError
+        If `result_store_url` is unset and the Celery result backend is not
+        Redis (e.g. `rpc://` or `cache+memory://`).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                url = settings.result_store_url
+                if not url:
+                    if not settings.celery_result_backend.startswith(_REDIS_SCHEMES):
+                        raise RuntimeError(
+                            "RESULT_STORE_URL is not set and CELERY_RESULT_BACKEND "
+                            f"'{settings.celery_result_backend}' is not a Redis URL; "
+                            "set RESULT_STORE_URL (a Redis URL, or memory:// for development)"
+                        )
+                    url = settings.celery_result_backend
+                _store = ResultStore(
+                    create_backend(url),
+                    ttl=settings.result_ttl_seconds,
+                    compress=settings.result_compression,
+                    level=settings.result_compression_level,
+                )
+    return _store
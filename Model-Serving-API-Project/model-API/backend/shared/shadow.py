@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import math
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from settings import settings
+from shared.logger_config import logger
+from shared.state import MODEL_REGISTRY
+from shared.utils import preprocess_input, preprocess_matrix, preprocessing_fingerprint
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class DivergenceStats:
+    """
+    Online shadow-vs-primary comparison (Welford / co-moment updates), so
+    nothing per row is retained.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.mean_primary = 0.0
+        self.mean_shadow = 0.0
+        self.m2_primary = 0.0
+        self.m2_shadow = 0.0
+        self.co_moment = 0.0
+        self.mean_diff = 0.0
+        self.m2_diff = 0.0
+        self.sum_abs_diff = 0.0
+        self.max_abs_diff = 0.0
+        self.sign_agreements = 0
+
+    def update(self, primary: np.ndarray, shadow: np.ndarray) -> None:
+        """
+        Merge a batch into the running statistics (Chan et al. parallel update).
+        """
+        import numpy as np
+
+        primary = np.asarray(primary, dtype="float64")
+        shadow = np.asarray(shadow, dtype="float64")
+        n_b = len(primary)
+        if not n_b:
+            return
+        diff = shadow - primary
+
+        mean_p, mean_s, mean_d = primary.mean(), shadow.mean(), diff.mean()
+        dp, ds, dd = primary - mean_p, shadow - mean_s, diff - mean_d
+        m2_p, m2_s, m2_d, co = float(dp @ dp), float(ds @ ds), float(dd @ dd), float(dp @ ds)
+
+        n_a = self.rows
+        n = n_a + n_b
+        delta_p = mean_p - self.mean_primary
+        delta_s = mean_s - self.mean_shadow
+        delta_d = mean_d - self.mean_diff
+        weight = n_a * n_b / n
+
+        self.m2_primary += m2_p + delta_p * delta_p * weight
+        self.m2_shadow += m2_s + delta_s * delta_s * weight
+        self.co_moment += co + delta_p * delta_s * weight
+        self.m2_diff += m2_d + delta_d * delta_d * weight
+        self.mean_primary += delta_p * n_b / n
+        self.mean_shadow += delta_s * n_b / n
+        self.mean_diff += delta_d * n_b / n
+        self.rows = n
+
+        abs_diff = np.abs(diff)
+        self.sum_abs_diff += float(abs_diff.sum())
+        self.max_abs_diff = max(self.max_abs_diff, float(abs_diff.max()))
+        self.sign_agreements += int((np.sign(primary) == np.sign(shadow)).sum())
+
+    def report(self) -> Dict[str, Any]:
+        n = self.rows
+        if not n:
+            return {"rows": 0}
+        denom = math.sqrt(self.m2_primary * self.m2_shadow)
+        return {
+            "rows": n,
+            "mean_primary": self.mean_primary,
+            "mean_shadow": self.mean_shadow,
+            "mean_diff": self.mean_diff,
+            "std_diff": math.sqrt(self.m2_diff / (n - 1)) if n > 1 else 0.0,
+            "mean_abs_diff": self.sum_abs_diff / n,
+            "max_abs_diff": self.max_abs_diff,
+            "correlation": self.co_moment / denom if denom else None,
+            "sign_agreement": self.sign_agreements / n,
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores primary traffic with shadow models on a background thread.
+
+    `submit` is called on the request path after the primary prediction; it
+    only does a non-blocking put on a bounded queue and drops the work (and
+    counts it) when the queue is full. The worker thread drains up to
+    `batch_rows` rows per shadow model, predicts them in one call, and
+    folds the results into per-(primary, shadow) divergence statistics.
+    """
+
+    def __init__(self, max_queue: int, batch_rows: int):
+        self.batch_rows = batch_rows
+        self._queue: "queue.Queue[Tuple]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stats: Dict[Tuple[str, str], DivergenceStats] = {}
+        self._counters: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def _counter(self, pair: Tuple[str, str]) -> Dict[str, float]:
+        counters = self._counters.get(pair)
+        if counters is None:
+            counters = self._counters.setdefault(
+                pair, {"submitted": 0, "dropped": 0, "failed": 0, "batches": 0, "shadow_ms": 0.0}
+            )
+        return counters
+
+    def _ensure_thread(self) -> None:
+        # Started on first use (and again in forked children, which do not
+        # inherit threads), so processes without shadows never start one.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+                self._thread.start()
+
+    def submit(
+        self,
+        primary_id: str,
+        shadow_id: str,
+        X: np.ndarray,
+        primary_preds: np.ndarray,
+        raw_inputs: Union[List[Dict[str, Any]], np.ndarray],
+    ) -> bool:
+        """
+        Queue a scored batch for shadow evaluation without blocking.
+
+        `X` is the primary's preprocessed matrix; it is reused when the shadow
+        has the same preprocessing fingerprint, otherwise `raw_inputs` are
+        preprocessed with the shadow's artifacts on the background thread.
+        `raw_inputs` is either the request records or (for binary requests)
+        the raw matrix in the primary's `feature_names` order.
+
+        Returns:
+        --------
+        bool
+            False if the queue was full and the work was dropped.
+        """
+        self._ensure_thread()
+        pair = (primary_id, shadow_id)
+        try:
+            self._queue.put_nowait((pair, X, primary_preds, raw_inputs))
+        except queue.Full:
+            with self._lock:
+                self._counter(pair)["dropped"] += 1
+            return False
+        with self._lock:
+            self._counter(pair)["submitted"] += 1
+        return True
+
+    def _drain(self) -> List[Tuple]:
+        items = [self._queue.get()]
+        rows = len(items[0][1])
+        while rows < self.batch_rows:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[1])
+        return items
+
+    def _run(self) -> None:
+        while True:
+            items = self._drain()
+            by_pair: Dict[Tuple[str, str], List[Tuple]] = {}
+            for item in items:
+                by_pair.setdefault(item[0], []).append(item)
+            for pair, group in by_pair.items():
+                try:
+                    self._evaluate(pair, group)
+                except Exception:
+                    logger.warning("Shadow evaluation failed for %s -> %s", *pair, exc_info=True)
+                    with self._lock:
+                        self._counter(pair)["failed"] += len(group)
+
+    def _evaluate(self, pair: Tuple[str, str], group: List[Tuple]) -> None:
+        import numpy as np
+
+        primary_id, shadow_id = pair
+        primary = MODEL_REGISTRY.get(primary_id)
+        shadow = MODEL_REGISTRY.get(shadow_id)
+        if primary is None or shadow is None:
+            raise ValueError(f"Shadow pair {primary_id} -> {shadow_id} is not loaded")
+
+        start = time.perf_counter()
+        if preprocessing_fingerprint(primary) == preprocessing_fingerprint(shadow):
+            X = np.vstack([item[1] for item in group]).astype(shadow.get("dtype", "float64"), copy=False)
+        else:
+            X = np.vstack([self._preprocess_raw(primary, shadow, item[3]) for item in group])
+        shadow_preds = shadow["model"].predict(X)
+        primary_preds = np.concatenate([np.asarray(item[2]) for item in group])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._stats.setdefault(pair, DivergenceStats()).update(primary_preds, shadow_preds)
+            counters = self._counter(pair)
+            counters["batches"] += 1
+            counters["shadow_ms"] += elapsed_ms
+
+    @staticmethod
+    def _preprocess_raw(primary: Dict[str, Any], shadow: Dict[str, Any], raw_inputs) -> np.ndarray:
+        if isinstance(raw_inputs, list):
+            return preprocess_input(raw_inputs, shadow)
+        # Raw matrix in the primary's column order; select the shadow's columns
+        columns = {name: i for i, name in enumerate(primary["feature_names"])}
+        missing = [name for name in shadow["feature_names"] if name not in columns]
+        if missing:
+            raise ValueError(f"Shadow features not in the primary's inputs: {', '.join(missing)}")
+        order = [columns[name] for name in shadow["feature_names"]]
+        return preprocess_matrix(raw_inputs[:, order], shadow)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pairs = {}
+            for pair, counters in self._counters.items():
+                divergence = self._stats.get(pair)
+                pairs[f"{pair[0]}->{pair[1]}"] = {
+                    **{k: round(v, 3) if isinstance(v, float) else v for k, v in counters.items()},
+                    "divergence": divergence.report() if divergence else {"rows": 0},
+                }
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "batch_rows": self.batch_rows,
+                "pairs": pairs,
+            }
+
+
+shadow_evaluator = ShadowEvaluator(settings.shadow_queue_size, settings.shadow_batch_rows)
@@ -0,0 +1,53 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+# Modules that dominate cold-start time; the report lists which of them a
+# process role has actually imported.
+HEAVY_MODULES = ("celery", "pandas", "numpy", "sklearn", "xgboost", "joblib", "jose", "requests")
+
+
+class StartupProfile:
+    """
+    Records how long each startup phase of this process took.
+
+    `t0` is taken when this module is first imported, which is the first
+    thing `main` and `shared.worker` do, so `since_first_import_ms` covers
+    application imports plus every recorded phase.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.role: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.ready_ms: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def mark(self, name: str) -> None:
+        """
+        Record a milestone as milliseconds elapsed since `t0`.
+        """
+        self.phases[name] = round((time.perf_counter() - self.t0) * 1000, 3)
+
+    def mark_ready(self) -> None:
+        self.ready_ms = round((time.perf_counter() - self.t0) * 1000, 3)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "role": self.role,
+            "phases_ms": dict(self.phases),
+            "ready_ms": self.ready_ms,
+            "since_first_import_ms": round((time.perf_counter() - self.t0) * 1000, 3),
+            "heavy_modules_loaded": [m for m in HEAVY_MODULES if m in sys.modules],
+        }
+
+
+startup_profile = StartupProfile()
@@ -1,38 +1,164 @@
-import pandas as pd
+from __future__ import annotations
+
+import base64
+import hashlib
 from fastapi import HTTPException
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SUPPORTED_DTYPES = ("float32", "float64")
+
+
+def inputs_to_matrix(
+    raw_inputs: List[Dict[str, Any]],
+    feature_names: List[str],
+    dtype: str = "float64",
+) -> np.ndarray:
+    """
+    Build a (rows x features) matrix in `feature_names` order straight from
+    the parsed request records, without an intermediate DataFrame.
+
+    Raises:
+    -------
+    HTTPException
+        422 if any record is missing an expected feature.
+    """
+    # numpy is already loaded by the time models are; importing it here keeps
+    # it out of the import chain of `main` and `shared.worker`.
+    import numpy as np
+
+    try:
+        return np.array(
+            [[row[name] for name in feature_names] for row in raw_inputs],
+            dtype=dtype,
+        ).reshape(len(raw_inputs), len(feature_names))
+    except KeyError:
+        missing = set()
+        for row in raw_inputs:
+            missing.update(name for name in feature_names if name not in row)
+        raise HTTPException(
+            status_code=422,
+            detail=f"Missing features: {', '.join(sorted(missing))}"
+        )
+
+
+def _preprocessing_arrays(artifacts: Dict[str, Any], dtype: str) -> Dict[str, np.ndarray]:
+    """
+    Bounds and scaler statistics as flat arrays in `dtype`, computed once per
+    artifacts dict and dtype and cached on it.
+    """
+    import numpy as np
+
+    cache = artifacts.setdefault("_preprocessing", {})
+    arrays = cache.get(dtype)
+    if arrays is None:
+        feature_names = artifacts["feature_names"]
+        scaler = artifacts["scaler"]
+        n_features = len(feature_names)
+        center = getattr(scaler, "center_", None) if getattr(scaler, "with_centering", True) else None
+        scale = getattr(scaler, "scale_", None) if getattr(scaler, "with_scaling", True) else None
+        arrays = {
+            "lower": np.asarray(artifacts["lower_bounds"][feature_names], dtype=dtype),
+            "upper": np.asarray(artifacts["upper_bounds"][feature_names], dtype=dtype),
+            "center": np.zeros(n_features, dtype=dtype) if center is None else np.asarray(center, dtype=dtype),
+            "scale": np.ones(n_features, dtype=dtype) if scale is None else np.asarray(scale, dtype=dtype),
+        }
+        cache[dtype] = arrays
+    return arrays
+
+
+def preprocessing_fingerprint(artifacts: Dict[str, Any]) -> str:
+    """
+    Hash of everything `preprocess_matrix` depends on: feature order,
+    winsorization bounds and scaler statistics. Models with the same
+    fingerprint produce identical preprocessed matrices from the same input.
+    """
+    fingerprint = artifacts.get("_preprocessing_fingerprint")
+    if fingerprint is None:
+        arrays = _preprocessing_arrays(artifacts, "float64")
+        digest = hashlib.sha256("\x1f".join(artifacts["feature_names"]).encode("utf-8"))
+        for name in ("lower", "upper", "center", "scale"):
+            digest.update(arrays[name].tobytes())
+        fingerprint = digest.hexdigest()
+        artifacts["_preprocessing_fingerprint"] = fingerprint
+    return fingerprint
+
+
+def preprocess_matrix(
+    X: np.ndarray,
+    artifacts: Dict[str, Any],
+    dtype: str | None = None,
+    inplace: bool = False,
+) -> np.ndarray:
+    """
+    Winsorize and scale a raw feature matrix (columns in `feature_names` order).
+
+    Works in `dtype` (defaults to the model's inference dtype) end to end;
+    the input is copied once, then clipped and scaled in place. With
+    `inplace`, a matrix the caller owns that is already in `dtype` is
+    transformed without the copy.
+    """
+    import numpy as np
+
+    dtype = dtype or artifacts.get("dtype", "float64")
+    arrays = _preprocessing_arrays(artifacts, dtype)
+
+    if inplace and X.dtype == np.dtype(dtype) and X.flags.writeable:
+        out = X
+    else:
+        out = np.array(X, dtype=dtype, copy=True)
+    np.clip(out, arrays["lower"], arrays["upper"], out=out)
+    out -= arrays["center"]
+    out /= arrays["scale"]
+    return out
+
 
 def preprocess_input(
-    raw_inputs: List[Dict[str, Any]], 
-    artifacts: Dict[str, Any]
-) -> pd.DataFrame:
+    raw_inputs: List[Dict[str, Any]],
+    artifacts: Dict[str, Any],
+    dtype: str | None = None,
+) -> np.ndarray:
     """
     Given a list of dicts (one per record) and your artifacts dict,
-    returns a DataFrame ready for model.predict().
+    returns a feature matrix ready for model.predict().
 
     Steps:
-    1. Build DataFrame and ensure all expected features are present.
+    1. Build the matrix and ensure all expected features are present.
     2. Clip outliers by lower_bounds / upper_bounds.
-    3. Apply scaler.transform to normalize.
-    """
-    feature_names = artifacts["feature_names"]
-    
-    # 1. Load into DF and check for missing columns
-    df = pd.DataFrame(raw_inputs)
-    missing = set(feature_names) - set(df.columns)
-    if missing:
-        raise HTTPException(
-            status_code=422, 
-            detail=f"Missing features: {', '.join(sorted(missing))}"
-        )
+    3. Apply the scaler's (RobustScaler) centering and scaling.
 
-    # 2. Reorder & winsorize
-    df = df[feature_names]
-    lower = artifacts["lower_bounds"]
-    upper = artifacts["upper_bounds"]
-    df = df.clip(lower=lower, upper=upper, axis=1)
+    The matrix is built in `dtype`, defaulting to the model's inference
+    dtype (`artifacts["dtype"]`, float64 unless float32 mode is enabled).
+    """
+    dtype = dtype or artifacts.get("dtype", "float64")
+    X = inputs_to_matrix(raw_inputs, artifacts["feature_names"], dtype)
+    return preprocess_matrix(X, artifacts, dtype)
+
+
+def pack_matrix(X: np.ndarray) -> Dict[str, Any]:
+    """
+    Encode a 2-D float matrix as a compact JSON-safe dict for Celery payloads.
+    """
+    import numpy as np
+
+    X = np.ascontiguousarray(X, dtype=X.dtype.newbyteorder("<"))
+    return {
+        "dtype": str(X.dtype.newbyteorder("=")),
+        "shape": list(X.shape),
+        "data": base64.b64encode(X.tobytes()).decode("ascii"),
+    }
+
+
+def unpack_matrix(payload: Dict[str, Any]) -> np.ndarray:
+    """
+    Decode a matrix produced by `pack_matrix`.
+    """
+    import numpy as np
 
-    # 3. Scale
-    scaler = artifacts["scaler"]
-    scaled_array = scaler.transform(df)
-    return pd.DataFrame(scaled_array, columns=feature_names)
+    if payload["dtype"] not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported matrix dtype '{payload['dtype']}'")
+    dtype = np.dtype(payload["dtype"]).newbyteorder("<")
+    data = base64.b64decode(payload["data"])
+    return np.frombuffer(data, dtype=dtype).reshape(payload["shape"])
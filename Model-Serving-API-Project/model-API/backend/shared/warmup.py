@@ -0,0 +1,125 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from settings import settings
+from shared.logger_config import logger
+from shared.precision import reference_rows
+from shared.startup import startup_profile
+from shared.state import MODEL_REGISTRY
+from shared.utils import preprocess_input
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+DISABLED = "disabled"
+
+
+def warm_up_model(artifacts: Dict[str, Any], batch_sizes: List[int], repeats: int) -> Dict[str, Any]:
+    """
+    Run reference rows through the full preprocess + predict path at each
+    batch size, so the first DMatrix build, XGBoost/OpenMP thread pools and
+    per-dtype preprocessing caches are created before traffic arrives.
+
+    Returns:
+    --------
+    dict
+        Per batch size: `first_ms` (the cold call) and `warm_ms` (best of
+        the remaining `repeats - 1` calls); plus `total_ms`.
+    """
+    rows = reference_rows(artifacts, max(batch_sizes))
+    model = artifacts["model"]
+    results: Dict[str, Any] = {}
+    total_start = time.perf_counter()
+
+    for size in batch_sizes:
+        batch = (rows * (size // len(rows) + 1))[:size]
+        timings = []
+        for _ in range(max(repeats, 1)):
+            start = time.perf_counter()
+            model.predict(preprocess_input(batch, artifacts))
+            timings.append(round((time.perf_counter() - start) * 1000, 3))
+        results[str(size)] = {
+            "first_ms": timings[0],
+            "warm_ms": min(timings[1:]) if len(timings) > 1 else None,
+        }
+
+    return {"batch_sizes": results, "total_ms": round((time.perf_counter() - total_start) * 1000, 3)}
+
+
+class WarmupState:
+    """
+    Progress and per-model latencies of this process's warm-up run.
+    """
+
+    def __init__(self):
+        self.status = PENDING
+        self.models: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.status in (DONE, FAILED, DISABLED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.status = PENDING
+            self.models = {}
+            self.error = None
+            self._done.clear()
+
+    def _finish(self, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.status = status
+            self.error = error
+        self._done.set()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"status": self.status, "error": self.error, "models": dict(self.models)}
+
+
+warmup_state = WarmupState()
+
+
+def _run_warmup() -> None:
+    with warmup_state._lock:
+        warmup_state.status = RUNNING
+    try:
+        with startup_profile.phase("warmup"):
+            for name, artifacts in list(MODEL_REGISTRY.items()):
+                try:
+                    result = warm_up_model(artifacts, settings.warmup_batch_sizes, settings.warmup_repeats)
+                except Exception as e:
+                    # A model that cannot warm up will fail its real requests
+                    # too; record it and keep going with the others.
+                    logger.warning("Warm-up failed for %s: %s", name, e)
+                    result = {"error": str(e)}
+                with warmup_state._lock:
+                    warmup_state.models[name] = result
+        logger.info("Warm-up finished in %.1f ms", startup_profile.phases["warmup"])
+        warmup_state._finish(DONE)
+    except Exception as e:
+        logger.exception("Warm-up aborted")
+        warmup_state._finish(FAILED, str(e))
+
+
+def start_warmup(background: bool = True) -> None:
+    """
+    Warm up every loaded model, in a daemon thread by default so startup is
+    not blocked; readiness is gated on `warmup_state.ready` instead.
+    """
+    warmup_state.reset()
+    if not settings.warmup_enabled or not settings.warmup_batch_sizes:
+        warmup_state._finish(DISABLED)
+        return
+    if background:
+        threading.Thread(target=_run_warmup, name="model-warmup", daemon=True).start()
+    else:
+        _run_warmup()
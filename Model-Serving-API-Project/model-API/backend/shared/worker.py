@@ -1,12 +1,15 @@
 import time
-import os
+from shared.startup import startup_profile
 from celery import Celery
-import pandas as pd
-import joblib
+from celery.signals import setup_logging, task_prerun, worker_init, worker_process_init
+from kombu import Queue
 from shared.state import MODEL_REGISTRY
 from settings import settings  
-from shared.utils import preprocess_input
-from shared.load_models import load_models
+from shared.utils import preprocess_input, unpack_matrix
+from shared.load_models import ensure_models_loaded
+from shared.result_store import get_result_store
+from shared.queues import BULK, CONTROL, INTERACTIVE, QUEUES, queue_wait
+from shared.logger_config import logger
 
 # -------------------------------------------------------------
 # Initialize the Celery app using broker URL from settings
@@ -14,18 +17,70 @@ from shared.load_models import load_models
 
 celery_app = Celery(
     "model_tasks",
-    broker=settings.broker_url,      # Pulled from .env or env vars
-    backend=settings.broker_url      # Optional: same Redis for backend
+    broker=settings.broker_url,                 # Pulled from .env or env vars
+    backend=settings.celery_result_backend      # Can point at a separate Redis DB
 )
 
+# Task results only carry small metadata dicts (predictions go to the
+# result store), so keep them compressed and expire them with the same
+# window as the stored predictions.
+celery_app.conf.update(
+    result_expires=settings.result_ttl_seconds,
+    result_compression="zlib" if settings.result_compression else None,
+)
+
+# Interactive jobs, bulk jobs (large / chunked / backtests) and the
+# readiness ping each get their own queue, so a backfill cannot delay
+# either of the others. Run one worker per queue with its own concurrency
+# and prefetch (see docker-compose.yml); a worker started without -Q
+# consumes all three. The API passes the queue explicitly for inference
+# and explain jobs; these routes cover tasks sent by name alone.
+celery_app.conf.update(
+    task_queues=[Queue(name) for name in QUEUES],
+    task_default_queue=INTERACTIVE,
+    task_routes={"ping": {"queue": CONTROL}, "run_backtest": {"queue": BULK}},
+)
+
+
+@setup_logging.connect
+def _use_app_logging(**kwargs):
+    # Connecting this signal stops Celery from replacing the root handlers;
+    # worker logs go through the same queue + background writer as the API.
+    from shared.logger_config import configure_logging
+    configure_logging()
+
+
+@worker_init.connect
+def _mark_worker_role(**kwargs):
+    startup_profile.role = "worker"
 
 
 # -------------------------------------------------------------
 # Load models into memory for async use.
-# This ensures models are only loaded once when the worker starts,
-# instead of loading them every time a task is run.
+# Models are loaded once per worker process when the pool starts it,
+# not at import time, so the API can import this module (to enqueue
+# tasks) without loading models a second time. Pools that never fire
+# worker_process_init (solo, threads) load on the first task instead.
 # -------------------------------------------------------------
-load_models()
+
+@worker_process_init.connect
+def _load_models_in_worker_process(**kwargs):
+    # Control-only workers never predict; tasks still load lazily if needed
+    if settings.worker_load_models:
+        with startup_profile.phase("load_models"):
+            ensure_models_loaded()
+    startup_profile.mark_ready()
+
+
+@task_prerun.connect
+def _record_queue_wait(task=None, **kwargs):
+    # Runs in the pool process that executes the task; the sample goes to
+    # the shared store so the API can report waits across all workers
+    try:
+        task.request.queue_wait_ms = queue_wait.record_request(task.request)
+    except Exception:
+        logger.warning("Could not record queue wait for %s", task.name, exc_info=True)
+
 
 @celery_app.task(name="ping")
 def ping():
@@ -43,59 +98,195 @@ def ping():
     return "Ready!"
 
 
-@celery_app.task(name="run_async_inference")
-def run_async_inference(model_id: str, features: list[dict], user_id: str):
+@celery_app.task(name="run_async_inference", bind=True)
+def run_async_inference(self, model_id: str, features, user_id: str, profile: bool = False):
     """
     Run an asynchronous prediction task using a registered model.
 
-    This function is executed in the background via Celery. It transforms
-    input features into a DataFrame, runs the model prediction, and returns
-    the result in a structured format.
+    This function is executed in the background via Celery. It decodes the
+    preprocessed feature matrix, runs the model prediction, writes the
+    predictions to the result store as a packed float array (in the model's
+    inference dtype), and returns the job metadata in a structured format.
 
     Parameters:
     -----------
     model_id : str
         The ID of the model to use for prediction (must exist in MODEL_REGISTRY).
 
-    features : list[dict]
-        A list of input dictionaries, each representing one feature row.
+    features : dict | list[dict]
+        The preprocessed feature matrix packed by `shared.utils.pack_matrix`.
+        A list of raw input dictionaries is still accepted and preprocessed here.
 
     user_id : str
         ID of the user that submitted the job.
 
+    profile : bool
+        Profile decoding, inference and storage; the saved profile's id is
+        returned as `additional_info.profile_id`.
+
     Returns:
     --------
     dict
-        A structured result object containing predictions and metadata like runtime.
+        A structured result object with metadata like runtime and the result
+        store key; predictions are fetched from the result store on poll.
 
     Raises:
     -------
     ValueError
         If the specified model is not found in the registry.
     """
+    ensure_models_loaded()
     artifacts = MODEL_REGISTRY.get(model_id)
 
     if not artifacts:
         raise ValueError(f"Model '{model_id}' not found in registry")
     
-    df = preprocess_input(features, artifacts)
+    job_id = self.request.id
+    if profile:
+        from shared.profiling import capture
+
+        with capture("run_async_inference", model_id=model_id, job_id=job_id) as profile_info:
+            duration_ms, additional_info = _infer(job_id, artifacts, features)
+        if "profile_id" in profile_info:
+            additional_info["profile_id"] = profile_info["profile_id"]
+    else:
+        duration_ms, additional_info = _infer(job_id, artifacts, features)
+
+    queue_wait_ms = getattr(self.request, "queue_wait_ms", None)
+    if queue_wait_ms is not None:
+        additional_info["queue_wait_ms"] = queue_wait_ms
+
+    return {
+        "user_id": user_id,
+        "job_id": job_id,
+        "model_id": model_id,
+        "status": "SUCCESS",
+        "result": {
+            "duration_ms": duration_ms,
+            "additional_info": additional_info,
+        }
+    }
+
+
+def _infer(job_id: str, artifacts, features):
+    """
+    Decode or preprocess the features, predict, and store the predictions.
+    """
+    dtype = artifacts.get("dtype", "float64")
+    if isinstance(features, dict):
+        X = unpack_matrix(features)
+    else:
+        X = preprocess_input(features, artifacts)
 
     # Run prediction and track runtime
     start = time.time()
-    predictions = artifacts["model"].predict(df).tolist()
+    predictions = artifacts["model"].predict(X)
     end = time.time()
     duration_ms = round((end - start) * 1000, 3)
 
+    storage = get_result_store().put(job_id, predictions, dtype=dtype)
+    return duration_ms, {"num_inputs": len(X), "dtype": dtype, **storage}
+
+
+@celery_app.task(name="run_explain", bind=True)
+def run_explain(self, model_id: str, features, user_id: str):
+    """
+    Compute per-feature contributions for a packed, preprocessed matrix.
+
+    The (rows x (n_features + 1)) float32 contribution matrix is written to
+    the result store, row-major; `GET /v2/explain/jobs/{job_id}` reshapes it
+    with `num_inputs` and formats it by `feature_names`.
+
+    Raises:
+    -------
+    ValueError
+        If the specified model is not found in the registry.
+    """
+    from shared.explain import explain_matrix
+
+    ensure_models_loaded()
+    artifacts = MODEL_REGISTRY.get(model_id)
+    if not artifacts:
+        raise ValueError(f"Model '{model_id}' not found in registry")
+
+    X = unpack_matrix(features)
+    start = time.time()
+    contributions, cache_hits = explain_matrix(model_id, artifacts, X)
+    duration_ms = round((time.time() - start) * 1000, 3)
+
+    job_id = self.request.id
+    storage = get_result_store().put(job_id, contributions.ravel(), dtype="float32")
+
     return {
         "user_id": user_id,
-        "job_id": None,  # The actual job ID is set externally by the caller
+        "job_id": job_id,
         "model_id": model_id,
         "status": "SUCCESS",
         "result": {
-            "predictions": predictions,
             "duration_ms": duration_ms,
             "additional_info": {
-                "num_inputs": len(features)
-            }
-        }
+                "num_inputs": len(X),
+                "feature_names": list(artifacts["feature_names"]),
+                "cache_hits": cache_hits,
+                **storage,
+            },
+        },
+    }
+
+
+@celery_app.task(name="run_backtest", bind=True)
+def run_backtest_task(
+    self,
+    model_id: str,
+    start_date: str,
+    end_date: str,
+    dataset: str | None,
+    quantile: float,
+    user_id: str,
+):
+    """
+    Backtest a registered model over a historical market-data parquet.
+
+    Reads the parquet in row-group chunks, engineers features split by
+    ticker across `backtest_workers` processes, scores every ticker in the
+    date range and evaluates IC, hit rate and long-short return against the
+    7-day forward target. Progress is published as a PROGRESS state with
+    `stage`, `done` and `total`.
+
+    Returns:
+    --------
+    dict
+        Job metadata with the evaluation metrics under `result`.
+    """
+    from datetime import date
+
+    from shared.backtest import resolve_dataset, run_backtest
+
+    ensure_models_loaded()
+    artifacts = MODEL_REGISTRY.get(model_id)
+    if not artifacts:
+        raise ValueError(f"Model '{model_id}' not found in registry")
+
+    def progress(stage: str, done: int, total: int):
+        self.update_state(
+            state="PROGRESS",
+            meta={"user_id": user_id, "model_id": model_id, "stage": stage, "done": done, "total": total},
+        )
+
+    result = run_backtest(
+        artifacts,
+        resolve_dataset(dataset),
+        date.fromisoformat(start_date),
+        date.fromisoformat(end_date),
+        quantile=quantile,
+        workers=settings.backtest_workers,
+        progress=progress,
+    )
+
+    return {
+        "user_id": user_id,
+        "job_id": self.request.id,
+        "model_id": model_id,
+        "status": "SUCCESS",
+        "result": result,
     }
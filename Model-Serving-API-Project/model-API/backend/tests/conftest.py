@@ -0,0 +1,48 @@
+import os
+import warnings
+
+import pytest
+
+# Settings are required at import time; point everything at in-process
+# stand-ins so the suite runs without Redis or Auth0.
+os.environ.setdefault("BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+os.environ.setdefault("CELERY_RESULT_BACKEND", "cache+memory://")
+os.environ.setdefault("RESULT_STORE_URL", "memory://")
+os.environ.setdefault("AUTH0_DOMAIN", "example.auth0.com")
+os.environ.setdefault("API_IDENTIFIER", "https://api.example.com")
+
+PICKLE = os.path.join(os.path.dirname(__file__), "..", "models", "model_artifacts.pkl")
+TRAINING_SCRIPT = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "momentum-model", "xgboost-momentum-model.py"
+)
+
+
+@pytest.fixture(scope="session")
+def artifacts_path():
+    return PICKLE
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    # Loaded per test module, so artifacts mutated by one file (dtype,
+    # cached fingerprints) do not leak into the next
+    import joblib
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(PICKLE)
+
+
+@pytest.fixture(scope="session")
+def training_script():
+    # The training pipeline lives next to the API, not in a package; load
+    # it by path so its feature definitions can be checked against ours
+    import importlib.util
+
+    if not os.path.exists(TRAINING_SCRIPT):
+        pytest.skip("momentum-model training script not available")
+    spec = importlib.util.spec_from_file_location("momentum_training", TRAINING_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
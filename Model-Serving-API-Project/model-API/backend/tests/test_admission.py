@@ -0,0 +1,60 @@
+import pytest
+from fastapi import HTTPException
+
+from shared.admission import ADMIT, REROUTE, AdmissionController
+
+
+def make_controller(policy="async"):
+    return AdmissionController(max_rows=10, max_inflight_rows=15, oversize_policy=policy, retry_after=2)
+
+
+def test_oversized_requests_are_rerouted_or_rejected():
+    controller = make_controller()
+    assert controller.check_size("m", 10) == ADMIT
+    assert controller.check_size("m", 11) == REROUTE
+
+    with pytest.raises(HTTPException) as exc:
+        controller.check_size("m", 11, can_reroute=False)
+    assert exc.value.status_code == 413
+
+    with pytest.raises(HTTPException) as exc:
+        make_controller(policy="reject").check_size("m", 11)
+    assert exc.value.status_code == 413
+
+    counters = controller.stats()["models"]["m"]
+    assert counters["rerouted"] == 1
+    assert counters["rejected"] == 1
+
+
+def test_excess_load_is_shed_with_retry_after():
+    controller = make_controller()
+    with controller.admit("m", 10) as ticket:
+        assert controller.stats()["models"]["m"]["queued"] == 1
+        ticket.started()
+        assert controller.stats()["models"]["m"]["queued"] == 0
+
+        with pytest.raises(HTTPException) as exc:
+            with controller.admit("m", 6):
+                pass
+        assert exc.value.status_code == 503
+        assert exc.value.headers["Retry-After"] == "2"
+
+        # Other models have their own budget
+        with controller.admit("other", 10):
+            pass
+
+    counters = controller.stats()["models"]["m"]
+    assert counters["inflight_rows"] == 0
+    assert counters["admitted"] == 1
+    assert counters["shed"] == 1
+    assert counters["peak_inflight_rows"] == 10
+
+
+def test_budget_is_released_when_the_request_fails():
+    controller = make_controller()
+    with pytest.raises(RuntimeError):
+        with controller.admit("m", 12):
+            raise RuntimeError("boom")
+    with controller.admit("m", 12):
+        pass
+    assert controller.stats()["models"]["m"]["inflight_rows"] == 0
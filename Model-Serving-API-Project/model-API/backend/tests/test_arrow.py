@@ -0,0 +1,62 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+from fastapi import HTTPException
+
+from shared.arrow_io import accepts_arrow, read_feature_matrix, write_predictions
+from shared.precision import reference_rows
+from shared.utils import preprocess_input, preprocess_matrix
+
+
+def _stream(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=7)
+    return sink.getvalue().to_pybytes()
+
+
+def test_arrow_matrix_matches_json_preprocessing(artifacts):
+    rows = reference_rows(artifacts, n_synthetic=20)
+    names = artifacts["feature_names"]
+    # Columns shuffled, one as float32, plus an unused extra column
+    columns = {name: [row[name] for row in rows] for name in reversed(names)}
+    columns[names[0]] = pa.array(columns[names[0]], type=pa.float32())
+    columns["unused"] = [0] * len(rows)
+    body = _stream(pa.table(columns))
+
+    X = read_feature_matrix(body, names, "float64")
+    assert X.shape == (len(rows), len(names))
+    expected = preprocess_input(rows, artifacts)
+    expected_first = np.float32(expected[:, 0])
+    actual = preprocess_matrix(X, artifacts, inplace=True)
+    assert actual is X
+    np.testing.assert_allclose(actual[:, 1:], expected[:, 1:])
+    np.testing.assert_allclose(actual[:, 0], expected_first, rtol=1e-6)
+
+
+def test_arrow_rejects_missing_and_null_columns(artifacts):
+    names = artifacts["feature_names"]
+    with pytest.raises(HTTPException) as missing:
+        read_feature_matrix(_stream(pa.table({names[0]: [1.0]})), names)
+    assert missing.value.status_code == 422
+
+    nulls = {name: [1.0, 2.0] for name in names}
+    nulls[names[1]] = [1.0, None]
+    with pytest.raises(HTTPException) as null:
+        read_feature_matrix(_stream(pa.table(nulls)), names)
+    assert null.value.status_code == 422
+
+    with pytest.raises(HTTPException) as invalid:
+        read_feature_matrix(b"not arrow", names)
+    assert invalid.value.status_code == 400
+
+
+def test_predictions_round_trip_and_negotiation():
+    preds = np.linspace(-1, 1, 11, dtype="float32")
+    table = pa.ipc.open_stream(write_predictions(preds, {"model_id": "m", "num_inputs": 11})).read_all()
+    np.testing.assert_array_equal(table.column("prediction").to_numpy(), preds)
+    assert table.schema.metadata[b"num_inputs"] == b"11"
+
+    assert accepts_arrow("application/json, application/vnd.apache.arrow.stream;q=0.9")
+    assert not accepts_arrow("*/*")
+    assert not accepts_arrow(None)
@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+import pytest
+
+from models import MODELS
+from shared.artifacts import MANIFEST_NAME, load_bundle, write_bundle
+from shared.utils import preprocess_input
+
+
+def test_bundle_matches_pickle_predictions(artifacts, artifacts_path, tmp_path):
+    manifest = write_bundle(artifacts, dict(MODELS["xgb_momentum"]), str(tmp_path), source=artifacts_path)
+    bundled = load_bundle(str(tmp_path))
+
+    assert manifest["feature_names"] == artifacts["feature_names"]
+    assert isinstance(bundled["scaler"].center_, np.memmap)
+
+    rows = [{name: 0.1 * i for i, name in enumerate(artifacts["feature_names"])}] * 4
+    expected = artifacts["model"].predict(preprocess_input(rows, artifacts))
+    actual = bundled["model"].predict(preprocess_input(rows, bundled))
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+
+
+def test_bundle_checksum_mismatch_is_rejected(artifacts, tmp_path):
+    write_bundle(artifacts, dict(MODELS["xgb_momentum"]), str(tmp_path))
+    manifest_path = tmp_path / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest["files"]["upper_bounds"]["sha256"] = "0" * 64
+    manifest_path.write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        load_bundle(str(tmp_path))
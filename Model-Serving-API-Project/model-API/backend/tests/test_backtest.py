@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from shared.backtest import _pool_context, _ticker_features, evaluate, read_market_data, resolve_dataset, run_backtest
+from shared.load_models import ensure_models_loaded
+from shared.state import MODEL_REGISTRY
+
+
+def test_evaluate_perfect_predictor():
+    dates = np.repeat(pd.date_range("2024-01-01", periods=5), 10)
+    target = np.tile(np.linspace(-0.1, 0.1, 10), 5)
+    scored = pd.DataFrame({
+        "date": dates,
+        "ticker": np.tile([f"T{i}" for i in range(10)], 5),
+        "target": target,
+        "prediction": target * 2,
+    })
+
+    metrics = evaluate(scored, quantile=0.2)
+    assert metrics["ic"] == pytest.approx(1.0)
+    assert metrics["hit_rate"] == pytest.approx(1.0)
+    assert metrics["long_short_return"] > 0
+    assert metrics["num_dates"] == 5
+
+
+def test_resolve_dataset_stays_inside_data_dir():
+    assert resolve_dataset(None).endswith("crypto_market_data.parquet")
+    with pytest.raises(ValueError):
+        resolve_dataset("../../../etc/passwd")
+
+
+def test_run_backtest_on_market_data():
+    ensure_models_loaded()
+    stages = []
+    metrics = run_backtest(
+        MODEL_REGISTRY["xgb_momentum"],
+        resolve_dataset(None),
+        date(2025, 1, 1),
+        date(2025, 3, 31),
+        workers=1,
+        progress=lambda stage, done, total: stages.append(stage),
+    )
+
+    assert metrics["num_tickers"] > 1
+    assert -1 <= metrics["ic"] <= 1
+    assert 0 <= metrics["hit_rate"] <= 1
+    assert {"read", "features", "score"} <= set(stages)
+
+
+def test_row_groups_pruned_on_timestamp_dates(tmp_path, monkeypatch):
+    monkeypatch.setattr("shared.backtest.settings.backtest_lookback_days", 10)
+    bars = pd.DataFrame({
+        "date": pd.to_datetime(pd.date_range("2024-01-01", periods=400)),
+        "ticker": "BTC",
+        "price": 1.0,
+        "volume": 1.0,
+    })
+    path = str(tmp_path / "bars.parquet")
+    pq.write_table(pa.Table.from_pandas(bars, preserve_index=False), path, row_group_size=50)
+
+    decoded = []
+    read_row_group = pq.ParquetFile.read_row_group
+    monkeypatch.setattr(pq.ParquetFile, "read_row_group",
+                        lambda self, i, **kwargs: decoded.append(i) or read_row_group(self, i, **kwargs))
+
+    df = read_market_data(path, date(2024, 12, 1), date(2024, 12, 31))
+    assert df["date"].min() == pd.Timestamp("2024-11-21")
+    assert df["date"].max() == pd.Timestamp("2025-01-14")
+    assert decoded == [6, 7]
+
+
+def _child_pool_pid(queue):
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=_pool_context()) as pool:
+        queue.put(pool.submit(os.getpid).result())
+
+
+def test_feature_pool_starts_inside_daemonic_process():
+    # Celery's prefork pool processes are daemonic
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_child_pool_pid, args=(queue,), daemon=True)
+    child.start()
+    pid = queue.get(timeout=30)
+    child.join(timeout=30)
+    assert child.exitcode == 0
+    assert pid not in (os.getpid(), child.pid)
+
+
+def test_features_match_training_across_missing_prices(training_script):
+    bars = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=120),
+        "ticker": "AAA",
+        "price": 100 + np.cumsum(np.random.default_rng(0).normal(size=120)),
+        "volume": np.linspace(1e6, 2e6, 120),
+    })
+    bars.loc[[50, 51, 52, 90], "price"] = np.nan
+
+    ours = _ticker_features(bars)
+    theirs = training_script.ticker_features(bars)
+    returns = [f"ret_{p}d" for p in training_script.lookback_periods] + ["ret_1d", "volatility_14d", "mom_x_vol_42d"]
+    pd.testing.assert_frame_equal(ours[returns], theirs[returns])
+
+    # The target is the 7-day return shifted back, also pad-filled
+    expected = bars["price"].pct_change(periods=7).shift(-7)
+    np.testing.assert_allclose(ours["target"], expected, equal_nan=True)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from shared.ensemble import blend, normalize_weights, preprocessing_groups
+
+
+def test_models_grouped_by_fingerprint_and_dtype():
+    registry = {
+        "a": {"_preprocessing_fingerprint": "f1"},
+        "b": {"_preprocessing_fingerprint": "f2"},
+        "c": {"_preprocessing_fingerprint": "f1", "dtype": "float64"},
+        "d": {"_preprocessing_fingerprint": "f1", "dtype": "float32"},
+    }
+    assert preprocessing_groups(["a", "b", "c", "d"], registry) == [["a", "c"], ["b"], ["d"]]
+    assert preprocessing_groups(["c", "a"], registry) == [["c", "a"]]
+
+
+def test_weights_normalized_and_validated():
+    assert normalize_weights(["a", "b"], None) == [0.5, 0.5]
+    assert normalize_weights(["a", "b"], [3, 1]) == [0.75, 0.25]
+    for weights in ([1.0], [1.0, -1.0], [0.0, 0.0]):
+        with pytest.raises(HTTPException) as invalid:
+            normalize_weights(["a", "b"], weights)
+        assert invalid.value.status_code == 422
+
+
+def test_blend_is_weighted_mean_in_float64():
+    a = np.array([1.0, 2.0, 3.0], dtype="float32")
+    b = np.array([3.0, 2.0, 1.0], dtype="float64")
+    blended = blend([a, b], [0.25, 0.75])
+    assert blended.dtype == np.float64
+    np.testing.assert_allclose(blended, np.average([a, b], axis=0, weights=[0.25, 0.75]))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from shared.explain import ContributionCache, explain_matrix, format_explanations
+from shared.precision import reference_rows
+from shared.utils import preprocess_input
+
+
+@pytest.fixture(scope="module")
+def X(artifacts):
+    return preprocess_input(reference_rows(artifacts, n_synthetic=50), artifacts)
+
+
+def test_contributions_sum_to_prediction_and_chunking_is_exact(artifacts, X):
+    whole, _ = explain_matrix("m", artifacts, X, chunk_rows=10_000, cache=ContributionCache(0))
+    chunked, _ = explain_matrix("m", artifacts, X, chunk_rows=7, cache=ContributionCache(0))
+
+    assert whole.shape == (len(X), len(artifacts["feature_names"]) + 1)
+    np.testing.assert_array_equal(whole, chunked)
+    np.testing.assert_allclose(whole.sum(axis=1), artifacts["model"].predict(X), atol=1e-5)
+
+
+def test_repeated_rows_are_served_from_cache(artifacts, X):
+    cache = ContributionCache(max_rows=1000)
+    first, hits = explain_matrix("m", artifacts, X[:10], cache=cache)
+    assert hits == 0
+
+    second, hits = explain_matrix("m", artifacts, X[5:15], cache=cache)
+    assert hits == 5
+    np.testing.assert_array_equal(second[:5], first[5:])
+
+    # A different model version does not reuse cached rows
+    bumped = dict(artifacts, metadata={"version": "other"})
+    _, hits = explain_matrix("m", bumped, X[:10], cache=cache)
+    assert hits == 0
+
+
+def test_top_n_keeps_largest_absolute_contributions():
+    contributions = np.array([[0.1, -0.5, 0.3, 1.0]], dtype="float32")
+    names = ["a", "b", "c"]
+
+    full = format_explanations(contributions, names)[0]
+    assert set(full["contributions"]) == {"a", "b", "c"}
+    assert full["bias"] == pytest.approx(1.0)
+    assert full["prediction"] == pytest.approx(0.9)
+
+    top = format_explanations(contributions, names, top_n=2)[0]
+    assert list(top["contributions"]) == ["b", "c"]
@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from shared.idempotency import InflightCoalescer, JobDeduplicator, payload_digest, request_fingerprint
+
+INPUTS = [{"a": 1.0, "b": 2.0}]
+
+
+def test_fingerprint_ignores_key_order_but_not_version():
+    base = request_fingerprint("m", "1.0", INPUTS)
+    assert request_fingerprint("m", "1.0", [{"b": 2.0, "a": 1.0}]) == base
+    assert request_fingerprint("m", "2.0", INPUTS) != base
+    assert request_fingerprint("m", "1.0", INPUTS, idempotency_key="k") != base
+
+
+def test_coalescer_shares_inflight_computation():
+    coalescer = InflightCoalescer()
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return 42
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(coalescer.run("k", compute)))
+    leader.start()
+    started.wait()
+    results.append(coalescer.run("k", compute))
+    leader.join()
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [(42, False), (42, True)]
+
+
+def test_job_deduplicator_returns_existing_job():
+    dedup = JobDeduplicator(ttl=60, prefix="test-idem:")
+    assert dedup.claim("key", "job-1") is None
+    assert dedup.claim("key", "job-2") == "job-1"
+    dedup.release("key")
+    assert dedup.claim("key", "job-3") is None
+
+
+def test_reused_key_with_different_payload_is_rejected():
+    dedup = JobDeduplicator(ttl=60, prefix="test-idem-digest:")
+    digest = payload_digest("m", "1.0", INPUTS)
+    assert dedup.claim("key", "job-1", digest) is None
+    assert dedup.claim("key", "job-2", payload_digest("m", "1.0", [{"b": 2.0, "a": 1.0}])) == "job-1"
+    with pytest.raises(HTTPException) as reused:
+        dedup.claim("key", "job-3", payload_digest("m", "1.0", [{"a": 5.0, "b": 2.0}]))
+    assert reused.value.status_code == 422
+    assert dedup.stats()["mismatches"] == 1
+
+
+def test_failed_owner_is_replaced():
+    dedup = JobDeduplicator(ttl=60, prefix="test-idem-failed:")
+    statuses = {"job-1": "FAILURE"}
+    assert dedup.claim_or_existing("key", "job-1", "d", statuses.get) is None
+    assert dedup.claim_or_existing("key", "job-2", "d", statuses.get) is None
+    statuses["job-2"] = "STARTED"
+    assert dedup.claim_or_existing("key", "job-3", "d", statuses.get) == ("job-2", "STARTED")
@@ -0,0 +1,91 @@
+import ast
+import json
+import logging
+import pathlib
+import queue
+import subprocess
+import sys
+
+from shared.logger_config import DeferredQueueHandler, JsonFormatter, RouteSampler, current_route
+
+
+def make_logger(name, rates):
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    sampler = RouteSampler(rates)
+    handler.addFilter(sampler)
+    log = logging.getLogger(f"test.{name}")
+    log.handlers[:] = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log, log_queue, sampler
+
+
+def test_formatting_is_deferred_to_the_writer():
+    log, log_queue, _ = make_logger("deferred", {})
+
+    class Expensive:
+        calls = 0
+
+        def __str__(self):
+            Expensive.calls += 1
+            return "expensive"
+
+    log.info("value: %s", Expensive())
+    record = log_queue.get_nowait()
+    assert Expensive.calls == 0
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "value: expensive"
+    assert entry["level"] == "INFO"
+
+
+def test_info_is_sampled_per_route_but_warnings_are_kept():
+    log, log_queue, sampler = make_logger("sampled", {"/v2/predict": 0.0, "/v2": 1.0})
+
+    token = current_route.set("/v2/predict/")
+    try:
+        log.info("dropped")
+        log.warning("kept")
+    finally:
+        current_route.reset(token)
+
+    token = current_route.set("/v2/jobs/")
+    try:
+        log.info("kept")
+    finally:
+        current_route.reset(token)
+
+    records = [log_queue.get_nowait() for _ in range(log_queue.qsize())]
+    assert [r.getMessage() for r in records] == ["kept", "kept"]
+    assert records[0].route == "/v2/predict/"
+    assert sampler.sampled_out == 1
+    assert sampler.kept == 2
+
+
+def test_importing_logger_config_leaves_root_handlers_alone():
+    script = (
+        "import logging; before = list(logging.getLogger().handlers); "
+        "import shared.logger_config; "
+        "assert logging.getLogger().handlers == before"
+    )
+    backend = pathlib.Path(__file__).resolve().parent.parent
+    subprocess.run([sys.executable, "-c", script], cwd=backend, check=True)
+
+
+def test_log_calls_use_lazy_formatting():
+    backend = pathlib.Path(__file__).resolve().parent.parent
+    eager = []
+    # tools/bench_logging.py keeps the eager calls on purpose, as its baseline
+    paths = [backend / "main.py"] + [p for d in ("routes", "shared", "middleware") for p in (backend / d).glob("*.py")]
+    for path in paths:
+        for node in ast.walk(ast.parse(path.read_text())):
+            if (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ("debug", "info", "warning", "error", "exception", "critical")
+                and node.args
+                and isinstance(node.args[0], ast.JoinedStr)
+            ):
+                eager.append(f"{path.relative_to(backend)}:{node.lineno}")
+    assert not eager, f"f-string log messages: {eager}"
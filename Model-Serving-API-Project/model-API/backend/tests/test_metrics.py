@@ -0,0 +1,18 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middleware.auth import get_current_user_with_scopes
+from routes import metrics
+
+
+def test_metrics_require_admin_scope():
+    app = FastAPI()
+    app.include_router(metrics.router, prefix="/v2/metrics")
+    client = TestClient(app)
+
+    assert client.get("/v2/metrics/").status_code in (401, 403)
+
+    app.dependency_overrides[get_current_user_with_scopes] = lambda: {"sub": "ops", "scope": metrics.METRICS_SCOPE}
+    response = client.get("/v2/metrics/")
+    assert response.status_code == 200
+    assert "result_store" in response.json()
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from shared.precision import reference_rows, validate_float32
+from shared.utils import pack_matrix, preprocess_input, unpack_matrix
+
+
+def test_preprocess_matches_sklearn_pipeline(artifacts):
+    rows = reference_rows(artifacts, n_synthetic=64)
+    df = pd.DataFrame(rows)[artifacts["feature_names"]]
+    df = df.clip(lower=artifacts["lower_bounds"], upper=artifacts["upper_bounds"], axis=1)
+    expected = artifacts["scaler"].transform(df)
+
+    np.testing.assert_allclose(preprocess_input(rows, artifacts), expected, rtol=1e-12)
+    assert preprocess_input(rows, artifacts, dtype="float32").dtype == np.float32
+
+
+def test_missing_features_raise_422(artifacts):
+    with pytest.raises(HTTPException) as exc:
+        preprocess_input([{"ret_7d": 0.1}], artifacts)
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_pack_matrix_roundtrip(dtype):
+    X = np.arange(12, dtype=dtype).reshape(3, 4) / 7
+    Y = unpack_matrix(pack_matrix(X))
+    assert Y.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(X, Y)
+
+
+def test_float32_validation_respects_tolerance(artifacts):
+    report = validate_float32(artifacts, tolerance=1e-4, n_synthetic=128)
+    assert report["passed"]
+    assert validate_float32(artifacts, tolerance=-1.0, n_synthetic=8)["passed"] is False
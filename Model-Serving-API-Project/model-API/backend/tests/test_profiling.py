@@ -0,0 +1,42 @@
+import pytest
+from fastapi import HTTPException
+
+from shared.profiling import ProfileStore, StackProfiler, profile_requested
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_profiler_records_collapsed_stacks():
+    profiler = StackProfiler(root="test")
+    profiler.start()
+    busy(200_000)
+    profiler.stop()
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    stacks = [line.rsplit(" ", 1) for line in lines]
+    assert all(stack.startswith("test") and int(weight) > 0 for stack, weight in stacks)
+    assert any("busy (test_profiling.py" in stack for stack, _ in stacks)
+
+
+def test_store_evicts_oldest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2, max_bytes=1 << 20)
+    ids = [store.save(f"root;frame {i}\n", {"kind": "test"}) for i in range(3)]
+
+    listed = [entry["profile_id"] for entry in store.list()]
+    assert len(listed) == 2
+    assert set(listed) <= set(ids)
+    assert sum(store.path(profile_id) is not None for profile_id in ids) == 2
+
+    with pytest.raises(ValueError):
+        store.path("../../etc/passwd")
+
+
+def test_header_requires_admin_scope():
+    assert profile_requested(None, {"scope": ""}) is False
+    assert profile_requested("1", {"scope": "predictions:create admin:profile"}) is True
+    with pytest.raises(HTTPException) as exc:
+        profile_requested("1", {"scope": "predictions:create"})
+    assert exc.value.status_code == 403
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import shared
+from routes.jobs import _merge_chunks, enqueue_prediction_job, job_status
+from settings import settings
+from shared.queues import BULK, INTERACTIVE, QueueWaitStats, parse_priority, plan_chunks, queue_for
+from shared.result_store import InMemoryBackend, ResultStore
+
+
+def test_routing_by_size_and_priority(monkeypatch):
+    monkeypatch.setattr(settings, "interactive_max_rows", 100)
+    assert queue_for(100) == INTERACTIVE
+    assert queue_for(101) == BULK
+    assert queue_for(1, parse_priority("Bulk")) == BULK
+    assert parse_priority(None) == INTERACTIVE
+    with pytest.raises(HTTPException):
+        parse_priority("urgent")
+
+    chunks = plan_chunks(500_001, chunk_rows=50_000)
+    assert len(chunks) == 11
+    assert chunks[0][0] == 0 and chunks[-1][1] == 500_001
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    assert max(stop - start for start, stop in chunks) - min(stop - start for start, stop in chunks) <= 1
+    assert plan_chunks(10, chunk_rows=50_000) == [(0, 10)]
+
+
+def test_chunked_job_status_and_merge(monkeypatch):
+    store = ResultStore(InMemoryBackend(), ttl=60, compress=False)
+    monkeypatch.setattr("routes.jobs.get_result_store", lambda: store)
+
+    manifest = {
+        "user_id": "u", "model_id": "m", "queue": BULK, "rows": 3,
+        "chunks": [{"id": "job.0", "rows": 2}, {"id": "job.1", "rows": 1}],
+    }
+    store.put_manifest("job", manifest)
+    results = {
+        "job.0": SimpleNamespace(status="SUCCESS", result={"result": {
+            "duration_ms": 5.0, "additional_info": {"dtype": "float64", "queue_wait_ms": 3.0}}}),
+        "job.1": SimpleNamespace(status="PENDING", result=None),
+    }
+    monkeypatch.setattr(shared.celery_app, "AsyncResult",
+                        lambda job_id: results.get(job_id, SimpleNamespace(status="PENDING", result=None)))
+    store.put("job.0", [0.1, 0.2])
+
+    assert job_status("job") == "STARTED"
+    assert _merge_chunks("job", manifest) == ("STARTED", "1/2")
+
+    results["job.1"] = SimpleNamespace(status="SUCCESS", result={"result": {
+        "duration_ms": 7.0, "additional_info": {"dtype": "float64", "queue_wait_ms": 9.0}}})
+    store.put("job.1", [0.3])
+    status, merged = _merge_chunks("job", manifest)
+    assert status == job_status("job") == "SUCCESS"
+    assert merged["result"]["predictions"] == [0.1, 0.2, 0.3]
+    assert merged["result"]["duration_ms"] == 7.0
+    assert merged["result"]["additional_info"]["chunks"] == 2
+    assert merged["result"]["additional_info"]["queue_wait_ms"] == 9.0
+
+    _, merged = _merge_chunks("job", manifest, as_array=True)
+    assert merged["result"]["predictions"].dtype == "float64"
+    assert merged["result"]["predictions"].tolist() == [0.1, 0.2, 0.3]
+
+    results["job.1"] = SimpleNamespace(status="FAILURE", result=ValueError("boom"))
+    status, error = _merge_chunks("job", manifest)
+    assert status == "FAILURE" and str(error) == "boom"
+
+
+def test_queue_wait_samples_are_capped_per_queue(monkeypatch):
+    store = ResultStore(InMemoryBackend(), ttl=60)
+    monkeypatch.setattr("shared.queues.get_result_store", lambda: store)
+    waits = QueueWaitStats(max_samples=3)
+
+    for wait_ms in (10.0, 20.0, 30.0, 40.0):
+        waits.record(INTERACTIVE, wait_ms)
+    request = SimpleNamespace(enqueued_at=time.time() - 0.05, delivery_info={"routing_key": BULK})
+    assert waits.record_request(request) >= 50
+    assert waits.record_request(SimpleNamespace(delivery_info={"routing_key": BULK})) is None
+
+    report = waits.stats()
+    assert report[INTERACTIVE]["samples"] == 3
+    assert report[INTERACTIVE]["max_ms"] == 40.0
+    assert report[INTERACTIVE]["p50_ms"] == 30.0
+    assert report[BULK]["samples"] == 1
+    assert report["control"] == {"samples": 0}
+
+
+def test_large_payload_is_fingerprinted_off_the_event_loop(monkeypatch):
+    claimed = []
+
+    def claim_or_existing(key, job_id, digest, status_of):
+        claimed.append(digest)
+        return "earlier-job", "PENDING"
+
+    monkeypatch.setattr("routes.jobs.job_deduplicator", SimpleNamespace(claim_or_existing=claim_or_existing))
+    raw_inputs = [{f"f{i}": float(row + i) for i in range(20)} for row in range(20000)]
+
+    async def main():
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while not claimed:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        body, replayed = (await asyncio.gather(
+            enqueue_prediction_job("m", {"metadata": {"version": "1"}}, raw_inputs, "user-1"),
+            ticker(),
+        ))[0]
+        return body, replayed, gaps
+
+    body, replayed, gaps = asyncio.run(main())
+    assert replayed and body["job_id"] == "earlier-job"
+    # Hashing 20k JSON rows takes far longer than this; the loop kept ticking
+    assert len(gaps) > 5
+    assert max(gaps) < 0.1
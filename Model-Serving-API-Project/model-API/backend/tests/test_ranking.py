@@ -0,0 +1,35 @@
+import numpy as np
+
+from shared.ranking import cross_sectional_deciles, cross_sectional_zscores, top_k_indices
+
+
+def test_top_k_matches_full_sort():
+    scores = np.random.default_rng(1).normal(size=10_000)
+    np.testing.assert_array_equal(top_k_indices(scores, 25), np.argsort(-scores)[:25])
+    np.testing.assert_array_equal(top_k_indices(scores, 25, largest=False), np.argsort(scores)[:25])
+
+
+def test_top_k_edge_cases():
+    scores = np.array([0.3, 0.1, 0.2])
+    assert top_k_indices(scores, 0).size == 0
+    np.testing.assert_array_equal(top_k_indices(scores, 10), [0, 2, 1])
+
+
+def test_zscores_and_deciles():
+    scores = np.arange(100, dtype=float)
+    z = cross_sectional_zscores(scores)
+    assert abs(z.mean()) < 1e-12 and abs(z.std() - 1) < 1e-12
+    assert np.all(cross_sectional_zscores(np.ones(5)) == 0)
+
+    deciles = cross_sectional_deciles(scores)
+    assert deciles.min() == 1 and deciles.max() == 10
+    np.testing.assert_array_equal(np.bincount(deciles)[1:], [10] * 10)
+
+
+def test_tied_scores_share_a_decile():
+    np.testing.assert_array_equal(cross_sectional_deciles(np.full(50, 0.3)), [5] * 50)
+
+    scores = np.array([0.0] * 50 + [1.0] * 50)
+    deciles = cross_sectional_deciles(scores)
+    assert len(set(deciles[:50])) == 1 and len(set(deciles[50:])) == 1
+    assert deciles[0] < deciles[-1]
@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from shared.result_store import (
+    InMemoryBackend,
+    RedisBackend,
+    ResultStore,
+    decode_predictions,
+    encode_predictions,
+)
+
+
+def test_encode_roundtrip_float64():
+    values = [0.1, -2.5, 3.25, 1e-9]
+    assert decode_predictions(encode_predictions(values)) == values
+
+
+def test_encode_float32_compressed_is_smaller():
+    values = [0.0] * 1000
+    raw = encode_predictions(values, dtype="float64")
+    packed = encode_predictions(values, dtype="float32", compress=True)
+    assert len(packed) < len(raw)
+    assert decode_predictions(packed) == values
+
+
+def test_decode_rejects_foreign_blob():
+    with pytest.raises(ValueError):
+        decode_predictions(b"not a result blob")
+
+
+def test_store_put_get_and_stats():
+    store = ResultStore(InMemoryBackend(), ttl=60, compress=True)
+    info = store.put("job-1", [1.0, 2.0, 3.0])
+
+    assert store.get("job-1") == [1.0, 2.0, 3.0]
+    assert info["round_trips"] == 1
+    assert info["bytes_per_row"] == pytest.approx(info["result_bytes"] / 3, abs=1e-3)
+
+    stats = store.stats()
+    assert stats["writes"] == 1
+    assert stats["rows_written"] == 3
+    assert stats["round_trips_per_job"] == 2.0
+
+
+def test_store_entries_expire():
+    store = ResultStore(InMemoryBackend(), ttl=1)
+    store.put("job-1", [1.0])
+    store.backend._data["result:job-1"] = (store.backend._data["result:job-1"][0], time.monotonic() - 1)
+    assert store.get("job-1") is None
+    stats = store.stats()
+    assert stats["misses"] == 1
+    # put, get, then a separate bump for the miss
+    assert stats["round_trips"] == 3
+
+
+def test_stats_are_shared_through_the_backend():
+    backend = InMemoryBackend()
+    worker_store = ResultStore(backend, ttl=60)
+    api_store = ResultStore(backend, ttl=60)
+    worker_store.put("job-1", [1.0, 2.0])
+    worker_store.put("job-2", [3.0])
+
+    stats = api_store.stats()
+    assert stats["writes"] == 2
+    assert stats["rows_written"] == 3
+    assert stats["bytes_per_row"] > 0
+    assert stats["round_trips_per_job"] == 1.0
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args))
+
+    def execute(self, raise_on_error=True):
+        self.client.trips.append([name for name, _ in self.commands])
+        return [b"blob" if name == "get" else True for name, _ in self.commands]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.trips = []
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+def test_redis_counters_ride_in_the_command_round_trip():
+    backend = RedisBackend.__new__(RedisBackend)
+    backend._client = _FakeRedis()
+    store = ResultStore(backend, ttl=60, compress=False)
+
+    store.put("job-1", [1.0])
+    assert backend.get("result:job-1", stats=store._stats(reads=1)) == b"blob"
+
+    assert backend._client.trips == [
+        ["set", "hincrby", "hincrby", "hincrby", "hincrby"],
+        ["get", "hincrby", "hincrby"],
+    ]
+
+
+def test_result_store_url_falls_back_only_to_redis(monkeypatch):
+    import shared.result_store as result_store
+    from settings import settings
+
+    with pytest.raises(ValueError):
+        result_store.create_backend("rpc://")
+
+    monkeypatch.setattr(result_store, "_store", None)
+    monkeypatch.setattr(settings, "result_store_url", None)
+    monkeypatch.setattr(settings, "celery_result_backend", "cache+memory://")
+    with pytest.raises(RuntimeError):
+        result_store.get_result_store()
+
+
+def test_numpy_arrays_round_trip_without_lists():
+    import numpy as np
+
+    store = ResultStore(InMemoryBackend(), ttl=60)
+    matrix = np.random.default_rng(0).normal(size=(50, 23)).astype("float32")
+    store.put("job-1", matrix, dtype="float32")
+
+    values = store.get_array("job-1")
+    assert values.dtype == np.float32
+    np.testing.assert_array_equal(values.reshape(50, 23), matrix)
+    assert store.get("job-1") == matrix.ravel().tolist()
+    assert store.get_array("missing") is None
@@ -0,0 +1,61 @@
+import time
+
+import numpy as np
+import pytest
+
+from shared.precision import reference_rows
+from shared.shadow import DivergenceStats, ShadowEvaluator
+from shared.state import MODEL_REGISTRY
+from shared.utils import preprocess_input
+
+
+def test_online_divergence_matches_batch_statistics():
+    rng = np.random.default_rng(0)
+    primary = rng.normal(size=500)
+    shadow = primary + rng.normal(scale=0.1, size=500)
+
+    stats = DivergenceStats()
+    for start in range(0, 500, 37):
+        stats.update(primary[start:start + 37], shadow[start:start + 37])
+    report = stats.report()
+
+    diff = shadow - primary
+    assert report["rows"] == 500
+    assert report["mean_diff"] == pytest.approx(diff.mean())
+    assert report["std_diff"] == pytest.approx(diff.std(ddof=1))
+    assert report["max_abs_diff"] == pytest.approx(np.abs(diff).max())
+    assert report["correlation"] == pytest.approx(np.corrcoef(primary, shadow)[0, 1])
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    evaluator = ShadowEvaluator(max_queue=1, batch_rows=100)
+    monkeypatch.setattr(evaluator, "_ensure_thread", lambda: None)  # nothing drains
+
+    X = np.zeros((2, 3))
+    assert evaluator.submit("a", "b", X, np.zeros(2), []) is True
+    assert evaluator.submit("a", "b", X, np.zeros(2), []) is False
+
+    counters = evaluator.stats()["pairs"]["a->b"]
+    assert counters["submitted"] == 1
+    assert counters["dropped"] == 1
+
+
+def test_shadow_scores_in_background(artifacts, monkeypatch):
+    monkeypatch.setitem(MODEL_REGISTRY, "primary", artifacts)
+    monkeypatch.setitem(MODEL_REGISTRY, "candidate", dict(artifacts))
+
+    rows = reference_rows(artifacts, n_synthetic=20)
+    X = preprocess_input(rows, artifacts)
+    preds = artifacts["model"].predict(X)
+
+    evaluator = ShadowEvaluator(max_queue=10, batch_rows=1000)
+    assert evaluator.submit("primary", "candidate", X, preds, rows)
+
+    deadline = time.time() + 10
+    while evaluator.stats()["pairs"]["primary->candidate"]["divergence"]["rows"] == 0:
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+    divergence = evaluator.stats()["pairs"]["primary->candidate"]["divergence"]
+    assert divergence["rows"] == len(rows)
+    assert divergence["max_abs_diff"] == pytest.approx(0.0, abs=1e-7)
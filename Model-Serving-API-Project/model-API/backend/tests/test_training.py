@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+
+def test_incremental_expanding_stats_match_full_recompute(training_script, tmp_path):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(500, 3)), columns=["a", "b", "c"])
+    cache = str(tmp_path / "expanding.npz")
+
+    full, computed = training_script.expanding_stats(X, str(tmp_path / "full.npz"), full=True)
+    assert computed == 500
+
+    training_script.expanding_stats(X.iloc[:460], cache)
+    incremental, computed = training_script.expanding_stats(X, cache)
+    assert computed == 40
+    for name in training_script.EXPANDING_QUANTILES:
+        np.testing.assert_allclose(incremental[name], full[name], equal_nan=True)
+
+
+def test_large_append_falls_back_to_full_recompute(training_script, tmp_path):
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(size=(500, 2)), columns=["a", "b"])
+    cache = str(tmp_path / "expanding.npz")
+
+    training_script.expanding_stats(X.iloc[:300], cache)
+    stats, computed = training_script.expanding_stats(X, cache)
+    assert computed == 500
+    np.testing.assert_allclose(stats["median"], X.expanding(min_periods=180).median(), equal_nan=True)
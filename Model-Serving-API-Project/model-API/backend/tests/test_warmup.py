@@ -0,0 +1,23 @@
+from shared.state import MODEL_REGISTRY
+from shared.warmup import DONE, PENDING, start_warmup, warm_up_model, warmup_state
+
+
+def test_warm_up_reports_cold_and_warm_latency_per_batch_size(artifacts):
+    report = warm_up_model(artifacts, batch_sizes=[1, 8, 300], repeats=2)
+
+    assert set(report["batch_sizes"]) == {"1", "8", "300"}
+    for timing in report["batch_sizes"].values():
+        assert timing["first_ms"] > 0
+        assert timing["warm_ms"] > 0
+    assert report["total_ms"] > 0
+
+
+def test_state_is_pending_until_warm_up_finishes(artifacts, monkeypatch):
+    monkeypatch.setitem(MODEL_REGISTRY, "test_model", artifacts)
+    warmup_state.reset()
+    assert warmup_state.status == PENDING and not warmup_state.ready
+
+    start_warmup(background=False)
+
+    assert warmup_state.ready and warmup_state.status == DONE
+    assert "test_model" in warmup_state.report()["models"]
@@ -0,0 +1,154 @@
+"""
+Compare JSON and Arrow IPC end to end on POST /v2/predict.
+
+Each run times the three parts a client sees, against the real app
+in-process (TestClient, auth overridden):
+
+    encode   building the request body (json.dumps of the records, or
+             writing an Arrow stream from the columns)
+    request  the HTTP round trip: body parsing, preprocessing, inference
+             and response encoding on the server
+    decode   turning the response back into a float array
+
+Admission limits are raised for the run so 1M-row batches are served
+synchronously instead of being rerouted to a job.
+
+Usage (from the backend directory):
+    python -m tools.bench_arrow
+    python -m tools.bench_arrow --rows 10000 1000000 --repeats 3
+    python -m tools.bench_arrow --rows 1000000 --formats arrow
+
+A 1M-row JSON request holds the records, the JSON text and the parsed
+request in memory at once; budget several GB for it.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+
+for _name, _value in (
+    ("BROKER_URL", "memory://"),
+    ("CELERY_BROKER_URL", "memory://"),
+    ("CELERY_RESULT_BACKEND", "cache+memory://"),
+    ("RESULT_STORE_URL", "memory://"),
+    ("AUTH0_DOMAIN", "bench.auth0.com"),
+    ("API_IDENTIFIER", "https://bench"),
+):
+    os.environ.setdefault(_name, _value)
+
+import numpy as np
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from main import app
+from middleware.auth import get_current_user_with_scopes
+from shared.admission import admission
+from shared.arrow_io import ARROW_STREAM
+from shared.precision import reference_rows
+from shared.state import MODEL_REGISTRY
+
+MODEL_ID = "xgb_momentum"
+
+
+def make_columns(artifacts, rows: int) -> dict:
+    """
+    `rows` rows per feature: the reference rows with a little noise, so
+    neither format benefits from repeated values.
+    """
+    names = artifacts["feature_names"]
+    base = np.array([[row[name] for name in names] for row in reference_rows(artifacts, 256)], dtype="float64")
+    rng = np.random.default_rng(0)
+    X = base[rng.integers(0, len(base), rows)] * (1 + rng.normal(scale=0.01, size=(rows, len(names))))
+    return {name: X[:, j] for j, name in enumerate(names)}
+
+
+def run_json(client: TestClient, columns: dict) -> dict:
+    start = time.perf_counter()
+    names = list(columns)
+    records = [dict(zip(names, values)) for values in zip(*(columns[n].tolist() for n in names))]
+    body = json.dumps({"model_id": MODEL_ID, "inputs": records})
+    encoded = time.perf_counter()
+
+    response = client.post("/v2/predict/", content=body, headers={"content-type": "application/json"})
+    response.raise_for_status()
+    received = time.perf_counter()
+
+    preds = np.asarray(response.json()["result"]["predictions"], dtype="float64")
+    done = time.perf_counter()
+    return _timings(start, encoded, received, done, len(body), len(response.content), preds)
+
+
+def run_arrow(client: TestClient, columns: dict) -> dict:
+    start = time.perf_counter()
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    body = sink.getvalue().to_pybytes()
+    encoded = time.perf_counter()
+
+    response = client.post(
+        f"/v2/predict/?model_id={MODEL_ID}",
+        content=body,
+        headers={"content-type": ARROW_STREAM, "accept": ARROW_STREAM},
+    )
+    response.raise_for_status()
+    received = time.perf_counter()
+
+    preds = pa.ipc.open_stream(response.content).read_all().column("prediction").to_numpy()
+    done = time.perf_counter()
+    return _timings(start, encoded, received, done, len(body), len(response.content), preds)
+
+
+def _timings(start, encoded, received, done, request_bytes, response_bytes, preds) -> dict:
+    return {
+        "encode_ms": (encoded - start) * 1000,
+        "request_ms": (received - encoded) * 1000,
+        "decode_ms": (done - received) * 1000,
+        "total_ms": (done - start) * 1000,
+        "request_mb": request_bytes / 1e6,
+        "response_mb": response_bytes / 1e6,
+        "preds": preds,
+    }
+
+
+RUNNERS = {"json": run_json, "arrow": run_arrow}
+
+
+def best(fn, client, columns, repeats: int) -> dict:
+    return min((fn(client, columns) for _ in range(repeats)), key=lambda r: r["total_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--formats", nargs="+", choices=sorted(RUNNERS), default=["arrow", "json"])
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app.dependency_overrides[get_current_user_with_scopes] = lambda: {"sub": "bench", "scope": "predictions:create"}
+    admission.max_rows = admission.max_inflight_rows = max(args.rows)
+
+    with TestClient(app) as client:
+        artifacts = MODEL_REGISTRY[MODEL_ID]
+        print(f"model {MODEL_ID} ({artifacts.get('dtype', 'float64')}), best of {args.repeats}")
+        print(f"{'rows':>9} {'format':<6} {'encode':>9} {'request':>9} {'decode':>9} {'total':>9} "
+              f"{'req MB':>8} {'resp MB':>8}")
+        for rows in args.rows:
+            columns = make_columns(artifacts, rows)
+            results = {name: best(RUNNERS[name], client, columns, args.repeats) for name in args.formats}
+            for name, r in results.items():
+                print(f"{rows:>9} {name:<6} {r['encode_ms']:>7.1f}ms {r['request_ms']:>7.1f}ms "
+                      f"{r['decode_ms']:>7.1f}ms {r['total_ms']:>7.1f}ms {r['request_mb']:>8.2f} "
+                      f"{r['response_mb']:>8.2f}")
+            if len(results) == 2:
+                np.testing.assert_allclose(results["json"]["preds"], results["arrow"]["preds"], rtol=1e-6)
+                print(f"{'':>9} speedup {results['json']['total_ms'] / results['arrow']['total_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measure the logging cost of one request on the request thread.
+
+Replays the log calls a POST /v2/jobs request made before and after the
+logging changes, against a real model's artifacts:
+
+    before   basicConfig StreamHandler, eager f-strings, including the
+             repr of the whole artifacts dict on every request
+    after    queue handler + background writer, lazy %-formatting
+    sampled  as "after", with the route sampled at --sample-rate
+
+Output goes to a temporary file so terminal speed does not skew the
+numbers.
+
+Usage (from the backend directory):
+    python -m tools.bench_logging
+    python -m tools.bench_logging --requests 5000 --sample-rate 0.1
+"""
+import argparse
+import logging
+import logging.handlers
+import queue
+import tempfile
+import time
+import warnings
+
+from shared.load_models import ensure_models_loaded
+from shared.logger_config import DeferredQueueHandler, JsonFormatter, RouteSampler, current_route
+from shared.state import MODEL_REGISTRY
+
+MODEL_ID = "xgb_momentum_async"
+USER_ID = "auth0|bench"
+
+
+def _logger(name: str, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger(f"bench.{name}")
+    log.handlers[:] = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log
+
+
+def before(log: logging.Logger, artifacts) -> None:
+    log.info(f"Async prediction request for model '{MODEL_ID}' by user '{USER_ID}'")
+    log.info(f"Artifacts loaded for model '{MODEL_ID}': {artifacts}")
+
+
+def after(log: logging.Logger, artifacts) -> None:
+    log.info("Async prediction request for model '%s' by user '%s'", MODEL_ID, USER_ID)
+
+
+def run(fn, log: logging.Logger, artifacts, requests: int) -> float:
+    token = current_route.set("/v2/jobs/")
+    try:
+        start = time.perf_counter()
+        for _ in range(requests):
+            fn(log, artifacts)
+        return (time.perf_counter() - start) / requests * 1e6
+    finally:
+        current_route.reset(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        ensure_models_loaded()
+    artifacts = MODEL_REGISTRY[MODEL_ID]
+
+    with tempfile.TemporaryFile("w") as out:
+        stream = logging.StreamHandler(out)
+        stream.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        results = {"before": run(before, _logger("before", stream), artifacts, args.requests)}
+
+        for name, rate in (("after", 1.0), ("sampled", args.sample_rate)):
+            writer = logging.StreamHandler(out)
+            writer.setFormatter(JsonFormatter())
+            log_queue = queue.SimpleQueue()
+            handler = DeferredQueueHandler(log_queue)
+            handler.addFilter(RouteSampler({"/v2/jobs": rate}))
+            listener = logging.handlers.QueueListener(log_queue, writer)
+            listener.start()
+            try:
+                results[name] = run(after, _logger(name, handler), artifacts, args.requests)
+            finally:
+                listener.stop()
+
+    print(f"{args.requests} requests, model {MODEL_ID}")
+    for name, us in results.items():
+        print(f"  {name:<8} {us:>10.2f} us/request on the request thread")
+    print(f"  speedup  {results['before'] / results['after']:>10.1f}x (after), "
+          f"{results['before'] / results['sampled']:.1f}x (sampled at {args.sample_rate})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Package pickled model artifacts into versioned bundles.
+
+For every model in `models.MODELS` (or the ones given with --model-id) this
+converts `<model_dir>/<filename>` into `<model_dir>/<bundle>`:
+
+    model.ubj            XGBoost native UBJSON booster
+    lower_bounds.npy     winsorization bounds, feature order
+    upper_bounds.npy
+    scaler_center.npy    RobustScaler statistics, feature order
+    scaler_scale.npy
+    manifest.json        feature order, checksums, library versions, MODELS metadata
+
+Models that share a `bundle` directory are packaged once (from the first
+model listed), and `load_models` loads the shared bundle once per process.
+
+With --compare it also loads each model both ways in fresh processes and
+reports load time and resident memory for the pickle and the bundle.
+
+Usage (from the backend directory):
+    python -m tools.package_artifacts
+    python -m tools.package_artifacts --model-id xgb_momentum --compare
+"""
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import warnings
+
+from models import MODELS
+from settings import settings
+from shared.artifacts import load_bundle, write_bundle
+
+BASE = pathlib.Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter: import the libraries first so only the
+# artifact load itself is measured, then report time and memory deltas.
+_LOAD_SNIPPET = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+import numpy, pandas, sklearn, xgboost, joblib
+
+def status():
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0])
+    return fields
+
+kind, path = sys.argv[1], sys.argv[2]
+before = status()
+start = time.perf_counter()
+if kind == "pickle":
+    artifacts = joblib.load(path)
+else:
+    from shared.artifacts import load_bundle
+    artifacts = load_bundle(path, mmap=True, verify=False)
+load_ms = (time.perf_counter() - start) * 1000
+after = status()
+print(json.dumps({
+    "load_ms": round(load_ms, 3),
+    "rss_kb": after["VmRSS"] - before["VmRSS"],
+    "rss_anon_kb": after.get("RssAnon", 0) - before.get("RssAnon", 0),
+    "rss_file_kb": after.get("RssFile", 0) - before.get("RssFile", 0),
+}))
+"""
+
+
+def package_model(model_id: str) -> str:
+    metadata = MODELS[model_id]
+    bundle = metadata.get("bundle")
+    if not bundle:
+        raise SystemExit(f"Model '{model_id}' has no 'bundle' entry in models.MODELS")
+
+    import joblib
+
+    source = os.path.join(BASE, settings.model_dir, metadata["filename"])
+    out_dir = os.path.join(BASE, settings.model_dir, bundle)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        artifacts = joblib.load(source)
+
+    write_bundle(artifacts, dict(metadata), out_dir, source=source)
+    check_bundle(artifacts, out_dir)
+    return out_dir
+
+
+def check_bundle(artifacts, out_dir: str) -> None:
+    """
+    Fail loudly if the bundle does not reproduce the pickle's predictions.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from shared.utils import preprocess_input
+
+    rng = np.random.default_rng(0)
+    lower = artifacts["lower_bounds"][artifacts["feature_names"]].to_numpy()
+    upper = artifacts["upper_bounds"][artifacts["feature_names"]].to_numpy()
+    rows = pd.DataFrame(
+        rng.uniform(lower, upper, size=(256, len(lower))),
+        columns=artifacts["feature_names"],
+    ).to_dict(orient="records")
+
+    bundled = load_bundle(out_dir)
+    expected = artifacts["model"].predict(preprocess_input(rows, artifacts))
+    actual = bundled["model"].predict(preprocess_input(rows, bundled))
+    max_err = float(np.max(np.abs(expected - actual)))
+    if max_err > 1e-6:
+        raise SystemExit(f"Bundle {out_dir} diverges from the pickle (max abs error {max_err:.3g})")
+
+
+def measure(kind: str, path: str, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", _LOAD_SNIPPET, kind, path],
+            capture_output=True, text=True, cwd=BASE, check=True,
+        )
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["load_ms"])
+    return {"kind": kind, "path": os.path.relpath(path, BASE), **best}
+
+
+def compare(model_id: str, repeats: int) -> list[dict]:
+    metadata = MODELS[model_id]
+    pickle_path = os.path.join(BASE, settings.model_dir, metadata["filename"])
+    bundle_path = os.path.join(BASE, settings.model_dir, metadata["bundle"])
+    return [measure("pickle", pickle_path, repeats), measure("bundle", bundle_path, repeats)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-id", action="append", choices=sorted(MODELS), help="Model(s) to package (default: all)")
+    parser.add_argument("--compare", action="store_true", help="Report load time and RSS for pickle vs bundle")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh-process loads per format for --compare")
+    args = parser.parse_args()
+
+    packaged = {}
+    for model_id in args.model_id or list(MODELS):
+        bundle = MODELS[model_id].get("bundle")
+        if bundle in packaged:
+            print(f"Skipped {model_id}: shares {bundle} with {packaged[bundle]}")
+            continue
+        out_dir = package_model(model_id)
+        packaged[bundle] = model_id
+        print(f"Packaged {model_id} -> {os.path.relpath(out_dir, BASE)}")
+
+        if args.compare:
+            for row in compare(model_id, args.repeats):
+                print(
+                    f"  {row['kind']:<7} load {row['load_ms']:>9.1f} ms   "
+                    f"rss +{row['rss_kb']:>7} kB (anon +{row['rss_anon_kb']} kB, file +{row['rss_file_kb']} kB)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Cold-start profiling report for each process role.
+
+Runs every role in a fresh interpreter with `-X importtime`, then prints the
+slowest imports and the startup phases recorded by `shared.startup`.
+
+Usage (from the backend directory):
+    python -m tools.profile_startup
+    python -m tools.profile_startup --roles api worker --top 15 --json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# Each snippet brings a role up the way its real entry point does and
+# prints the startup report as the last line of stdout.
+ROLE_SNIPPETS = {
+    # Import the app and run its lifespan startup (thread pool + model load)
+    "api": (
+        "import asyncio, json\n"
+        "import main\n"
+        "async def run():\n"
+        "    async with main.lifespan(main.app):\n"
+        "        pass\n"
+        "asyncio.run(run())\n"
+        "print(json.dumps(main.startup_profile.report()))\n"
+    ),
+    # Import the Celery app and do what worker_process_init does
+    "worker": (
+        "import json\n"
+        "from shared.startup import startup_profile\n"
+        "import shared.worker as w\n"
+        "w._mark_worker_role()\n"
+        "w._load_models_in_worker_process()\n"
+        "print(json.dumps(startup_profile.report()))\n"
+    ),
+    # Only what the health routes need to answer liveness probes
+    "health": (
+        "import json\n"
+        "from shared.startup import startup_profile\n"
+        "import routes.health\n"
+        "startup_profile.role = 'health'\n"
+        "print(json.dumps(startup_profile.report()))\n"
+    ),
+}
+
+
+def parse_importtime(stderr: str, top: int) -> list[dict]:
+    """
+    Parse `-X importtime` output into the `top` slowest top-level imports.
+
+    Only first-level entries (no leading indentation in the module column)
+    are kept so cumulative times are not double counted.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, module = parts
+        if module.startswith("  "):
+            continue
+        rows.append({
+            "module": module.strip(),
+            "self_ms": round(int(self_us) / 1000, 3),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 3),
+        })
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def profile_role(role: str, top: int) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ROLE_SNIPPETS[role]],
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    if proc.returncode != 0:
+        return {"role": role, "error": proc.stderr.strip().splitlines()[-1:], "wall_ms": wall_ms}
+
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report["wall_ms"] = wall_ms
+    report["slowest_imports"] = parse_importtime(proc.stderr, top)
+    return report
+
+
+def print_report(reports: list[dict]) -> None:
+    for report in reports:
+        print(f"=== {report['role']} (wall {report['wall_ms']} ms)")
+        if "error" in report:
+            print(f"  failed: {report['error']}")
+            continue
+        for name, ms in report["phases_ms"].items():
+            print(f"  phase {name:<20} {ms:>10.1f} ms")
+        print(f"  ready after          {report['ready_ms'] or 0:>10.1f} ms")
+        print(f"  heavy modules: {', '.join(report['heavy_modules_loaded']) or '-'}")
+        for row in report["slowest_imports"]:
+            print(f"  import {row['module']:<40} {row['cumulative_ms']:>10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", nargs="+", choices=sorted(ROLE_SNIPPETS), default=list(ROLE_SNIPPETS))
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list per role")
+    parser.add_argument("--json", action="store_true", help="Emit the report as JSON")
+    args = parser.parse_args()
+
+    reports = [profile_role(role, args.top) for role in args.roles]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print_report(reports)
+
+
+if __name__ == "__main__":
+    main()
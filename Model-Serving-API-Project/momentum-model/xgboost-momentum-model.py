@@ -1,9 +1,16 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
 import warnings
+from contextlib import contextmanager
+
 import numpy as np
 import pandas as pd
-import time
-import pickle
-import json
 from ta.momentum import RSIIndicator
 from ta.trend import MACD
 from ta.volatility import BollingerBands
@@ -13,64 +20,32 @@ from xgboost import XGBRegressor
 
 # XGBoost Momentum Model - Training & Artifact Generation Script
 # Author: John Swindell
+#
+# Staged, incremental pipeline:
+#   load       read the raw bars and hash them per (ticker, month)
+#   features   update the ticker/month-partitioned feature store; only months
+#              whose bars changed are recomputed, from a lookback tail
+#   assemble   market-relative features + target + train split (cached by
+#              the store's partition hashes)
+#   normalize  point-in-time expanding winsorization/scaling; extended row by
+#              row when the training set only grew
+#   tune       randomized search (cached; rerun when the training set has
+#              grown by --retune-growth or with --retune)
+#   train      reuses or warm-starts the previous booster when the params match
+#   artifacts  deployment pickle + sample payload
+#
+# Usage:
+#   python xgboost-momentum-model.py              # incremental run
+#   python xgboost-momentum-model.py --full       # ignore the store and caches
 
 # # 1. Imports & Global Settings
 warnings.simplefilter(action='ignore', category=FutureWarning)
+logger = logging.getLogger("momentum_pipeline")
 
-# # 2. Data Loading & Initial Preparation
-print("--- Section 2: Data Loading & Initial Preparation ---")
-df = pd.read_parquet('crypto_market_data.parquet')
-df['date'] = pd.to_datetime(df['date'])
-df.sort_values(by=['ticker', 'date'], inplace=True)
-df.reset_index(drop=True, inplace=True)
-print("Data loaded and prepared successfully.")
-
+# Bump when feature definitions change; invalidates the store and caches
+FEATURE_VERSION = 1
 
-# # 3. Feature Engineering
-print("\n--- Section 3: Feature Engineering ---")
-
-# --- Original Price & TA Features ---
 lookback_periods = [7, 10, 14, 21, 30, 42, 60]
-for period in lookback_periods:
-    df[f'ret_{period}d'] = df.groupby('ticker')['price'].pct_change(periods=period)
-
-df['ret_1d'] = df.groupby('ticker')['price'].pct_change(periods=1)
-df['volatility_14d'] = df.groupby('ticker')['ret_1d'].rolling(window=14).std().reset_index(level=0, drop=True)
-
-rolling_mean_vol = df.groupby('ticker')['volume'].rolling(window=14).mean().reset_index(level=0, drop=True)
-rolling_std_vol = df.groupby('ticker')['volume'].rolling(window=14).std().reset_index(level=0, drop=True)
-df['volume_zscore_14d'] = (df['volume'] - rolling_mean_vol) / rolling_std_vol
-
-df['rsi_14'] = df.groupby('ticker')['price'].transform(lambda x: RSIIndicator(close=x, window=14).rsi())
-df['bb_width'] = df.groupby('ticker')['price'].transform(lambda x: BollingerBands(close=x, window=20).bollinger_wband())
-df['bb_percent_b'] = df.groupby('ticker')['price'].transform(lambda x: BollingerBands(close=x, window=20).bollinger_pband())
-df['macd_diff'] = df.groupby('ticker')['price'].transform(lambda x: MACD(close=x, window_slow=26, window_fast=12, window_sign=9).macd_diff())
-
-# --- Market Regime Filter (Calculation on Full Dataset) ---
-print("Calculating market regime filter...")
-btc_df = df[df['ticker'] == 'BTC'][['date', 'price']].copy().set_index('date')
-btc_df['ma_200d'] = btc_df['price'].rolling(window=200).mean()
-btc_df['market_regime'] = btc_df['price'] > btc_df['ma_200d']
-df = df.merge(btc_df[['market_regime']], on='date', how='left')
-
-# --- Interaction Features ---
-print("Creating interaction features...")
-df['mom_x_vol_42d'] = df['ret_42d'] * df['volatility_14d']
-
-# --- Market-Neutral Momentum Features ---
-print("Creating market-neutral momentum features...")
-btc_returns = df[df['ticker'] == 'BTC'].set_index('date')
-market_return_cols = [f'ret_{p}d' for p in [1] + lookback_periods]
-btc_returns = btc_returns[market_return_cols]
-df = df.merge(btc_returns.add_suffix('_btc'), on='date', how='left')
-for period in [1] + lookback_periods:
-    df[f'ret_{period}d_neutral'] = df[f'ret_{period}d'] - df[f'ret_{period}d_btc']
-df.drop(columns=[col + '_btc' for col in market_return_cols], inplace=True)
-
-print("Feature engineering complete.")
-
-# # 4. Preprocessing & Model Preparation
-print("\n--- Section 4: Preprocessing & Model Preparation ---")
 features = [
     'ret_7d', 'ret_10d', 'ret_14d', 'ret_21d', 'ret_30d', 'ret_42d', 'ret_60d',
     'volatility_14d', 'volume_zscore_14d', 'rsi_14', 'bb_width', 'bb_percent_b', 'macd_diff',
@@ -78,40 +53,11 @@ features = [
     'ret_1d_neutral', 'ret_7d_neutral', 'ret_10d_neutral', 'ret_14d_neutral',
     'ret_21d_neutral', 'ret_30d_neutral', 'ret_42d_neutral', 'ret_60d_neutral'
 ]
-df['target'] = df.groupby('ticker')['price'].pct_change(periods=7).shift(-7)
-df.dropna(subset=features + ['target'], inplace=True)
-df.sort_values('date', inplace=True)
-
-split_index = int(len(df) * 0.8)
-cutoff_date = df.iloc[split_index]['date']
-train_df = df[df['date'] < cutoff_date].copy()
-
-X_train_raw = train_df[features]
-y_train = train_df['target']
-
-# --- Vectorized Point-in-Time Processing for Training Data ---
-print("\nStarting vectorized point-in-time processing of training data...")
+# Bars recomputed before the first changed month. Covers the longest window
+# (60 bars) and lets the EMA-based indicators (RSI, MACD) forget their seed;
+# the result matches a full recompute to ~1e-7 relative.
+TAIL_BARS = 300
 min_window_size = 180
-lower_bounds = X_train_raw.expanding(min_periods=min_window_size).quantile(0.01)
-upper_bounds = X_train_raw.expanding(min_periods=min_window_size).quantile(0.99)
-X_train_winsorized = X_train_raw.clip(lower=lower_bounds.shift(1), upper=upper_bounds.shift(1), axis=1)
-
-expanding_median = X_train_raw.expanding(min_periods=min_window_size).median()
-expanding_q1 = X_train_raw.expanding(min_periods=min_window_size).quantile(0.25)
-expanding_q3 = X_train_raw.expanding(min_periods=min_window_size).quantile(0.75)
-expanding_iqr = expanding_q3 - expanding_q1
-X_train_processed = (X_train_winsorized - expanding_median.shift(1)) / expanding_iqr.shift(1)
-
-X_train_processed.replace([np.inf, -np.inf], np.nan, inplace=True)
-X_train_processed.fillna(0, inplace=True)
-X_train_processed.dropna(inplace=True)
-y_train_processed = y_train[X_train_processed.index]
-print("Training data processing complete.")
-
-
-# # 5. Model Training (XGBoost)
-print("\n--- Section 5: Model Training (XGBoost) ---")
-print("Setting up Walk-Forward Cross-Validation and Hyperparameter Tuning for XGBoost...")
 param_search_space = {
     'learning_rate': [0.03, 0.05, 0.1],
     'max_depth': [2, 3, 4],
@@ -121,54 +67,435 @@ param_search_space = {
     'reg_lambda': [5, 10, 20],
     'gamma': [0, 1, 5]
 }
-tscv = TimeSeriesSplit(n_splits=5)
-model = XGBRegressor(objective='reg:squarederror', random_state=42, n_jobs=-1)
-grid_search = RandomizedSearchCV(
-    estimator=model, param_distributions=param_search_space,
-    n_iter=25, scoring='neg_root_mean_squared_error',
-    cv=tscv, verbose=2, n_jobs=-1
-)
-print("Training XGBoost model...")
-start_time = time.time()
-grid_search.fit(X_train_processed, y_train_processed)
-end_time = time.time()
-print(f"Grid search complete. Took {end_time - start_time:.2f} seconds.")
-print("\nBest parameters found: ", grid_search.best_params_)
+EXPANDING_QUANTILES = {'lower': 0.01, 'upper': 0.99, 'median': 0.5, 'q1': 0.25, 'q3': 0.75}
+# Extending cached stats inserts each appended row into the sorted history,
+# O(appended x cached) per feature; past this share of the cached rows the
+# full pandas recompute is faster
+INCREMENTAL_MAX_GROWTH = 0.1
+
+
+@contextmanager
+def stage(name):
+    """Log the wall time of a pipeline stage; the body can add details via the yielded dict."""
+    info = {}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        details = ", ".join(f"{k}={v}" for k, v in info.items())
+        logger.info("stage %-9s %8.2fs  %s", name, time.perf_counter() - start, details)
+
+
+def frame_hash(df, *extra):
+    """Content hash of a frame (values and column names, not the index)."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update(json.dumps([list(map(str, df.columns)), *extra], default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as file:
+        return json.load(file)
+
+
+def _write_json(path, value):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as file:
+        json.dump(value, file, indent=2)
+    os.replace(tmp, path)
+
+
+# # 2. Data Loading & Initial Preparation
+def load_raw(path):
+    df = pd.read_parquet(path)
+    df['date'] = pd.to_datetime(df['date'])
+    df.sort_values(by=['ticker', 'date'], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def partition_hashes(df):
+    """Hash of the raw bars in each (ticker, month) partition, keyed 'TICKER/YYYY-MM'."""
+    months = df['date'].dt.strftime('%Y-%m')
+    return {
+        f"{ticker}/{month}": frame_hash(group[['date', 'price', 'volume']])
+        for (ticker, month), group in df.groupby([df['ticker'], months], sort=True)
+    }
+
+
+# # 3. Feature Engineering
+def ticker_features(bars):
+    """
+    Ticker-local features for one ticker's bars (sorted by date). Everything
+    that needs other tickers (market regime, BTC-neutral returns) or future
+    bars (the target) is added in `assemble_dataset`.
+    """
+    df = bars[['date', 'ticker', 'price', 'volume']].reset_index(drop=True)
+    price = df['price']
+    for period in lookback_periods:
+        df[f'ret_{period}d'] = price.pct_change(periods=period)
+    df['ret_1d'] = price.pct_change(periods=1)
+    df['volatility_14d'] = df['ret_1d'].rolling(window=14).std()
+
+    rolling_mean_vol = df['volume'].rolling(window=14).mean()
+    rolling_std_vol = df['volume'].rolling(window=14).std()
+    df['volume_zscore_14d'] = (df['volume'] - rolling_mean_vol) / rolling_std_vol
+
+    df['rsi_14'] = RSIIndicator(close=price, window=14).rsi()
+    bands = BollingerBands(close=price, window=20)
+    df['bb_width'] = bands.bollinger_wband()
+    df['bb_percent_b'] = bands.bollinger_pband()
+    df['macd_diff'] = MACD(close=price, window_slow=26, window_fast=12, window_sign=9).macd_diff()
+
+    # --- Interaction Features ---
+    df['mom_x_vol_42d'] = df['ret_42d'] * df['volatility_14d']
+    return df
+
+
+def update_feature_store(raw, store_dir, full=False):
+    """
+    Bring the partitioned feature store (`<store>/ticker=X/month=YYYY-MM/`)
+    in line with `raw`.
+
+    For each ticker, the earliest month whose bars changed (or are new) and
+    every later month are recomputed from `TAIL_BARS` bars before it;
+    untouched months are left as they are. Returns the manifest.
+    """
+    manifest_path = os.path.join(store_dir, '_manifest.json')
+    manifest = _read_json(manifest_path, {})
+    if full or manifest.get('version') != FEATURE_VERSION:
+        shutil.rmtree(store_dir, ignore_errors=True)
+        manifest = {}
+    os.makedirs(store_dir, exist_ok=True)
+
+    old = manifest.get('partitions', {})
+    new = partition_hashes(raw)
+    months = raw['date'].dt.strftime('%Y-%m')
+    recomputed = 0
+
+    for ticker, bars in raw.groupby('ticker', sort=True):
+        ticker_months = months[bars.index]
+        changed = sorted(
+            m for m in ticker_months.unique() if old.get(f"{ticker}/{m}") != new[f"{ticker}/{m}"]
+        )
+        stale = [k for k in old if k.startswith(f"{ticker}/") and k not in new]
+        if not changed and not stale:
+            continue
+        first = changed[0] if changed else min(k.split('/')[1] for k in stale)
+        start = max(int(np.argmax((ticker_months >= first).values)) - TAIL_BARS, 0)
+        computed = ticker_features(bars.iloc[start:])
+        computed_months = computed['date'].dt.strftime('%Y-%m')
+
+        ticker_dir = os.path.join(store_dir, f"ticker={ticker}")
+        for key in stale:
+            shutil.rmtree(os.path.join(ticker_dir, f"month={key.split('/')[1]}"), ignore_errors=True)
+        for month, part in computed[computed_months >= first].groupby(computed_months, sort=True):
+            part_dir = os.path.join(ticker_dir, f"month={month}")
+            os.makedirs(part_dir, exist_ok=True)
+            part.drop(columns=['ticker']).to_parquet(os.path.join(part_dir, 'part.parquet'), index=False)
+            recomputed += 1
+
+    # Tickers gone from `raw` altogether: drop their whole partition tree,
+    # or read_feature_store would keep reading them
+    tickers = set(raw['ticker'].astype(str).unique())
+    for entry in os.listdir(store_dir):
+        if entry.startswith('ticker=') and entry[len('ticker='):] not in tickers:
+            shutil.rmtree(os.path.join(store_dir, entry), ignore_errors=True)
+
+    manifest = {'version': FEATURE_VERSION, 'partitions': new}
+    _write_json(manifest_path, manifest)
+    return manifest, recomputed
+
+
+def read_feature_store(store_dir):
+    df = pd.read_parquet(store_dir)
+    df['ticker'] = df['ticker'].astype(str)
+    df.drop(columns=['month'], inplace=True)
+    df.sort_values(by=['ticker', 'date'], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+# # 4. Preprocessing & Model Preparation
+def assemble_dataset(df):
+    """
+    Market-relative features and the target on top of the stored features;
+    returns the training rows (first 80% by date).
+    """
+    # --- Market Regime Filter (Calculation on Full Dataset) ---
+    btc_df = df[df['ticker'] == 'BTC'][['date', 'price']].copy().set_index('date')
+    btc_df['ma_200d'] = btc_df['price'].rolling(window=200).mean()
+    btc_df['market_regime'] = btc_df['price'] > btc_df['ma_200d']
+    df = df.merge(btc_df[['market_regime']], on='date', how='left')
+
+    # --- Market-Neutral Momentum Features ---
+    btc_returns = df[df['ticker'] == 'BTC'].set_index('date')
+    market_return_cols = [f'ret_{p}d' for p in [1] + lookback_periods]
+    btc_returns = btc_returns[market_return_cols]
+    df = df.merge(btc_returns.add_suffix('_btc'), on='date', how='left')
+    for period in [1] + lookback_periods:
+        df[f'ret_{period}d_neutral'] = df[f'ret_{period}d'] - df[f'ret_{period}d_btc']
+    df.drop(columns=[col + '_btc' for col in market_return_cols], inplace=True)
+
+    df['target'] = df.groupby('ticker')['price'].pct_change(periods=7).shift(-7)
+    df.dropna(subset=features + ['target'], inplace=True)
+    # Stable (date, ticker) order, so the expanding statistics of earlier rows
+    # do not change when rows are appended
+    df.sort_values(['date', 'ticker'], inplace=True, kind='mergesort')
+
+    split_index = int(len(df) * 0.8)
+    cutoff_date = df.iloc[split_index]['date']
+    train_df = df[df['date'] < cutoff_date].reset_index(drop=True)
+    return train_df[['date', 'ticker'] + features + ['target']]
+
+
+def _expanding_quantiles(sorted_values, qs):
+    # pandas' default 'linear' interpolation, every quantile in one pass
+    pos = qs * (len(sorted_values) - 1)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def expanding_stats(X_train_raw, cache_path, full=False):
+    """
+    Expanding (min_periods=`min_window_size`) quantiles of each feature:
+    row i uses rows 0..i. When the cached stats were computed on a prefix of
+    `X_train_raw` and at most INCREMENTAL_MAX_GROWTH of it was appended, only
+    the appended rows are computed, by inserting each new value into the
+    sorted prefix; otherwise everything is recomputed.
+
+    Returns:
+    --------
+    (dict of DataFrame, int)
+        Stats keyed as in EXPANDING_QUANTILES, and the number of rows computed.
+    """
+    X = X_train_raw.to_numpy(dtype='float64')
+    n_rows = len(X)
+    cached = None if full or not os.path.exists(cache_path) else np.load(cache_path, allow_pickle=False)
+
+    n_cached = int(cached['n_rows']) if cached is not None else 0
+    reusable = (
+        cached is not None
+        and 0 < n_cached <= n_rows
+        and n_rows - n_cached <= INCREMENTAL_MAX_GROWTH * n_cached
+        and str(cached['prefix_hash']) == frame_hash(X_train_raw.iloc[:n_cached], min_window_size)
+    )
+    if reusable:
+        stats = {name: np.empty_like(X) for name in EXPANDING_QUANTILES}
+        for name in EXPANDING_QUANTILES:
+            stats[name][:n_cached] = cached[name]
+        qs = np.array(list(EXPANDING_QUANTILES.values()))
+        for j in range(X.shape[1]):
+            sorted_values = np.sort(X[:n_cached, j])
+            block = np.full((n_rows - n_cached, len(qs)), np.nan)
+            for i in range(n_cached, n_rows):
+                sorted_values = np.insert(sorted_values, np.searchsorted(sorted_values, X[i, j]), X[i, j])
+                if i + 1 >= min_window_size:
+                    block[i - n_cached] = _expanding_quantiles(sorted_values, qs)
+            for k, name in enumerate(EXPANDING_QUANTILES):
+                stats[name][n_cached:, j] = block[:, k]
+        computed = n_rows - n_cached
+    else:
+        expanding = X_train_raw.expanding(min_periods=min_window_size)
+        stats = {name: expanding.quantile(q).to_numpy() for name, q in EXPANDING_QUANTILES.items()}
+        computed = n_rows
+
+    if computed:
+        tmp = f"{cache_path}.tmp.npz"
+        np.savez(tmp, n_rows=n_rows, prefix_hash=frame_hash(X_train_raw, min_window_size), **stats)
+        os.replace(tmp, cache_path)
+    frames = {
+        name: pd.DataFrame(values, index=X_train_raw.index, columns=X_train_raw.columns)
+        for name, values in stats.items()
+    }
+    return frames, computed
+
+
+def normalize(X_train_raw, stats):
+    """Vectorized point-in-time processing: each row is clipped/scaled with the stats of the rows before it."""
+    X_train_winsorized = X_train_raw.clip(
+        lower=stats['lower'].shift(1), upper=stats['upper'].shift(1), axis=1
+    )
+    expanding_iqr = stats['q3'] - stats['q1']
+    X_train_processed = (X_train_winsorized - stats['median'].shift(1)) / expanding_iqr.shift(1)
+    X_train_processed.replace([np.inf, -np.inf], np.nan, inplace=True)
+    X_train_processed.fillna(0, inplace=True)
+    return X_train_processed
+
+
+# # 5. Model Training (XGBoost)
+def tune(X_train_processed, y_train_processed, cache_path, n_iter, retune_growth, force=False):
+    """
+    Randomized walk-forward search, or the cached best params if the search
+    config is unchanged and the training set has grown by less than
+    `retune_growth` since they were found.
+    """
+    config_hash = hashlib.sha256(
+        json.dumps([param_search_space, n_iter, FEATURE_VERSION], sort_keys=True).encode()
+    ).hexdigest()[:16]
+    cached = _read_json(cache_path, None)
+    if (
+        not force
+        and cached
+        and cached['config_hash'] == config_hash
+        and len(X_train_processed) <= cached['rows'] * (1 + retune_growth)
+    ):
+        return cached['best_params'], True
+
+    tscv = TimeSeriesSplit(n_splits=5)
+    model = XGBRegressor(objective='reg:squarederror', random_state=42, n_jobs=-1)
+    grid_search = RandomizedSearchCV(
+        estimator=model, param_distributions=param_search_space,
+        n_iter=n_iter, scoring='neg_root_mean_squared_error',
+        cv=tscv, verbose=1, n_jobs=-1
+    )
+    grid_search.fit(X_train_processed, y_train_processed)
+    best_params = {k: (v.item() if hasattr(v, 'item') else v) for k, v in grid_search.best_params_.items()}
+    _write_json(cache_path, {'config_hash': config_hash, 'rows': len(X_train_processed), 'best_params': best_params})
+    return best_params, False
+
+
+def train(X_train_processed, y_train_processed, params, model_path, warm_start_rounds, cold=False):
+    """
+    Fit the final model, reusing the previous one where possible:
+
+    - same params and training set: the previous model as is;
+    - same params, new rows: continue it with `warm_start_rounds` extra trees
+      on the current training set, until warm starts have doubled the
+      configured `n_estimators` (then refit so the ensemble stays bounded);
+    - otherwise: a full fit.
+
+    Returns:
+    --------
+    (XGBRegressor, str)
+        The model and how it was obtained ("reused", "warm", "full").
+    """
+    meta_path = f"{model_path}.json"
+    data_hash = frame_hash(pd.concat([X_train_processed, y_train_processed], axis=1))
+    previous = _read_json(meta_path, None)
+    usable = not cold and previous is not None and previous['params'] == params and os.path.exists(model_path)
+
+    model = XGBRegressor(objective='reg:squarederror', random_state=42, n_jobs=-1, **params)
+    if usable and previous['data_hash'] == data_hash:
+        model.load_model(model_path)
+        return model, 'reused'
+
+    if usable and warm_start_rounds > 0 and previous['trees'] + warm_start_rounds <= 2 * params['n_estimators']:
+        model.set_params(n_estimators=warm_start_rounds)
+        model.fit(X_train_processed, y_train_processed, xgb_model=model_path)
+        mode = 'warm'
+    else:
+        model.fit(X_train_processed, y_train_processed)
+        mode = 'full'
+
+    model.save_model(model_path)
+    _write_json(meta_path, {
+        'params': params,
+        'data_hash': data_hash,
+        'rows': len(X_train_processed),
+        'trees': model.get_booster().num_boosted_rounds(),
+    })
+    return model, mode
 
 
 # # 6. Generate Deployment Artifacts
-print("\n--- Section 6: Generate Deployment Artifacts ---")
-
-# 1. Get the best model from the grid search
-best_model = grid_search.best_estimator_
-
-# 2. Define the final preprocessing objects fitted on the entire raw training data
-final_lower_bounds = X_train_raw.quantile(0.01)
-final_upper_bounds = X_train_raw.quantile(0.99)
-# Note: Fit scaler on the winsorized data, as that's what the model was trained on
-final_scaler = RobustScaler().fit(X_train_raw.clip(lower=final_lower_bounds, upper=final_upper_bounds, axis=1))
-
-# 3. Create a dictionary to hold all the artifacts for deployment
-artifacts = {
-    'model': best_model,
-    'scaler': final_scaler,
-    'lower_bounds': final_lower_bounds,
-    'upper_bounds': final_upper_bounds,
-    'feature_names': features
-}
+def write_artifacts(best_model, X_train_raw, X_train_processed, artifacts_filename, payload_filename):
+    # Final preprocessing objects fitted on the entire raw training data
+    final_lower_bounds = X_train_raw.quantile(0.01)
+    final_upper_bounds = X_train_raw.quantile(0.99)
+    # Note: Fit scaler on the winsorized data, as that's what the model was trained on
+    final_scaler = RobustScaler().fit(X_train_raw.clip(lower=final_lower_bounds, upper=final_upper_bounds, axis=1))
+
+    artifacts = {
+        'model': best_model,
+        'scaler': final_scaler,
+        'lower_bounds': final_lower_bounds,
+        'upper_bounds': final_upper_bounds,
+        'feature_names': features
+    }
+    with open(artifacts_filename, 'wb') as file:
+        pickle.dump(artifacts, file)
+
+    # This will show you guys on the backend team the exact input format the model expects 👍
+    sample_payload = X_train_processed.head(1).to_dict(orient='records')[0]
+    with open(payload_filename, 'w') as file:
+        json.dump(sample_payload, file, indent=4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the XGBoost momentum model incrementally.")
+    parser.add_argument('--data', default='crypto_market_data.parquet')
+    parser.add_argument('--store', default='feature_store', help="partitioned feature store directory")
+    parser.add_argument('--cache', default='pipeline_cache', help="stage cache directory")
+    parser.add_argument('--artifacts', default='model_artifacts.pkl')
+    parser.add_argument('--payload', default='sample_prediction_payload.json')
+    parser.add_argument('--n-iter', type=int, default=25, help="randomized search iterations")
+    parser.add_argument('--retune-growth', type=float, default=0.1,
+                        help="rerun the search once the training set grows by this fraction")
+    parser.add_argument('--retune', action='store_true', help="rerun the search now")
+    parser.add_argument('--warm-start-rounds', type=int, default=50,
+                        help="trees added to the previous booster (0 = always refit)")
+    parser.add_argument('--full', action='store_true', help="ignore the feature store and all caches")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    os.makedirs(args.cache, exist_ok=True)
+    total = time.perf_counter()
+
+    with stage('load') as info:
+        raw = load_raw(args.data)
+        info.update(rows=len(raw), tickers=raw['ticker'].nunique())
+
+    with stage('features') as info:
+        manifest, recomputed = update_feature_store(raw, args.store, full=args.full)
+        info.update(partitions=len(manifest['partitions']), recomputed=recomputed)
+
+    with stage('assemble') as info:
+        key = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:16]
+        dataset_path = os.path.join(args.cache, f"train-{key}.parquet")
+        if os.path.exists(dataset_path) and not args.full:
+            train_df = pd.read_parquet(dataset_path)
+            info['cached'] = True
+        else:
+            train_df = assemble_dataset(read_feature_store(args.store))
+            for stale in os.listdir(args.cache):
+                if stale.startswith('train-') and stale.endswith('.parquet'):
+                    os.remove(os.path.join(args.cache, stale))
+            train_df.to_parquet(dataset_path, index=False)
+            info['cached'] = False
+        info['train_rows'] = len(train_df)
+
+    X_train_raw = train_df[features]
+    y_train_processed = train_df['target']
+
+    with stage('normalize') as info:
+        stats, computed = expanding_stats(X_train_raw, os.path.join(args.cache, 'expanding.npz'), full=args.full)
+        X_train_processed = normalize(X_train_raw, stats)
+        info['rows_computed'] = computed
+
+    with stage('tune') as info:
+        params, cached = tune(
+            X_train_processed, y_train_processed, os.path.join(args.cache, 'best_params.json'),
+            args.n_iter, args.retune_growth, force=args.retune or args.full,
+        )
+        info.update(cached=cached, params=params)
+
+    with stage('train') as info:
+        best_model, mode = train(
+            X_train_processed, y_train_processed, params, os.path.join(args.cache, 'model.ubj'),
+            args.warm_start_rounds, cold=args.full,
+        )
+        info.update(mode=mode, trees=best_model.get_booster().num_boosted_rounds())
+
+    with stage('artifacts'):
+        write_artifacts(best_model, X_train_raw, X_train_processed, args.artifacts, args.payload)
+
+    logger.info("✅ Pipeline finished in %.2fs; artifacts in '%s', payload in '%s'",
+                time.perf_counter() - total, args.artifacts, args.payload)
+
 
-# 4. Save the artifacts dictionary to a single .pkl file
-artifacts_filename = 'model_artifacts.pkl'
-with open(artifacts_filename, 'wb') as file:
-    pickle.dump(artifacts, file)
-print(f"✅ Model and preprocessors saved to '{artifacts_filename}'")
-
-# 5. Create and save a sample payload for API testing
-# This will show you guys on the backend team the exact input format the model expects 👍
-sample_payload_df = X_train_processed.head(1)
-sample_payload = sample_payload_df.to_dict(orient='records')[0]
-
-payload_filename = 'sample_prediction_payload.json'
-with open(payload_filename, 'w') as file:
-    json.dump(sample_payload, file, indent=4)
-print(f"✅ Example prediction payload saved to '{payload_filename}'")
\ No newline at end of file
+if __name__ == "__main__":
+    main()